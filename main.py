@@ -1,4 +1,5 @@
 #!/usr/bin/python3
+import signal
 import sys
 from pathlib import Path
 
@@ -10,12 +11,17 @@ from rest.api.constants.env_init import EnvInit
 from rest.api.exception.api_exception_docker import ApiExceptionDocker
 from rest.api.exception.api_exception_kubectl import ApiExceptionKubectl
 from rest.api.loghelpers.message_dumper import MessageDumper
+from rest.api.schedulers.config_reload_scheduler import ConfigReloadScheduler
 from rest.api.schedulers.docker_env_expire_scheduler import DockerEnvExpireScheduler
+from rest.api.schedulers.docker_health_scheduler import DockerHealthScheduler
+from rest.api.schedulers.docker_pool_scheduler import DockerPoolScheduler
 from rest.api.schedulers.kubectl_env_expire_scheduler import KubectlEnvExpireScheduler
+from rest.api.schedulers.process_reaper_scheduler import ProcessReaperScheduler
 from rest.api.views import app
 from rest.api.views.docker_view import DockerView
 from rest.api.views.kubectl_view import KubectlView
 from rest.environment.environment import EnvironmentSingleton
+from rest.service.docker_events import DockerEventsWatcher
 from rest.service.eureka import Eureka
 from rest.service.fluentd import Fluentd
 from rest.utils.env_startup import EnvStartupSingleton
@@ -33,33 +39,36 @@ if __name__ == "__main__":
 
     fluentd_tag = "startup"
     host = '0.0.0.0'
-    port = EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.PORT)
+    config = EnvStartupSingleton.get_instance().get_config()
+    port = config.PORT
     message_dumper = MessageDumper()
     io_utils = IOUtils()
 
-    if EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.EUREKA_SERVER):
-        Eureka(EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.EUREKA_SERVER)).register_app(
-            EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.APP_IP_PORT),
-            EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.APP_APPEND_LABEL))
+    if config.EUREKA_SERVER:
+        Eureka(config.EUREKA_SERVER).register_app(config.APP_IP_PORT, config.APP_APPEND_LABEL)
 
     io_utils.create_dirs([Path(EnvInit.init.get(EnvConstants.DEPLOY_PATH)),
                           Path(EnvInit.init.get(EnvConstants.TEMPLATES_DIR)),
                           Path(EnvInit.init.get(EnvConstants.VARS_DIR))])
 
     DockerEnvExpireScheduler(fluentd_utils=DockerView.fluentd,
-                             poll_interval=EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                 EnvConstants.SCHEDULER_POLL_INTERVAL),  # seconds
-                             env_expire_in=EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                 EnvConstants.ENV_EXPIRE_IN)).start()  # minutes
+                             poll_interval=config.SCHEDULER_POLL_INTERVAL,  # seconds
+                             env_expire_in=config.ENV_EXPIRE_IN).start()  # minutes
     KubectlEnvExpireScheduler(fluentd_utils=KubectlView.fluentd,
-                              poll_interval=EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                  EnvConstants.SCHEDULER_POLL_INTERVAL),
-                              env_expire_in=EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                  EnvConstants.ENV_EXPIRE_IN)).start()
+                              poll_interval=config.SCHEDULER_POLL_INTERVAL,
+                              env_expire_in=config.ENV_EXPIRE_IN).start()
+    if EnvInit.init.get(EnvConstants.DEPLOY_WITH).lower() == "docker":
+        DockerEventsWatcher(fluentd_utils=DockerView.fluentd).start()
+        DockerHealthScheduler(poll_interval=config.DOCKER_HEALTH_POLL_INTERVAL).start()
+        DockerPoolScheduler(poll_interval=config.POOL_POLL_INTERVAL).start()
+    ProcessReaperScheduler(poll_interval=config.PROCESS_REAP_INTERVAL).start()
+    ConfigReloadScheduler(poll_interval=config.CONFIG_POLL_INTERVAL).start()
+    if hasattr(signal, "SIGHUP"):
+        # the handler runs in the main thread, the serve loop: the reload errors are logged, not raised
+        signal.signal(signal.SIGHUP, lambda signum, frame: ConfigReloadScheduler.reload())
 
     environ_dump = message_dumper.dump_message(EnvironmentSingleton.get_instance().get_env_and_virtual_env())
-    ip_port_dump = message_dumper.dump_message(
-        {"host": host, "port": EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.PORT)})
+    ip_port_dump = message_dumper.dump_message({"host": host, "port": config.PORT})
 
     app.logger.debug({"msg": environ_dump})
     app.logger.debug({"msg": ip_port_dump})
@@ -67,17 +76,15 @@ if __name__ == "__main__":
 
     logger = \
         sender.FluentSender(tag=properties.get('name'),
-                            host=EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                EnvConstants.FLUENTD_IP_PORT).split(":")[0],
-                            port=int(EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                EnvConstants.FLUENTD_IP_PORT).split(":")[1])) \
-            if EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.FLUENTD_IP_PORT) else None
+                            host=config.FLUENTD_IP_PORT.split(":")[0],
+                            port=int(config.FLUENTD_IP_PORT.split(":")[1])) \
+            if config.FLUENTD_IP_PORT else None
     fluentd_utils = Fluentd(logger)
     fluentd_utils.emit(tag=fluentd_tag, msg=environ_dump)
 
-    is_https = EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.HTTPS_ENABLE)
-    https_cert_path = EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.HTTPS_CERT)
-    https_prv_key_path = EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.HTTPS_KEY)
+    is_https = config.HTTPS_ENABLE
+    https_cert_path = config.HTTPS_CERT
+    https_prv_key_path = config.HTTPS_KEY
     ssl_context = None
     if is_https:
         ssl_context = (https_cert_path, https_prv_key_path)
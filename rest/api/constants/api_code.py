@@ -31,4 +31,9 @@ class ApiCode(Enum):
     SET_ENV_VAR_FAILURE = 1026
     FOLDER_UNZIP_FAILURE = 1027
     DEPLOYMENTS_FOLDER_CLEANUP_FAILURE = 1028
+    GET_DEPLOYMENT_JOB_FAILURE = 1029
+    DEPLOYMENT_POOL_EMPTY = 1030
+    OPERATION_NOT_FOUND = 1031
+    GET_COMMAND_RUN_FAILURE = 1032
+    MAX_COMMAND_RUNS_REACHED = 1033
     GENERAL = 1100
@@ -18,3 +18,21 @@ class EnvConstants:
     HTTPS_ENABLE = "HTTPS_ENABLE"
     HTTPS_CERT = "HTTPS_CERT"
     HTTPS_KEY = "HTTPS_KEY"
+    DOCKER_BACKEND = "DOCKER_BACKEND"
+    DOCKER_SOCK = "DOCKER_SOCK"
+    DOCKER_HEALTH_POLL_INTERVAL = "DOCKER_HEALTH_POLL_INTERVAL"
+    DOCKER_HEALTH_TTL = "DOCKER_HEALTH_TTL"
+    DEPLOY_WORKERS = "DEPLOY_WORKERS"
+    IMAGE_PULL_TTL = "IMAGE_PULL_TTL"
+    IMAGE_PULL_WORKERS = "IMAGE_PULL_WORKERS"
+    TEARDOWN_WORKERS = "TEARDOWN_WORKERS"
+    POOL_POLL_INTERVAL = "POOL_POLL_INTERVAL"
+    CMD_TIMEOUT = "CMD_TIMEOUT"
+    CMD_TIMEOUTS = "CMD_TIMEOUTS"
+    PROCESS_RETENTION = "PROCESS_RETENTION"
+    PROCESS_REAP_INTERVAL = "PROCESS_REAP_INTERVAL"
+    CONFIG_POLL_INTERVAL = "CONFIG_POLL_INTERVAL"
+    COMMAND_WORKERS = "COMMAND_WORKERS"
+    COMMAND_RUN_TTL = "COMMAND_RUN_TTL"
+    COMMAND_CONCURRENCY = "COMMAND_CONCURRENCY"
+    VARS_CACHE_SIZE = "VARS_CACHE_SIZE"
@@ -27,17 +27,21 @@ class EnvInit:
         EnvConstants.MAX_DEPLOYMENTS)) if EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
         EnvConstants.MAX_DEPLOYMENTS) else 10
     init[EnvConstants.DEPLOY_PATH] = init.get(EnvConstants.WORKSPACE) + "/deployments"
+    init[EnvConstants.DOCKER_BACKEND] = EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
+        EnvConstants.DOCKER_BACKEND).lower() if EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
+        EnvConstants.DOCKER_BACKEND) else "cli"
+    init[EnvConstants.DOCKER_SOCK] = EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
+        EnvConstants.DOCKER_SOCK) if EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
+        EnvConstants.DOCKER_SOCK) else "/var/run/docker.sock"
 
     if not EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.VARS_DIR):
-        EnvironmentSingleton.get_instance().get_env_and_virtual_env()[EnvConstants.VARS_DIR] = init.get(
-            EnvConstants.VARS_DIR)
+        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.VARS_DIR, init.get(EnvConstants.VARS_DIR))
         app.logger.debug(f"{EnvConstants.VARS_DIR} env var not set, defaulting to : " + str(
             EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
                 EnvConstants.VARS_DIR)))
 
     if not EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.TEMPLATES_DIR):
-        EnvironmentSingleton.get_instance().get_env_and_virtual_env()[EnvConstants.TEMPLATES_DIR] = init.get(
-            EnvConstants.TEMPLATES_DIR)
+        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.TEMPLATES_DIR, init.get(EnvConstants.TEMPLATES_DIR))
         app.logger.debug(f"{EnvConstants.TEMPLATES_DIR} env var not set, defaulting to : " + str(
             EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
                 EnvConstants.TEMPLATES_DIR)))
@@ -48,3 +52,4 @@ class EnvInit:
     app.logger.debug("MAX_DEPLOYMENTS : " + str(init.get(EnvConstants.MAX_DEPLOYMENTS)))
     app.logger.debug("TEMPLATES_DIR : " + init.get(EnvConstants.TEMPLATES_DIR))
     app.logger.debug("VARS_DIR : " + init.get(EnvConstants.VARS_DIR))
+    app.logger.debug("DOCKER_BACKEND : " + init.get(EnvConstants.DOCKER_BACKEND))
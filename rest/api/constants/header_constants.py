@@ -2,3 +2,7 @@ class HeaderConstants:
     X_REQUEST_ID = "X-Request-ID"
     REQUEST_URI = "Request-Uri"
     TOKEN = "Token"
+    CACHE_AGE = "Cache-Age"
+    DOCKER_DAEMON = "Docker-Daemon"
+    JOB_ID = "Job-Id"
+    LOGS_CURSOR = "Logs-Cursor"
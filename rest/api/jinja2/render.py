@@ -6,6 +6,7 @@ __metaclass__ = type
 
 import os
 import sys
+import threading
 
 import jinja2
 import yaml
@@ -13,44 +14,92 @@ import yaml
 from rest.api.constants.env_constants import EnvConstants
 from rest.api.constants.env_init import EnvInit
 from rest.environment.environment import EnvironmentSingleton
+from rest.environment.variables_cache import VariablesCacheSingleton
+from rest.utils.io_utils import IOUtils
 
 
 class Render:
+    __lock = threading.Lock()
+    __envs = {}
+    # absolute, the cache stays where it is whatever the cwd later
+    BYTECODE_CACHE_DIR = os.path.abspath(EnvInit.init.get(EnvConstants.WORKSPACE) + "/jinja2")
 
-    def __init__(self, template=None, variables=None):
-        """Custom jinja2 render."""
+    def __init__(self, template=None, variables=None, templates_dir=None):
+        """Custom jinja2 render. The jinja2 env is shared by all the renders of a templates dir."""
         self.template = template
         self.variables = variables
-        self.env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(EnvInit.init.get(EnvConstants.TEMPLATES_DIR)),
-            extensions=['jinja2.ext.autoescape', 'jinja2.ext.do', 'jinja2.ext.loopcontrols', 'jinja2.ext.with_'],
-            autoescape=True,
-            trim_blocks=True)
+        self.env = Render.get_env(templates_dir if templates_dir else EnvInit.init.get(EnvConstants.TEMPLATES_DIR))
+
+    @staticmethod
+    def get_env(templates_dir):
+        """
+        The process wide jinja2 env of the templates dir, made once. The compiled templates are kept in memory
+        and in BYTECODE_CACHE_DIR, a template file changed on disk is compiled again on its next render.
+        The filters and globals are set here only, the request data goes in the render context.
+        """
+        env = Render.__envs.get(templates_dir)
+        if env is not None:
+            return env
+        with Render.__lock:
+            if Render.__envs.get(templates_dir) is None:
+                IOUtils.create_dir(Render.BYTECODE_CACHE_DIR)
+                env = jinja2.Environment(
+                    loader=jinja2.FileSystemLoader(templates_dir),
+                    extensions=['jinja2.ext.autoescape', 'jinja2.ext.do', 'jinja2.ext.loopcontrols',
+                                'jinja2.ext.with_'],
+                    autoescape=True,
+                    trim_blocks=True,
+                    auto_reload=True,
+                    bytecode_cache=jinja2.FileSystemBytecodeCache(Render.BYTECODE_CACHE_DIR))
+                env.filters['yaml'] = Render.yaml_filter
+                env.globals["environ"] = Render.environ
+                Render.__envs[templates_dir] = env
+
+        return Render.__envs.get(templates_dir)
+
+    @staticmethod
+    def clear_envs():
+        """ drops the shared jinja2 envs, the next renders make them again """
+        with Render.__lock:
+            Render.__envs.clear()
 
     @staticmethod
     def yaml_filter(value):
         return yaml.dump(value, Dumper=yaml.RoundTripDumper, indent=4)
 
+    @staticmethod
+    def environ(key):
+        """ the env var as the rendering thread sees it, with its request env vars """
+        return EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(key)
+
     @staticmethod
     def env_override(value, key):
         return os.getenv(key, value)
 
     def rend_template(self, vars_dir=EnvInit.init.get(EnvConstants.VARS_DIR)):
-        with open(vars_dir + "/" + self.variables, closefd=True) as f:
-            data = yaml.safe_load(f)
-
-        self.env.filters['yaml'] = self.yaml_filter
-        self.env.globals["environ"] = lambda key: EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(key)
-        self.env.globals["get_context"] = lambda: data
+        data = VariablesCacheSingleton.get_instance().get(vars_dir + "/" + self.variables)
 
         try:
-            template = self.env.get_template(self.template).render(data)
+            template = self.env.get_template(self.template).render(data, get_context=lambda: data)
         except Exception as e:
             raise e
         sys.stdout.write(template)
 
         return template
 
+    def rend_templates(self, overrides, vars_dir=EnvInit.init.get(EnvConstants.VARS_DIR)):
+        """ renders the template once for every dict of overrides, the variables file and the template are loaded once """
+        base_data = VariablesCacheSingleton.get_instance().get(vars_dir + "/" + self.variables) or {}
+
+        template = self.env.get_template(self.template)
+
+        templates = []
+        for override in overrides:
+            data = dict(base_data, **override)
+            templates.append(template.render(data, get_context=lambda: data))
+
+        return templates
+
     def get_jinja2env(self):
         return self.env
 
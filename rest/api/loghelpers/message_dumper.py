@@ -22,6 +22,13 @@ class MessageDumper:
         for key in self.response_headers:
             headers[key] = self.response_headers.get(key)
 
+        # reading a streamed body would consume it
+        if getattr(request, "is_streamed", False):
+            return {
+                LoggingMessage.HEADERS: headers,
+                LoggingMessage.BODY: {"message": "streamed"}
+            }
+
         try:
             body = json.loads(request.get_data())
             body["description"] = json.dumps(
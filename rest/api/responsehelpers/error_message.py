@@ -35,5 +35,11 @@ class ErrorMessage:
         ApiCode.SET_ENV_VAR_FAILURE.value: "Could not set env vars '%s'",
         ApiCode.FOLDER_UNZIP_FAILURE.value: "Could not unzip file '%'",
         ApiCode.DEPLOYMENTS_FOLDER_CLEANUP_FAILURE.value: "Error cleaning folders for inactive deployments.",
+        ApiCode.GET_DEPLOYMENT_JOB_FAILURE.value: "Could not get the deployment job '%s'.",
+        ApiCode.DEPLOYMENT_POOL_EMPTY.value: "No started deployment is ready in the pool '%s'.",
+        ApiCode.OPERATION_NOT_FOUND.value: "Operation id '%s' is not in flight.",
+        ApiCode.GET_COMMAND_RUN_FAILURE.value: "Could not get the command run '%s'.",
+        ApiCode.MAX_COMMAND_RUNS_REACHED.value: "Maximum command runs in progress %s reached. "
+                                                "Please retry when some of them finished.",
         ApiCode.GENERAL.value: "General error occurred."
     }
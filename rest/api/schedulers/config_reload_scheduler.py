@@ -0,0 +1,32 @@
+from rest.api.schedulers.base_scheduler import BaseScheduler
+from rest.api.views import app
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class ConfigReloadScheduler(BaseScheduler):
+
+    def __init__(self, poll_interval=10):
+        """Config reload on environment.properties change."""
+        super().__init__(fluentd_utils=None, method=ConfigReloadScheduler.reload, poll_interval=poll_interval,
+                         args=[True])
+
+    @staticmethod
+    def reload(if_changed=False):
+        """ an invalid config is logged and not applied, the current one stays. Returns the changed names """
+        try:
+            changed = EnvStartupSingleton.get_instance().reload_if_changed() if if_changed \
+                else EnvStartupSingleton.get_instance().reload()
+        except Exception as e:
+            app.logger.error({"msg": "Config reload failed, keeping the current config. Exception({0})".format(
+                e.__str__())})
+            return []
+        if changed:
+            app.logger.debug({"msg": {"reloaded": changed}})
+
+        return changed
+
+    def start(self):
+        super().start()
+
+    def stop(self):
+        super().stop()
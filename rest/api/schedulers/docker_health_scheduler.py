@@ -0,0 +1,16 @@
+from rest.api.schedulers.base_scheduler import BaseScheduler
+from rest.environment.docker_health import DockerHealthSingleton
+
+
+class DockerHealthScheduler(BaseScheduler):
+
+    def __init__(self, poll_interval=5):
+        """Docker daemon liveness probe."""
+        super().__init__(fluentd_utils=None, method=DockerHealthSingleton.get_instance().probe,
+                         poll_interval=poll_interval, args=[])
+
+    def start(self):
+        super().start()
+
+    def stop(self):
+        super().stop()
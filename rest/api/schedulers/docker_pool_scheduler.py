@@ -0,0 +1,16 @@
+from rest.api.schedulers.base_scheduler import BaseScheduler
+from rest.environment.deployment_pool import DeploymentPoolSingleton
+
+
+class DockerPoolScheduler(BaseScheduler):
+
+    def __init__(self, poll_interval=30):
+        """Warm deployment pools refill."""
+        super().__init__(fluentd_utils=None, method=DeploymentPoolSingleton.get_instance().refill,
+                         poll_interval=poll_interval, args=[])
+
+    def start(self):
+        super().start()
+
+    def stop(self):
+        super().stop()
@@ -0,0 +1,16 @@
+from rest.api.schedulers.base_scheduler import BaseScheduler
+from rest.environment.processes import ProcessesSingleton
+
+
+class ProcessReaperScheduler(BaseScheduler):
+
+    def __init__(self, poll_interval=5):
+        """Detached and streamed child processes reaper."""
+        super().__init__(fluentd_utils=None, method=ProcessesSingleton.get_instance().reap,
+                         poll_interval=poll_interval, args=[])
+
+    def start(self):
+        super().start()
+
+    def stop(self):
+        super().stop()
@@ -1,3 +1,4 @@
+import datetime
 import json
 import os
 import shutil
@@ -20,9 +21,18 @@ from rest.api.responsehelpers.active_deployments_response import ActiveDeploymen
 from rest.api.responsehelpers.error_message import ErrorMessage
 from rest.api.responsehelpers.http_response import HttpResponse
 from rest.api.views import app
+from rest.environment.deployment_jobs import DeploymentJobsSingleton
 from rest.environment.deployment_metadata import DeploymentMetadataSingleton
+from rest.environment.deployment_pool import DeploymentPoolSingleton
+from rest.environment.deployment_readiness import DeploymentReadinessSingleton
+from rest.environment.deployment_state import DeploymentStateSingleton
+from rest.environment.docker_health import DockerHealthSingleton
+from rest.environment.command_runs import CommandRunsSingleton
 from rest.environment.environment import EnvironmentSingleton
+from rest.environment.operations import OperationsSingleton
+from rest.environment.processes import ProcessesSingleton
 from rest.model.deployment_reader import DeploymentReader
+from rest.model.logs_reader import LogsReader
 from rest.service.fluentd import Fluentd
 from rest.utils.cmd_utils import CmdUtils
 from rest.utils.command_in_memory import CommandInMemory
@@ -34,13 +44,15 @@ from rest.utils.io_utils import IOUtils
 class DockerView(FlaskView):
     logger = \
         sender.FluentSender(tag=properties.get('name'),
-                            host=EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                EnvConstants.FLUENTD_IP_PORT).split(":")[0],
-                            port=int(EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                EnvConstants.FLUENTD_IP_PORT).split(":")[1])) \
-            if EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.FLUENTD_IP_PORT) else None
+                            host=EnvStartupSingleton.get_instance().get_config().FLUENTD_IP_PORT.split(":")[0],
+                            port=int(EnvStartupSingleton.get_instance().get_config().FLUENTD_IP_PORT.split(":")[1])) \
+            if EnvStartupSingleton.get_instance().get_config().FLUENTD_IP_PORT else None
     fluentd = Fluentd(logger)
     message_dumper = MessageDumper()
+    JOB_WAIT_MAX = 300
+    READY_WAIT_MAX = 300
+    LOGS_KEEPALIVE = 15
+    COMMAND_KEEPALIVE = 15
 
     def before_request(self, name, *args, **kwargs):
         ctx = app.app_context()
@@ -56,7 +68,7 @@ class DockerView(FlaskView):
         response = self.fluentd.emit(tag="api", msg=self.message_dumper.dump(request=request))
         app.logger.debug(response)
         if not str(request.headers.get(HeaderConstants.TOKEN)) == str(
-                EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.HTTP_AUTH_TOKEN)):
+                EnvStartupSingleton.get_instance().get_config().HTTP_AUTH_TOKEN):
             if not ("/apidocs" in request_uri or "/swagger/swagger.json" in request_uri):  # exclude swagger
                 headers = {
                     HeaderConstants.X_REQUEST_ID: self.message_dumper.get_header(HeaderConstants.X_REQUEST_ID)
@@ -105,9 +117,12 @@ class DockerView(FlaskView):
 
     @route('/ping')
     def ping(self):
+        headers = {
+            HeaderConstants.DOCKER_DAEMON: "up" if DockerHealthSingleton.get_instance().is_alive() else "down"
+        }
         return Response(
             json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
-                                               "pong")), 200, mimetype="application/json")
+                                               "pong")), 200, mimetype="application/json", headers=headers)
 
     @route('/about')
     def about(self):
@@ -159,23 +174,22 @@ class DockerView(FlaskView):
 
     @route('/render/<template>/<variables>', methods=['GET', 'POST'])
     def get_rendered_content_with_env(self, template, variables):
+        request_env_vars = {}
         try:
-            input_json = request.get_json(force=True)
-            for key, value in input_json.items():
-                if key not in EnvironmentSingleton.get_instance().get_env():
-                    EnvironmentSingleton.get_instance().set_env_var(str(key), str(value))
+            request_env_vars.update(request.get_json(force=True))
         except Exception as e:
             app.logger.debug({"msg": f"Could not load the body from the request as JSON: {e.__str__()}"})
 
-        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.TEMPLATE, template.strip())
-        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.VARIABLES, variables.strip())
+        request_env_vars[EnvConstants.TEMPLATE] = template.strip()
+        request_env_vars[EnvConstants.VARIABLES] = variables.strip()
 
         try:
-            env_vars = EnvironmentSingleton.get_instance().get_env_and_virtual_env()
-            rendered_content = Render(
-                env_vars.get(EnvConstants.TEMPLATE),
-                env_vars.get(
-                    EnvConstants.VARIABLES)).rend_template()
+            with EnvironmentSingleton.get_instance().overlay(request_env_vars):
+                env_vars = EnvironmentSingleton.get_instance().get_env_and_virtual_env()
+                rendered_content = Render(
+                    env_vars.get(EnvConstants.TEMPLATE),
+                    env_vars.get(
+                        EnvConstants.VARIABLES)).rend_template()
         except Exception as e:
             raise ApiExceptionDocker(ApiCode.JINJA2_RENDER_FAILURE.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.JINJA2_RENDER_FAILURE.value), e)
@@ -187,10 +201,13 @@ class DockerView(FlaskView):
         docker_utils = DockerUtils()
         active_deployments = docker_utils.get_active_deployments()
         app.logger.debug({"msg": {"active_deployments": f"{len(active_deployments)}"}})
+        headers = {
+            HeaderConstants.CACHE_AGE: str(DeploymentStateSingleton.get_instance().get_age())
+        }
 
         return Response(
             json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
-                                               active_deployments)), 200, mimetype="application/json")
+                                               active_deployments)), 200, mimetype="application/json", headers=headers)
 
     @route('/deployments/prepare', methods=['PUT'])
     def receive_prepared_deployment_and_unpack(self):
@@ -245,117 +262,363 @@ class DockerView(FlaskView):
         file = f"{deploy_dir}/docker-compose.yml"
         header_key = 'Eureka-Server'
         eureka_server_header = request.headers.get(f"{header_key}")
-        config_env_vars = EnvStartupSingleton.get_instance().get_config_env_vars()
+        config = EnvStartupSingleton.get_instance().get_config()
         input_data = request.data.decode('UTF-8').strip()
 
-        status = CmdUtils.run_cmd_shell_false(["docker", "ps"])
-        if "Cannot connect to the Docker daemon".lower() in status.get('err').lower():
+        docker_health = DockerHealthSingleton.get_instance().get_status()
+        if not docker_health.get('alive'):
             raise ApiExceptionDocker(ApiCode.DOCKER_DAEMON_NOT_RUNNING.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.DOCKER_DAEMON_NOT_RUNNING.value),
-                                     status.get('err'))
+                                     docker_health.get('err'))
 
-        active_deployments = docker_utils.get_active_deployments()
-        if len(active_deployments) >= EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS):
+        # the deployments of the jobs not done yet count too, else a burst of deploys gets past the check
+        deployments_count = DeploymentJobsSingleton.get_instance().count_deployments()
+        if deployments_count >= EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS):
             raise ApiExceptionDocker(ApiCode.MAX_DEPLOYMENTS_REACHED.value,
                                      ErrorMessage.HTTP_CODE.get(
                                          ApiCode.MAX_DEPLOYMENTS_REACHED.value) % str(EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS)),
-                                     active_deployments)
+                                     f"Active and pending deployments: {deployments_count}")
         try:
-            template_file_name = f"deployment_{deployment_id}.yml"
-            template_file_path = f"{EnvInit.init.get(EnvConstants.TEMPLATES_DIR)}/{template_file_name}"
-            app.logger.debug({"msg": {"file": template_file_path, "file_content": f"{input_data}"}})
-            IOUtils.write_to_file(template_file_path, input_data)
-
+            render_start_time = datetime.datetime.now()
             IOUtils.create_dir(deploy_dir)
-            EnvironmentSingleton.get_instance().set_env_var(EnvConstants.TEMPLATE, template_file_name)
             env_vars = EnvironmentSingleton.get_instance().get_env_and_virtual_env()
-            render = Render(env_vars.get(EnvConstants.TEMPLATE), env_vars.get(EnvConstants.VARIABLES))
-            if config_env_vars.get(EnvConstants.EUREKA_SERVER) and config_env_vars.get(EnvConstants.APP_IP_PORT):
+            render = Render(None, env_vars.get(EnvConstants.VARIABLES))
+            if config.EUREKA_SERVER and config.APP_IP_PORT:
                 # if {{app_ip_port}} and {{eureka_server}} then register that instance too
                 if '{{app_ip_port}}' in input_data and '{{eureka_server}}' in input_data:
-                    eureka_server = config_env_vars.get(EnvConstants.EUREKA_SERVER)
+                    eureka_server = config.EUREKA_SERVER
                     # header value overwrite the eureka server
                     if eureka_server_header:
                         eureka_server = eureka_server_header
-                    input_data = render.get_jinja2env().get_template(env_vars.get(EnvConstants.TEMPLATE)).render({
+                    # a one off template, not kept in the shared template caches
+                    input_data = render.get_jinja2env().from_string(input_data).render({
                         "deployment_id": f"{deployment_id}",
                         "eureka_server": eureka_server,
-                        "app_ip_port": config_env_vars.get(EnvConstants.APP_IP_PORT).split("/")[0]
+                        "app_ip_port": config.APP_IP_PORT.split("/")[0]
                     })
-            os.remove(template_file_path) if os.path.exists(template_file_path) else None
             app.logger.debug({"msg": {"file": file, "file_content": f"{input_data}"}})
             IOUtils.write_to_file(file, input_data) if input_data else None
-            CmdUtils.run_cmd_detached(rf'''docker-compose -f {file} pull && docker-compose -f {file} up -d''')
+            job_ids = DeploymentJobsSingleton.get_instance().submit_deployments([(deployment_id, file)],
+                                                                                render_start_time)
         except Exception as e:
             app.logger.debug({"msg": docker_utils.down(file)})
             raise ApiExceptionDocker(ApiCode.DEPLOY_START_FAILURE.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_START_FAILURE.value), e)
+        if job_ids is None:
+            raise ApiExceptionDocker(ApiCode.MAX_DEPLOYMENTS_REACHED.value,
+                                     ErrorMessage.HTTP_CODE.get(
+                                         ApiCode.MAX_DEPLOYMENTS_REACHED.value) % str(EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS)),
+                                     "Another deployment was admitted meanwhile")
+        job_id = job_ids[0]
 
         DeploymentMetadataSingleton.get_instance() \
             .delete_metadata_for_inactive_deployments(DockerUtils.get_active_deployments())
         metadata = DeploymentReader.get_metadata_for_deployment(IOUtils.read_file(file=file))
         IOUtils.write_to_file_dict(f"{deploy_dir}/metadata.json", metadata)
         DeploymentMetadataSingleton.get_instance().set_metadata_for_deployment(deployment_id, metadata)
+        headers = {
+            HeaderConstants.JOB_ID: job_id
+        }
 
         return Response(
             json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
-                                               deployment_id)), 200, mimetype="application/json")
+                                               deployment_id)), 200, mimetype="application/json", headers=headers)
 
     @route('/deployments/<template>/<variables>', methods=['POST'])
     def start_deployment_with_templates(self, template, variables):
         http = HttpResponse()
-        docker_utils = DockerUtils()
         token = token_hex(8)
         deployment_id = request.headers.get("Deployment-Id").lower() if request.headers.get("Deployment-Id") else token
         deploy_dir = f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{deployment_id}"
         file = f"{deploy_dir}/docker-compose.yml"
 
+        request_env_vars = {}
         try:
-            input_json = request.get_json(force=True)
-            for key, value in input_json.items():
-                if key not in EnvironmentSingleton.get_instance().get_env():
-                    EnvironmentSingleton.get_instance().set_env_var(str(key), str(value))
+            request_env_vars.update(request.get_json(force=True))
         except Exception as e:
             app.logger.debug(f"Could not parse the input from the request as JSON: {e.__str__()}")
 
-        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.TEMPLATE, template.strip())
-        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.VARIABLES, variables.strip())
-        env_vars = EnvironmentSingleton.get_instance().get_env_and_virtual_env()
-        app.logger.debug({"msg": {"template_file": env_vars.get(EnvConstants.TEMPLATE)}})
-        app.logger.debug({"msg": {"variables_file": env_vars.get(EnvConstants.VARIABLES)}})
+        request_env_vars[EnvConstants.TEMPLATE] = template.strip()
+        request_env_vars[EnvConstants.VARIABLES] = variables.strip()
+        app.logger.debug({"msg": {"template_file": request_env_vars.get(EnvConstants.TEMPLATE)}})
+        app.logger.debug({"msg": {"variables_file": request_env_vars.get(EnvConstants.VARIABLES)}})
 
-        status = CmdUtils.run_cmd_shell_false(["docker", "ps"])
-        if "Cannot connect to the Docker daemon".lower() in status.get('err').lower():
+        docker_health = DockerHealthSingleton.get_instance().get_status()
+        if not docker_health.get('alive'):
             raise ApiExceptionDocker(ApiCode.DOCKER_DAEMON_NOT_RUNNING.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.DOCKER_DAEMON_NOT_RUNNING.value),
-                                     status.get('err'))
+                                     docker_health.get('err'))
 
-        active_deployments = docker_utils.get_active_deployments()
-        if len(active_deployments) >= EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS):
+        # the deployments of the jobs not done yet count too, else a burst of deploys gets past the check
+        deployments_count = DeploymentJobsSingleton.get_instance().count_deployments()
+        if deployments_count >= EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS):
             raise ApiExceptionDocker(ApiCode.MAX_DEPLOYMENTS_REACHED.value,
                                      ErrorMessage.HTTP_CODE.get(
                                          ApiCode.MAX_DEPLOYMENTS_REACHED.value) % str(EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS)),
-                                     active_deployments)
+                                     f"Active and pending deployments: {deployments_count}")
         try:
-            r = Render(env_vars.get(EnvConstants.TEMPLATE),
-                       env_vars.get(EnvConstants.VARIABLES))
-            IOUtils.create_dir(deploy_dir)
-            IOUtils.write_to_file(file, r.rend_template())
-            CmdUtils.run_cmd_detached(rf'''docker-compose -f {file} pull && docker-compose -f {file} up -d''')
+            render_start_time = datetime.datetime.now()
+            # the request env vars are seen by this render and by the job subprocesses only
+            with EnvironmentSingleton.get_instance().overlay(request_env_vars):
+                env_vars = EnvironmentSingleton.get_instance().get_env_and_virtual_env()
+                r = Render(env_vars.get(EnvConstants.TEMPLATE),
+                           env_vars.get(EnvConstants.VARIABLES))
+                IOUtils.create_dir(deploy_dir)
+                IOUtils.write_to_file(file, r.rend_template())
+                job_ids = DeploymentJobsSingleton.get_instance().submit_deployments([(deployment_id, file)],
+                                                                                    render_start_time)
         except Exception as e:
             raise ApiExceptionDocker(ApiCode.DEPLOY_START_FAILURE.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_START_FAILURE.value), e)
+        if job_ids is None:
+            raise ApiExceptionDocker(ApiCode.MAX_DEPLOYMENTS_REACHED.value,
+                                     ErrorMessage.HTTP_CODE.get(
+                                         ApiCode.MAX_DEPLOYMENTS_REACHED.value) % str(EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS)),
+                                     "Another deployment was admitted meanwhile")
+        job_id = job_ids[0]
 
         DeploymentMetadataSingleton.get_instance() \
             .delete_metadata_for_inactive_deployments(DockerUtils.get_active_deployments())
         metadata = DeploymentReader.get_metadata_for_deployment(IOUtils.read_file(file=file))
         IOUtils.write_to_file_dict(f"{deploy_dir}/metadata.json", metadata)
         DeploymentMetadataSingleton.get_instance().set_metadata_for_deployment(deployment_id, metadata)
+        headers = {
+            HeaderConstants.JOB_ID: job_id
+        }
 
         return Response(
             json.dumps(
                 http.response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value), deployment_id)),
-            200, mimetype="application/json")
+            200, mimetype="application/json", headers=headers)
+
+    @route('/deployments/batch/<template>/<variables>', methods=['POST'])
+    def start_deployments_batch(self, template, variables):
+        input_data = request.data.decode("UTF-8", "replace").strip()
+
+        # one dict of variables overrides for each deployment
+        try:
+            overrides = json.loads(input_data)
+            if not isinstance(overrides, list) or not overrides or not all(
+                    isinstance(override, dict) for override in overrides):
+                raise ValueError("Expected a non empty list of objects, e.g. [{\"key\": \"value\"}, {}]")
+        except Exception as e:
+            raise ApiExceptionDocker(ApiCode.INVALID_JSON_PAYLOAD.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.INVALID_JSON_PAYLOAD.value) % str(input_data),
+                                     e)
+
+        docker_health = DockerHealthSingleton.get_instance().get_status()
+        if not docker_health.get('alive'):
+            raise ApiExceptionDocker(ApiCode.DOCKER_DAEMON_NOT_RUNNING.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DOCKER_DAEMON_NOT_RUNNING.value),
+                                     docker_health.get('err'))
+
+        deployments_count = DeploymentJobsSingleton.get_instance().count_deployments()
+        if deployments_count + len(overrides) > EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS):
+            raise ApiExceptionDocker(ApiCode.MAX_DEPLOYMENTS_REACHED.value,
+                                     ErrorMessage.HTTP_CODE.get(
+                                         ApiCode.MAX_DEPLOYMENTS_REACHED.value) % str(EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS)),
+                                     f"Active and pending deployments: {deployments_count}")
+        try:
+            render_start_time = datetime.datetime.now()
+            rendered_templates = Render(template.strip(), variables.strip()).rend_templates(overrides)
+        except Exception as e:
+            raise ApiExceptionDocker(ApiCode.DEPLOY_START_FAILURE.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_START_FAILURE.value), e)
+
+        DeploymentMetadataSingleton.get_instance() \
+            .delete_metadata_for_inactive_deployments(DockerUtils.get_active_deployments())
+        deployments = [token_hex(8) for rendered_template in rendered_templates]
+        deploy_dirs = [f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{deployment_id}" for deployment_id in deployments]
+        # the batch is submitted whole or not at all, nothing is left running when it fails
+        try:
+            for deploy_dir, rendered_template in zip(deploy_dirs, rendered_templates):
+                IOUtils.create_dir(deploy_dir)
+                IOUtils.write_to_file(f"{deploy_dir}/docker-compose.yml", rendered_template)
+            job_ids = DeploymentJobsSingleton.get_instance().submit_deployments(
+                [(deployment_id, f"{deploy_dir}/docker-compose.yml") for deployment_id, deploy_dir in
+                 zip(deployments, deploy_dirs)], render_start_time)
+        except Exception as e:
+            for deploy_dir in deploy_dirs:
+                if IOUtils.does_file_exist(deploy_dir):
+                    IOUtils.remove_directory(deploy_dir)
+            raise ApiExceptionDocker(ApiCode.DEPLOY_START_FAILURE.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_START_FAILURE.value), e)
+        if job_ids is None:
+            for deploy_dir in deploy_dirs:
+                IOUtils.remove_directory(deploy_dir)
+            raise ApiExceptionDocker(ApiCode.MAX_DEPLOYMENTS_REACHED.value,
+                                     ErrorMessage.HTTP_CODE.get(
+                                         ApiCode.MAX_DEPLOYMENTS_REACHED.value) % str(EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS)),
+                                     "Other deployments were admitted meanwhile")
+
+        result = []
+        for deployment_id, deploy_dir, rendered_template, job_id in zip(deployments, deploy_dirs, rendered_templates,
+                                                                        job_ids):
+            metadata = DeploymentReader.get_metadata_for_deployment(rendered_template)
+            IOUtils.write_to_file_dict(f"{deploy_dir}/metadata.json", metadata)
+            DeploymentMetadataSingleton.get_instance().set_metadata_for_deployment(deployment_id, metadata)
+            result.append({"id": deployment_id, "job": job_id})
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               result)), 200, mimetype="application/json")
+
+    @route('/deployments/pool', methods=['GET'])
+    def get_deployment_pools(self):
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               DeploymentPoolSingleton.get_instance().get_pools())), 200,
+            mimetype="application/json")
+
+    @route('/deployments/pool/<template>/<variables>', methods=['PUT'])
+    def set_deployment_pool(self, template, variables):
+        input_data = request.data.decode("UTF-8", "replace").strip()
+
+        try:
+            size = json.loads(input_data).get('size')
+            if not isinstance(size, int) or size < 0:
+                raise ValueError("Expected the pool size, e.g. {\"size\": 3}")
+        except Exception as e:
+            raise ApiExceptionDocker(ApiCode.INVALID_JSON_PAYLOAD.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.INVALID_JSON_PAYLOAD.value) % str(input_data),
+                                     e)
+
+        pool = DeploymentPoolSingleton.get_instance().set_pool(template.strip(), variables.strip(), size)
+        DeploymentPoolSingleton.get_instance().refill_async()
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               pool)), 200, mimetype="application/json")
+
+    @route('/deployments/pool/<template>/<variables>/claim', methods=['POST'])
+    def claim_deployment(self, template, variables):
+        pool_id = DeploymentPoolSingleton.get_pool_id(template.strip(), variables.strip())
+        active_deployments = DockerUtils.get_active_deployments()
+        deployment_id = DeploymentPoolSingleton.get_instance().claim(template.strip(), variables.strip(),
+                                                                     active_deployments)
+        if deployment_id is None:
+            raise ApiExceptionDocker(ApiCode.DEPLOYMENT_POOL_EMPTY.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOYMENT_POOL_EMPTY.value) % pool_id,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOYMENT_POOL_EMPTY.value) % pool_id)
+        DeploymentPoolSingleton.get_instance().refill_async()
+
+        deploy_dir = f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{deployment_id}"
+        file = f"{deploy_dir}/docker-compose.yml"
+        # the env expire countdown starts at claim, not when the pool started it
+        os.utime(deploy_dir)
+        metadata = DeploymentReader.get_metadata_for_deployment(IOUtils.read_file(file=file))
+        try:
+            # optional metadata sent by the client
+            metadata.update(request.get_json(force=True, silent=True) or {})
+        except Exception as e:
+            app.logger.debug(f"Could not parse the input from the request as JSON: {e.__str__()}")
+        IOUtils.write_to_file_dict(f"{deploy_dir}/metadata.json", metadata)
+        DeploymentMetadataSingleton.get_instance().set_metadata_for_deployment(deployment_id, metadata)
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               deployment_id)), 200, mimetype="application/json")
+
+    @route('/deployments/jobs/<job_id>', methods=['GET'])
+    def get_deployment_job(self, job_id):
+        job_id = job_id.strip()
+        jobs = DeploymentJobsSingleton.get_instance()
+        # long poll: ?wait=<seconds> blocks until the job is finished or failed
+        try:
+            wait = min(float(request.args.get('wait', 0)), self.JOB_WAIT_MAX)
+        except ValueError:
+            wait = 0
+
+        job = jobs.wait_job(job_id, wait) if wait > 0 else jobs.get_job(job_id)
+        if job is None:
+            raise ApiExceptionDocker(ApiCode.GET_DEPLOYMENT_JOB_FAILURE.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.GET_DEPLOYMENT_JOB_FAILURE.value) % job_id,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.GET_DEPLOYMENT_JOB_FAILURE.value) % job_id)
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               job)), 200, mimetype="application/json")
+
+    @route('/deployments/<env_id>/ready', methods=['GET'])
+    def wait_deployment_ready(self, env_id):
+        env_id = env_id.strip().lower()
+        file = f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{env_id}/docker-compose.yml"
+        # blocks until every container is running and healthy, or until ?timeout=<seconds>
+        try:
+            timeout = min(float(request.args.get('timeout', 60)), self.READY_WAIT_MAX)
+        except ValueError:
+            timeout = 60
+
+        try:
+            services = list(DeploymentReader.get_services(IOUtils.read_file(file=file)).keys())
+            result = DeploymentReadinessSingleton.get_instance().wait(env_id, services, timeout)
+        except Exception as e:
+            raise ApiExceptionDocker(ApiCode.DEPLOY_STATUS_FAILURE.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_STATUS_FAILURE.value), e)
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               result)), 200, mimetype="application/json")
+
+    @route('/deployments/<env_id>', methods=['PUT'])
+    def redeploy(self, env_id):
+        render_start_time = datetime.datetime.now()
+        input_data = request.data.decode('UTF-8').strip()
+        if not input_data:
+            raise ApiExceptionDocker(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value),
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value))
+
+        return self.__redeploy(env_id.strip().lower(), input_data, render_start_time)
+
+    @route('/deployments/<env_id>/<template>/<variables>', methods=['PUT'])
+    def redeploy_with_templates(self, env_id, template, variables):
+        render_start_time = datetime.datetime.now()
+        try:
+            input_data = Render(template.strip(), variables.strip()).rend_template()
+        except Exception as e:
+            raise ApiExceptionDocker(ApiCode.DEPLOY_REPLAY_FAILURE.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_REPLAY_FAILURE.value), e)
+
+        return self.__redeploy(env_id.strip().lower(), input_data, render_start_time)
+
+    def __redeploy(self, deployment_id, input_data, render_start_time):
+        """ recreates only the services that changed against the compose file deployed """
+        deploy_dir = f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{deployment_id}"
+        file = f"{deploy_dir}/docker-compose.yml"
+
+        docker_health = DockerHealthSingleton.get_instance().get_status()
+        if not docker_health.get('alive'):
+            raise ApiExceptionDocker(ApiCode.DOCKER_DAEMON_NOT_RUNNING.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DOCKER_DAEMON_NOT_RUNNING.value),
+                                     docker_health.get('err'))
+        try:
+            diff = DeploymentReader.diff_services(IOUtils.read_file(file=file), input_data)
+            app.logger.debug({"msg": {"file": file, "diff": diff}})
+            job_id = None
+            if diff.get('added') or diff.get('changed') or diff.get('removed') or diff.get('top_level'):
+                # the deployed file is replaced only when the recreate succeeded
+                next_file = f"{deploy_dir}/docker-compose.{token_hex(4)}.yml"
+                IOUtils.write_to_file(next_file, input_data)
+                job_id = DeploymentJobsSingleton.get_instance().submit_redeployment(deployment_id, file, next_file,
+                                                                                    render_start_time, diff)
+            else:
+                IOUtils.write_to_file(file, input_data)
+        except Exception as e:
+            raise ApiExceptionDocker(ApiCode.DEPLOY_REPLAY_FAILURE.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_REPLAY_FAILURE.value), e)
+
+        metadata = DeploymentReader.get_metadata_for_deployment(input_data)
+        IOUtils.write_to_file_dict(f"{deploy_dir}/metadata.json", metadata)
+        DeploymentMetadataSingleton.get_instance().set_metadata_for_deployment(deployment_id, metadata)
+        headers = {
+            HeaderConstants.JOB_ID: job_id
+        } if job_id else {}
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               {"id": deployment_id, "job": job_id, "diff": diff})), 200,
+            mimetype="application/json", headers=headers)
 
     @route('/deployments/<env_id>', methods=['GET'])
     def get_deployment_status(self, env_id):
@@ -363,20 +626,28 @@ class DockerView(FlaskView):
         docker_utils = DockerUtils()
         env_id = env_id.strip()
 
+        state = DeploymentStateSingleton.get_instance()
+
         try:
-            status = docker_utils.ps(env_id)
-            if "Cannot connect to the Docker daemon".lower() in status.get('err').lower():
-                raise Exception(status.get('err'))
-            result = status.get('out').split("\n")[1:]
-            app.logger.debug({"msg": status})
+            if state.is_live():
+                result = docker_utils.get_deployment_containers(env_id)
+            else:
+                status = docker_utils.ps(env_id)
+                if "Cannot connect to the Docker daemon".lower() in status.get('err').lower():
+                    raise Exception(status.get('err'))
+                result = status.get('out').split("\n")[1:]
+                app.logger.debug({"msg": status})
         except Exception as e:
             raise ApiExceptionDocker(ApiCode.DEPLOY_STATUS_FAILURE.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_STATUS_FAILURE.value), e)
+        headers = {
+            HeaderConstants.CACHE_AGE: str(state.get_age())
+        }
 
         return Response(
             json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
                                                ActiveDeployment.docker_deployment(env_id, result))), 200,
-            mimetype="application/json")
+            mimetype="application/json", headers=headers)
 
     @route('/deployments/<depl_id>', methods=['DELETE'])
     def delete_deployment_id(self, depl_id):
@@ -407,17 +678,16 @@ class DockerView(FlaskView):
         docker_utils = DockerUtils()
         try:
             active_deployments = docker_utils.get_active_deployments()
-            for deployment in active_deployments:
-                depl_id = deployment.get('id')
-                depl_folder = f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{depl_id}"
-                status = docker_utils.down(f"{depl_folder}/docker-compose.yml")
-                if "Cannot connect to the Docker daemon".lower() in status.get('err').lower():
-                    raise Exception(status.get('err'))
+            result = docker_utils.down_deployments([deployment.get('id') for deployment in active_deployments],
+                                                   EnvStartupSingleton.get_instance().get_config().TEARDOWN_WORKERS)
+            for status in result:
                 app.logger.debug({"msg": status})
-                DeploymentMetadataSingleton.get_instance().delete_metadata_for_deployment(depl_id)
+                if "Cannot connect to the Docker daemon".lower() in str(status.get('err')).lower():
+                    raise Exception(status.get('err'))
+                if status.get('code') == 0:
+                    DeploymentMetadataSingleton.get_instance().delete_metadata_for_deployment(status.get('id'))
 
             DockerUtils.folder_clean_up()
-            result = docker_utils.get_active_deployments()
         except Exception as e:
             raise ApiExceptionDocker(ApiCode.DEPLOY_STOP_FAILURE.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.DEPLOY_STOP_FAILURE.value), e)
@@ -481,18 +751,54 @@ class DockerView(FlaskView):
         env_id_dir = EnvInit.init.get(EnvConstants.DEPLOY_PATH) + f"/{env_id}"
         file = f"{env_id_dir}/docker-compose.yml"
 
+        services = [service for services in request.args.getlist('service') for service in services.split(",") if
+                    service]
+
         try:
-            status = docker_utils.logs(file)
+            # since and until filter the lines read, the tail bounds how many are read
+            status = docker_utils.logs(file, min(int(request.args.get('tail', 5000)), LogsReader.TAIL_MAX), services)
             app.logger.debug({"msg": status})
             if status.get('err'):
                 raise Exception(status.get('err'))
+            lines, cursor = LogsReader.filter_lines(status.get('out'), request.args.get('since'),
+                                                    request.args.get('until'), request.args.get('filter'))
         except Exception as e:
             raise ApiExceptionDocker(ApiCode.GET_LOGS_FAILED.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.GET_LOGS_FAILED.value) % env_id, e)
 
         return Response(
             json.dumps(http.response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
-                                     status.get('out'))), 200, mimetype="application/json")
+                                     "\n".join(lines))), 200, mimetype="application/json",
+            headers={HeaderConstants.LOGS_CURSOR: cursor if cursor else ""})
+
+    @route('/deployments/logs/<env_id>/stream', methods=['GET'])
+    def deploy_logs_stream(self, env_id):
+        env_id = env_id.lower().strip()
+        file = EnvInit.init.get(EnvConstants.DEPLOY_PATH) + f"/{env_id}/docker-compose.yml"
+        sse = request.args.get('format') == "sse" or "text/event-stream" in request.headers.get('Accept', "")
+
+        try:
+            tail = int(request.args.get('tail', 100))
+            process = DockerUtils.logs_follow(file, tail, [service for services in request.args.getlist('service')
+                                                           for service in services.split(",") if service])
+        except Exception as e:
+            raise ApiExceptionDocker(ApiCode.GET_LOGS_FAILED.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.GET_LOGS_FAILED.value) % env_id, e)
+
+        def generate():
+            # while the logs are quiet the sse keepalive comments are written, a gone client is noticed and the
+            # process killed. The plain text has no keepalive, it would be a log line: a gone client is noticed
+            # on the next log line
+            for line in CmdUtils.read_streamed(process, self.LOGS_KEEPALIVE if sse else None):
+                if line is None:
+                    yield ": keepalive\n\n"
+                elif sse:
+                    yield f"data: {line.rstrip()}\n\n"
+                else:
+                    yield line
+
+        return Response(generate(), 200, mimetype="text/event-stream" if sse else "text/plain",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
     # must connect the container to the deployer network to be able to send http request
     @route('/deployments/network/<env_id>', methods=['POST', 'PUT'])
@@ -508,7 +814,7 @@ class DockerView(FlaskView):
         container_id = f"{env_id}_{service_name}_1"
 
         try:
-            status = CmdUtils.run_cmd_shell_false(["docker", "network", "ls", "--filter", "name={}".format("deployer")])
+            status = docker_utils.network_ls("deployer")
             app.logger.debug({"msg": status})
             if not status.get('out'):
                 raise Exception(status.get('err'))
@@ -549,7 +855,7 @@ class DockerView(FlaskView):
         container_id = f"{env_id}_{service_name}_1"
 
         try:
-            status = CmdUtils.run_cmd_shell_false(["docker", "network", "ls", "--filter", "name={}".format("deployer")])
+            status = docker_utils.network_ls("deployer")
             app.logger.debug({"msg": status})
             if not status.get('out'):
                 raise Exception(status.get('err'))
@@ -611,6 +917,36 @@ class DockerView(FlaskView):
                                          service_name, service_name), e)
         return Response(r.text, r.status_code)
 
+    @route('/processes', methods=['GET'])
+    def get_processes(self):
+        # ?deployment=<env_id> keeps the processes of one deployment
+        processes = ProcessesSingleton.get_instance().get_processes(request.args.get('deployment'))
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               processes)), 200, mimetype="application/json")
+
+    @route('/operations', methods=['GET'])
+    def get_operations(self):
+        operations = OperationsSingleton.get_instance()
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               {
+                                                   "operations": operations.get_operations(),
+                                                   "counters": operations.get_counters()
+                                               })), 200, mimetype="application/json")
+
+    @route('/operations/<operation_id>', methods=['DELETE'])
+    def cancel_operation(self, operation_id):
+        operation_id = operation_id.strip()
+        if not OperationsSingleton.get_instance().cancel(operation_id):
+            raise ApiExceptionDocker(ApiCode.OPERATION_NOT_FOUND.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.OPERATION_NOT_FOUND.value) % operation_id,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.OPERATION_NOT_FOUND.value) % operation_id)
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               operation_id)), 200, mimetype="application/json")
+
     @route('/command', methods=['POST', 'PUT'])
     def execute_command(self):
         input_data = request.data.decode("UTF-8", "replace").strip()
@@ -619,15 +955,66 @@ class DockerView(FlaskView):
             raise ApiExceptionDocker(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value),
                                      ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value))
+        mode = request.args.get('mode', CommandInMemory.MODE_SEQUENTIAL).strip().lower()
+        concurrency = EnvStartupSingleton.get_instance().get_config().COMMAND_CONCURRENCY
         try:
-            input_data_list = input_data.split("\n")
-            input_data_list = list(map(lambda x: x.strip(), input_data_list))
-            command_in_memory = CommandInMemory()
-            response = command_in_memory.run_commands(input_data_list)
+            concurrency = max(min(int(request.args.get('concurrency', concurrency)), concurrency), 1)
+        except ValueError:
+            pass
+        try:
+            input_data_list, needs = CommandInMemory.parse_commands(input_data, mode)
+            # ?async=true returns the run id at once, the progress is polled with GET /command/<command_id>
+            if request.args.get('async', "").lower() == "true":
+                response = CommandRunsSingleton.get_instance().submit(input_data_list, mode, concurrency, needs)
+            else:
+                command_in_memory = CommandInMemory()
+                response = command_in_memory.run_commands(input_data_list, mode, concurrency, needs)
         except Exception as e:
             raise ApiExceptionDocker(ApiCode.COMMAND_EXEC_FAILURE.value,
                                      ErrorMessage.HTTP_CODE.get(ApiCode.COMMAND_EXEC_FAILURE.value), e)
+        if response is None:
+            max_runs = CommandRunsSingleton.RUNS_MAX_SIZE
+            raise ApiExceptionDocker(ApiCode.MAX_COMMAND_RUNS_REACHED.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.MAX_COMMAND_RUNS_REACHED.value) % max_runs,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.MAX_COMMAND_RUNS_REACHED.value) % max_runs)
         return Response(
             json.dumps(
                 HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
                                         response)), 200, mimetype="application/json")
+
+    @route('/command/stream', methods=['POST', 'PUT'])
+    def execute_command_stream(self):
+        input_data = request.data.decode("UTF-8", "replace").strip()
+        sse = request.args.get('format') == "sse" or "text/event-stream" in request.headers.get('Accept', "")
+
+        if not input_data:
+            raise ApiExceptionDocker(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value),
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value))
+        events = CommandInMemory().stream_commands(input_data.split("\n"), self.COMMAND_KEEPALIVE)
+
+        def generate():
+            # one JSON event per line, or per server-sent event. The keepalives let the stream notice a gone client
+            for event in events:
+                if event is None and sse:
+                    yield ": keepalive\n\n"
+                elif sse:
+                    yield f"event: {event.get('event')}\ndata: {json.dumps(event)}\n\n"
+                else:
+                    yield json.dumps(event if event is not None else {"event": "keepalive"}) + "\n"
+
+        return Response(generate(), 200, mimetype="text/event-stream" if sse else "application/x-ndjson",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @route('/command/<command_id>', methods=['GET'])
+    def get_command_run(self, command_id):
+        command_id = command_id.strip()
+        command_run = CommandRunsSingleton.get_instance().get_run(command_id)
+        if command_run is None:
+            raise ApiExceptionDocker(ApiCode.GET_COMMAND_RUN_FAILURE.value,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.GET_COMMAND_RUN_FAILURE.value) % command_id,
+                                     ErrorMessage.HTTP_CODE.get(ApiCode.GET_COMMAND_RUN_FAILURE.value) % command_id)
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               command_run)), 200, mimetype="application/json")
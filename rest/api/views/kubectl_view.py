@@ -17,7 +17,10 @@ from rest.api.loghelpers.message_dumper import MessageDumper
 from rest.api.responsehelpers.error_message import ErrorMessage
 from rest.api.responsehelpers.http_response import HttpResponse
 from rest.api.views import app
+from rest.environment.command_runs import CommandRunsSingleton
 from rest.environment.environment import EnvironmentSingleton
+from rest.environment.operations import OperationsSingleton
+from rest.environment.processes import ProcessesSingleton
 from rest.service.fluentd import Fluentd
 from rest.utils.command_in_memory import CommandInMemory
 from rest.utils.env_startup import EnvStartupSingleton
@@ -28,13 +31,12 @@ from rest.utils.kubectl_utils import KubectlUtils
 class KubectlView(FlaskView):
     logger = \
         sender.FluentSender(tag=properties.get('name'),
-                            host=EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                EnvConstants.FLUENTD_IP_PORT).split(":")[0],
-                            port=int(EnvStartupSingleton.get_instance().get_config_env_vars().get(
-                                EnvConstants.FLUENTD_IP_PORT).split(":")[1])) \
-            if EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.FLUENTD_IP_PORT) else None
+                            host=EnvStartupSingleton.get_instance().get_config().FLUENTD_IP_PORT.split(":")[0],
+                            port=int(EnvStartupSingleton.get_instance().get_config().FLUENTD_IP_PORT.split(":")[1])) \
+            if EnvStartupSingleton.get_instance().get_config().FLUENTD_IP_PORT else None
     fluentd = Fluentd(logger)
     message_dumper = MessageDumper()
+    COMMAND_KEEPALIVE = 15
 
     def before_request(self, name, *args, **kwargs):
         ctx = app.app_context()
@@ -50,7 +52,7 @@ class KubectlView(FlaskView):
         response = self.fluentd.emit(tag="api", msg=self.message_dumper.dump(request=request))
         app.logger.debug(f"{response}")
         if not str(request.headers.get(HeaderConstants.TOKEN)) == str(
-                EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.HTTP_AUTH_TOKEN)):
+                EnvStartupSingleton.get_instance().get_config().HTTP_AUTH_TOKEN):
             if not ("/apidocs" in request_uri or "/swagger/swagger.json" in request_uri):  # exclude swagger
                 headers = {
                     HeaderConstants.X_REQUEST_ID: self.message_dumper.get_header(HeaderConstants.X_REQUEST_ID)
@@ -154,22 +156,21 @@ class KubectlView(FlaskView):
 
     @route('/render/<template>/<variables>', methods=['GET', 'POST'])
     def get_content_with_env(self, template, variables):
+        request_env_vars = {}
         try:
-            input_json = request.get_json(force=True)
-            for key, value in input_json.items():
-                if key not in EnvironmentSingleton.get_instance().get_env():
-                    EnvironmentSingleton.get_instance().set_env_var(str(key), str(value))
+            request_env_vars.update(request.get_json(force=True))
         except Exception as e:
             app.logger.debug(f"Exception: {e.__str__}")
 
-        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.TEMPLATE, template.strip())
-        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.VARIABLES, variables.strip())
+        request_env_vars[EnvConstants.TEMPLATE] = template.strip()
+        request_env_vars[EnvConstants.VARIABLES] = variables.strip()
 
         try:
-            rendered_content = Render(
-                EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.TEMPLATE),
-                EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
-                    EnvConstants.VARIABLES)).rend_template()
+            with EnvironmentSingleton.get_instance().overlay(request_env_vars):
+                rendered_content = Render(
+                    EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.TEMPLATE),
+                    EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
+                        EnvConstants.VARIABLES)).rend_template()
         except Exception as e:
             raise ApiExceptionKubectl(ApiCode.JINJA2_RENDER_FAILURE.value,
                                       ErrorMessage.HTTP_CODE.get(ApiCode.JINJA2_RENDER_FAILURE.value), e)
@@ -228,31 +229,29 @@ class KubectlView(FlaskView):
         http = HttpResponse()
         kubectl_utils = KubectlUtils()
         fluentd_tag = "deploy_start"
+        request_env_vars = {}
         try:
-            input_json = request.get_json(force=True)
-            for key, value in input_json.items():
-                if key not in EnvironmentSingleton.get_instance().get_env():
-                    EnvironmentSingleton.get_instance().set_env_var(str(key), str(value))
+            request_env_vars.update(request.get_json(force=True))
         except Exception as e:
             app.logger.debug(f"Exception: {e.__str__()}")
 
-        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.TEMPLATE, template.strip())
-        EnvironmentSingleton.get_instance().set_env_var(EnvConstants.VARIABLES, variables.strip())
-        app.logger.debug({"msg": {
-            "template_file": EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.TEMPLATE)}})
-        app.logger.debug({"msg": {"variables_file": EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(
-            EnvConstants.VARIABLES)}})
+        request_env_vars[EnvConstants.TEMPLATE] = template.strip()
+        request_env_vars[EnvConstants.VARIABLES] = variables.strip()
+        app.logger.debug({"msg": {"template_file": request_env_vars.get(EnvConstants.TEMPLATE)}})
+        app.logger.debug({"msg": {"variables_file": request_env_vars.get(EnvConstants.VARIABLES)}})
         token = token_hex(8)
         deploy_dir = f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{token}"
         file = f"{deploy_dir}/k8s-deployment.yml"
 
         try:
-            r = Render(EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.TEMPLATE),
-                       EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.VARIABLES))
-            IOUtils.create_dir(deploy_dir)
-            IOUtils.write_to_file(file)
-            IOUtils.write_to_file(file, r.rend_template())
-            status = kubectl_utils.up(f"{file}")
+            # the request env vars are seen by this render and by kubectl only
+            with EnvironmentSingleton.get_instance().overlay(request_env_vars):
+                r = Render(EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.TEMPLATE),
+                           EnvironmentSingleton.get_instance().get_env_and_virtual_env().get(EnvConstants.VARIABLES))
+                IOUtils.create_dir(deploy_dir)
+                IOUtils.write_to_file(file)
+                IOUtils.write_to_file(file, r.rend_template())
+                status = kubectl_utils.up(f"{file}")
             self.fluentd.emit(tag=fluentd_tag, msg={"msg": status})
             if status.get('err'):
                 raise Exception(status.get('error'))
@@ -390,6 +389,36 @@ class KubectlView(FlaskView):
             json.dumps(http.response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
                                      status.get('out'))), 200, mimetype="application/json")
 
+    @route('/processes', methods=['GET'])
+    def get_processes(self):
+        # ?deployment=<env_id> keeps the processes of one deployment
+        processes = ProcessesSingleton.get_instance().get_processes(request.args.get('deployment'))
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               processes)), 200, mimetype="application/json")
+
+    @route('/operations', methods=['GET'])
+    def get_operations(self):
+        operations = OperationsSingleton.get_instance()
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               {
+                                                   "operations": operations.get_operations(),
+                                                   "counters": operations.get_counters()
+                                               })), 200, mimetype="application/json")
+
+    @route('/operations/<operation_id>', methods=['DELETE'])
+    def cancel_operation(self, operation_id):
+        operation_id = operation_id.strip()
+        if not OperationsSingleton.get_instance().cancel(operation_id):
+            raise ApiExceptionKubectl(ApiCode.OPERATION_NOT_FOUND.value,
+                                      ErrorMessage.HTTP_CODE.get(ApiCode.OPERATION_NOT_FOUND.value) % operation_id,
+                                      ErrorMessage.HTTP_CODE.get(ApiCode.OPERATION_NOT_FOUND.value) % operation_id)
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               operation_id)), 200, mimetype="application/json")
+
     @route('/command', methods=['POST', 'PUT'])
     def execute_command(self):
         input_data = request.data.decode("UTF-8", "replace").strip()
@@ -398,16 +427,67 @@ class KubectlView(FlaskView):
             raise ApiExceptionKubectl(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value,
                                       ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value),
                                       ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value))
+        mode = request.args.get('mode', CommandInMemory.MODE_SEQUENTIAL).strip().lower()
+        concurrency = EnvStartupSingleton.get_instance().get_config().COMMAND_CONCURRENCY
         try:
-            input_data_list = input_data.split("\n")
-            input_data_list = list(map(lambda x: x.strip(), input_data_list))
-            command_in_memory = CommandInMemory()
-            response = command_in_memory.run_commands(input_data_list)
+            concurrency = max(min(int(request.args.get('concurrency', concurrency)), concurrency), 1)
+        except ValueError:
+            pass
+        try:
+            input_data_list, needs = CommandInMemory.parse_commands(input_data, mode)
+            # ?async=true returns the run id at once, the progress is polled with GET /command/<command_id>
+            if request.args.get('async', "").lower() == "true":
+                response = CommandRunsSingleton.get_instance().submit(input_data_list, mode, concurrency, needs)
+            else:
+                command_in_memory = CommandInMemory()
+                response = command_in_memory.run_commands(input_data_list, mode, concurrency, needs)
         except Exception as e:
             raise ApiExceptionKubectl(ApiCode.COMMAND_EXEC_FAILURE.value,
                                       ErrorMessage.HTTP_CODE.get(ApiCode.COMMAND_EXEC_FAILURE.value), e)
+        if response is None:
+            max_runs = CommandRunsSingleton.RUNS_MAX_SIZE
+            raise ApiExceptionKubectl(ApiCode.MAX_COMMAND_RUNS_REACHED.value,
+                                      ErrorMessage.HTTP_CODE.get(ApiCode.MAX_COMMAND_RUNS_REACHED.value) % max_runs,
+                                      ErrorMessage.HTTP_CODE.get(ApiCode.MAX_COMMAND_RUNS_REACHED.value) % max_runs)
 
         return Response(
             json.dumps(
                 HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
                                         response)), 200, mimetype="application/json")
+
+    @route('/command/stream', methods=['POST', 'PUT'])
+    def execute_command_stream(self):
+        input_data = request.data.decode("UTF-8", "replace").strip()
+        sse = request.args.get('format') == "sse" or "text/event-stream" in request.headers.get('Accept', "")
+
+        if not input_data:
+            raise ApiExceptionKubectl(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value,
+                                      ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value),
+                                      ErrorMessage.HTTP_CODE.get(ApiCode.EMPTY_REQUEST_BODY_PROVIDED.value))
+        events = CommandInMemory().stream_commands(input_data.split("\n"), self.COMMAND_KEEPALIVE)
+
+        def generate():
+            # one JSON event per line, or per server-sent event. The keepalives let the stream notice a gone client
+            for event in events:
+                if event is None and sse:
+                    yield ": keepalive\n\n"
+                elif sse:
+                    yield f"event: {event.get('event')}\ndata: {json.dumps(event)}\n\n"
+                else:
+                    yield json.dumps(event if event is not None else {"event": "keepalive"}) + "\n"
+
+        return Response(generate(), 200, mimetype="text/event-stream" if sse else "application/x-ndjson",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @route('/command/<command_id>', methods=['GET'])
+    def get_command_run(self, command_id):
+        command_id = command_id.strip()
+        command_run = CommandRunsSingleton.get_instance().get_run(command_id)
+        if command_run is None:
+            raise ApiExceptionKubectl(ApiCode.GET_COMMAND_RUN_FAILURE.value,
+                                      ErrorMessage.HTTP_CODE.get(ApiCode.GET_COMMAND_RUN_FAILURE.value) % command_id,
+                                      ErrorMessage.HTTP_CODE.get(ApiCode.GET_COMMAND_RUN_FAILURE.value) % command_id)
+
+        return Response(
+            json.dumps(HttpResponse().response(ApiCode.SUCCESS.value, ErrorMessage.HTTP_CODE.get(ApiCode.SUCCESS.value),
+                                               command_run)), 200, mimetype="application/json")
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import threading
+
+
+class CmdEngineSingleton:
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        if CmdEngineSingleton.__instance is None:
+            CmdEngineSingleton()
+        return CmdEngineSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class runs one asyncio event loop on a background thread.
+        The subprocesses are launched and awaited on it. Their exit is watched with a pidfd on the loop where
+        the kernel has it (python >= 3.9, linux >= 5.3), else the default child watcher of the python version
+        is used, which on python 3.8 to 3.11 starts a waiter thread per child process.
+        The callers block on the results through run and gather, or await the coroutines on the loop.
+        """
+        self.__loop = asyncio.ProactorEventLoop() if os.name == "nt" else asyncio.new_event_loop()
+        if sys.version_info < (3, 8) and os.name != "nt":
+            # before python 3.8 the child watcher is attached from the main thread, at import
+            watcher = asyncio.SafeChildWatcher()
+            asyncio.set_child_watcher(watcher)
+            watcher.attach_loop(self.__loop)
+        elif (3, 9) <= sys.version_info < (3, 12) and CmdEngineSingleton.__has_pidfd():
+            # python 3.12 picks the pidfd watcher by itself
+            watcher = asyncio.PidfdChildWatcher()
+            watcher.attach_loop(self.__loop)
+            asyncio.set_child_watcher(watcher)
+        self.__thread = threading.Thread(target=self.__loop.run_forever, daemon=True)
+        self.__thread.start()
+
+        if CmdEngineSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            CmdEngineSingleton.__instance = self
+
+    @staticmethod
+    def __has_pidfd():
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+            return True
+        except (AttributeError, OSError):
+            return False
+
+    def run(self, coroutine):
+        """
+        blocks the calling thread until the coroutine is done on the loop.
+        Raises RuntimeError on the loop thread, blocking there would hang the loop: await the coroutine instead
+        """
+        if threading.current_thread() is self.__thread:
+            coroutine.close()
+            raise RuntimeError("CmdEngineSingleton.run called from the engine loop, which it would block forever. "
+                               "Await the coroutine instead, e.g. the *_async methods")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__loop).result()
+
+    def gather(self, coroutines, limit=None):
+        """ runs the coroutines concurrently, at most limit at a time. The results keep the coroutines order """
+        return self.run(self.__gather(coroutines, limit))
+
+    @staticmethod
+    async def __gather(coroutines, limit):
+        semaphore = asyncio.Semaphore(limit) if limit else None
+
+        async def bounded(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(*[bounded(coroutine) if semaphore else coroutine for coroutine in coroutines])
@@ -0,0 +1,103 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from secrets import token_hex
+
+from rest.environment.environment import EnvironmentSingleton
+from rest.utils.command_in_memory import CommandInMemory
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class CommandRunsSingleton:
+    __instance = None
+    RUNS_MAX_SIZE = 100
+
+    @staticmethod
+    def get_instance():
+        if CommandRunsSingleton.__instance is None:
+            CommandRunsSingleton()
+        return CommandRunsSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class runs the command lists in background, on a bounded worker pool.
+        The runs are kept at most RUNS_MAX_SIZE, the least recently used finished one first out,
+        the finished ones for COMMAND_RUN_TTL seconds. A run in progress is never dropped: when all of them are
+        in progress no run is taken, so the queue of the worker pool is bounded too.
+        """
+        self.__lock = threading.Lock()
+        self.__runs = OrderedDict()
+        self.__executor = ThreadPoolExecutor(
+            max_workers=EnvStartupSingleton.get_instance().get_config().COMMAND_WORKERS)
+
+        if CommandRunsSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            CommandRunsSingleton.__instance = self
+
+    def submit(self, commands, mode=CommandInMemory.MODE_SEQUENTIAL, concurrency=None, needs=None):
+        """
+        Returns the run, scheduled, or None if RUNS_MAX_SIZE runs are in progress.
+        The commands run with the env overlay of the caller
+        """
+        run_id = token_hex(8)
+        command_in_memory = CommandInMemory()
+        command_in_memory.command_dict["id"] = run_id
+        command_in_memory.command_dict["mode"] = mode
+        command_in_memory.command_dict["commands"] = dict.fromkeys(commands, {"status": "scheduled", "details": {}})
+        run = {
+            "command": command_in_memory,
+            "finished": None
+        }
+        with self.__lock:
+            if not self.__evict():
+                return None
+            self.__runs[run_id] = run
+        self.__executor.submit(self.__run, run, [commands, mode, concurrency, needs],
+                               EnvironmentSingleton.get_instance().get_overlay())
+
+        return self.__snapshot(run)
+
+    def get_run(self, run_id):
+        with self.__lock:
+            run = self.__runs.get(run_id)
+            if run is None:
+                return None
+            self.__runs.move_to_end(run_id)
+
+        return self.__snapshot(run)
+
+    def __run(self, run, args, env_vars):
+        with EnvironmentSingleton.get_instance().overlay(env_vars):
+            try:
+                run.get("command").run_commands(*args)
+            finally:
+                run["finished"] = time.time()
+
+    @staticmethod
+    def __snapshot(run):
+        """ CommandInMemory puts new dicts on update, the copy is consistent while the run goes on """
+        command_dict = copy.deepcopy(run.get("command").command_dict)
+        statuses = [command.get('status') for command in command_dict.get('commands').values()]
+        command_dict["progress"] = {
+            "finished": statuses.count("finished"),
+            "total": len(statuses)
+        }
+
+        return command_dict
+
+    def __evict(self):
+        """ makes room for a run. False if all the runs kept are in progress """
+        ttl = EnvStartupSingleton.get_instance().get_config().COMMAND_RUN_TTL
+        for run_id, run in list(self.__runs.items()):
+            if run.get("finished") is not None and time.time() - run.get("finished") > ttl:
+                self.__runs.pop(run_id)
+        while len(self.__runs) >= self.RUNS_MAX_SIZE:
+            finished = [run_id for run_id, run in self.__runs.items() if run.get("finished") is not None]
+            if not finished:
+                return False
+            self.__runs.pop(finished[0])
+
+        return True
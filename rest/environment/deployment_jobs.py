@@ -0,0 +1,214 @@
+import copy
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from secrets import token_hex
+
+from rest.api.constants.env_constants import EnvConstants
+from rest.api.constants.env_init import EnvInit
+from rest.environment.environment import EnvironmentSingleton
+from rest.environment.image_pulls import ImagePullsSingleton
+from rest.model.deployment_reader import DeploymentReader
+from rest.utils.docker_utils import DockerUtils
+from rest.utils.env_startup import EnvStartupSingleton
+from rest.utils.io_utils import IOUtils
+
+
+class DeploymentJobsSingleton:
+    __instance = None
+    JOBS_MAX_SIZE = 100
+    STATUS_SCHEDULED = "scheduled"
+    STATUS_IN_PROGRESS = "in progress"
+    STATUS_FINISHED = "finished"
+    STATUS_FAILED = "failed"
+    STATUS_SKIPPED = "skipped"
+
+    @staticmethod
+    def get_instance():
+        if DeploymentJobsSingleton.__instance is None:
+            DeploymentJobsSingleton()
+        return DeploymentJobsSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class runs the deployment jobs on a bounded worker pool.
+        Every job keeps its phases (render, pull, create, start) with timings and exit codes.
+        The deployments of the jobs not done yet count against MAX_DEPLOYMENTS, with the active ones.
+        """
+        self.__jobs = OrderedDict()
+        self.__pending = {}
+        self.__condition = threading.Condition()
+        self.__admission_lock = threading.Lock()
+        self.__executor = ThreadPoolExecutor(
+            max_workers=EnvStartupSingleton.get_instance().get_config().DEPLOY_WORKERS)
+
+        if DeploymentJobsSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            DeploymentJobsSingleton.__instance = self
+
+    @staticmethod
+    def phase(start_time, code, details):
+        end_time = datetime.datetime.now()
+        return {
+            "status": DeploymentJobsSingleton.STATUS_FINISHED if code == 0 else DeploymentJobsSingleton.STATUS_FAILED,
+            "code": code,
+            "startedat": str(start_time),
+            "finishedat": str(end_time),
+            "duration": (end_time - start_time).total_seconds(),
+            "details": details
+        }
+
+    def submit(self, deployment_id, phases, done_phases=None, cleanup=None):
+        """
+        phases is a list of (name, method, args). The method must return the CmdUtils dict.
+        done_phases are the phases already run by the caller, e.g. the render.
+        cleanup is called when the job is done, whatever its status.
+        The phases run with the env overlay of the caller.
+        """
+        job_id = token_hex(8)
+        job = {
+            "id": job_id,
+            "deployment": deployment_id,
+            "status": self.STATUS_SCHEDULED,
+            "code": None,
+            "startedat": str(datetime.datetime.now()),
+            "finishedat": None,
+            "duration": 0.000000,
+            "phases": OrderedDict(done_phases or {})
+        }
+        for name, method, args in phases:
+            job["phases"][name] = {"status": self.STATUS_SCHEDULED, "details": {}}
+
+        with self.__condition:
+            if len(self.__jobs) >= self.JOBS_MAX_SIZE:
+                self.__evict()
+            self.__jobs[job_id] = job
+            self.__pending[job_id] = deployment_id
+        self.__executor.submit(self.__run, job, phases, EnvironmentSingleton.get_instance().get_overlay(), cleanup)
+
+        return job_id
+
+    def submit_deployment(self, deployment_id, file, render_start_time):
+        """ pull, create and start the rendered compose file """
+        return self.submit(deployment_id, *self.__deployment_phases(file, render_start_time))
+
+    def submit_deployments(self, deployments, render_start_time):
+        """
+        submit_deployment for every (deployment_id, file), all of them or none.
+        None if they do not fit in MAX_DEPLOYMENTS, with the deployments active or pending
+        """
+        # all the compose files are read before the first submit, one unreadable submits none
+        phases = [self.__deployment_phases(file, render_start_time) for deployment_id, file in deployments]
+        with self.__admission_lock:
+            if self.__count_deployments([deployment_id for deployment_id, file in deployments]) > \
+                    EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS):
+                return None
+            return [self.submit(deployment_id, *deployment_phases) for (deployment_id, file), deployment_phases in
+                    zip(deployments, phases)]
+
+    @staticmethod
+    def __deployment_phases(file, render_start_time):
+        render = DeploymentJobsSingleton.phase(render_start_time, 0, {"file": file})
+        images = DeploymentReader.get_images_for_deployment(IOUtils.read_file(file=file))
+        return [
+            ("pull", ImagePullsSingleton.get_instance().pull_images, [images]),
+            ("create", DockerUtils.create, [file]),
+            ("start", DockerUtils.start, [file])
+        ], {"render": render}
+
+    def count_deployments(self):
+        """ the deployments active, plus the ones of the jobs not done yet """
+        with self.__admission_lock:
+            return self.__count_deployments()
+
+    def get_pending_deployments(self):
+        """ the deployments of the jobs not done yet """
+        with self.__condition:
+            return set(self.__pending.values())
+
+    def __count_deployments(self, deployment_ids=None):
+        # the pending ones first: a job done after this has its containers up for the active ones read after
+        pending = self.get_pending_deployments()
+        active = {deployment.get('id') for deployment in DockerUtils.get_active_deployments()}
+        return len(pending | active | set(deployment_ids or []))
+
+    def submit_redeployment(self, deployment_id, file, next_file, render_start_time, diff):
+        """
+        pull and recreate only the services added or changed, all of them if a top level key changed.
+        The services removed go away as orphans. next_file replaces file once the recreate succeeded,
+        else it is removed
+        """
+        render = self.phase(render_start_time, 0, {"file": file, "diff": diff})
+        next_data = IOUtils.read_file(file=next_file)
+        services = diff.get('added') + sorted(diff.get('changed').keys())
+        if diff.get('top_level'):
+            services = sorted(DeploymentReader.get_services(next_data).keys())
+        images = DeploymentReader.get_images_for_deployment(next_data, services)
+        return self.submit(deployment_id, [
+            ("pull", ImagePullsSingleton.get_instance().pull_images, [images]),
+            ("recreate", DockerUtils.recreate, [next_file, services, len(diff.get('removed')) > 0, file])
+        ], {"render": render}, lambda: IOUtils.remove_file(next_file) if IOUtils.does_file_exist(next_file) else None)
+
+    def get_job(self, job_id):
+        with self.__condition:
+            job = self.__jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def get_jobs(self):
+        with self.__condition:
+            return copy.deepcopy(list(self.__jobs.values()))
+
+    def wait_job(self, job_id, timeout):
+        """Blocks until the job is done or the timeout expires."""
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__is_done(self.__jobs.get(job_id)), timeout)
+        return self.get_job(job_id)
+
+    def __is_done(self, job):
+        return job is None or job.get('status') in [self.STATUS_FINISHED, self.STATUS_FAILED]
+
+    def __evict(self):
+        for job_id, job in self.__jobs.items():
+            if self.__is_done(job):
+                self.__jobs.pop(job_id)
+                return
+        self.__jobs.popitem(last=False)
+
+    def __update(self, job, **kwargs):
+        with self.__condition:
+            job.update(kwargs)
+            self.__condition.notify_all()
+
+    def __run(self, job, phases, env_vars, cleanup=None):
+        with EnvironmentSingleton.get_instance().overlay(env_vars):
+            self.__run_phases(job, phases, cleanup)
+
+    def __run_phases(self, job, phases, cleanup=None):
+        start_time = datetime.datetime.now()
+        self.__update(job, status=self.STATUS_IN_PROGRESS)
+        code = 0
+        for name, method, args in phases:
+            if code != 0:
+                job["phases"][name]["status"] = self.STATUS_SKIPPED
+                continue
+            phase_start_time = datetime.datetime.now()
+            job["phases"][name] = {"status": self.STATUS_IN_PROGRESS, "startedat": str(phase_start_time),
+                                   "details": {}}
+            try:
+                details = method(*args)
+                code = details.get('code')
+            except Exception as e:
+                details = "Exception({0})".format(e.__str__())
+                code = None
+            with self.__condition:
+                job["phases"][name] = self.phase(phase_start_time, code, details)
+        # before the job is done, who waits for it finds the cleanup done
+        if cleanup is not None:
+            cleanup()
+        end_time = datetime.datetime.now()
+        with self.__condition:
+            self.__pending.pop(job.get('id'), None)
+        self.__update(job, status=self.STATUS_FINISHED if code == 0 else self.STATUS_FAILED, code=code,
+                      finishedat=str(end_time), duration=(end_time - start_time).total_seconds())
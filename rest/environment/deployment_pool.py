@@ -0,0 +1,194 @@
+import datetime
+import os
+import threading
+from collections import OrderedDict
+from secrets import token_hex
+
+from rest.api.constants.env_constants import EnvConstants
+from rest.api.constants.env_init import EnvInit
+from rest.api.jinja2.render import Render
+from rest.environment.deployment_jobs import DeploymentJobsSingleton
+from rest.environment.deployment_metadata import DeploymentMetadataSingleton
+from rest.utils.docker_utils import DockerUtils
+from rest.utils.io_utils import IOUtils
+
+
+class DeploymentPoolSingleton:
+    __instance = None
+    MEMBER_READY = "ready"
+    MEMBER_WARMING = "warming"
+    MEMBER_GONE = "gone"
+
+    @staticmethod
+    def get_instance():
+        if DeploymentPoolSingleton.__instance is None:
+            DeploymentPoolSingleton()
+        return DeploymentPoolSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class keeps started deployments per template and variables, ready to be claimed.
+        The pools are refilled in the background, within MAX_DEPLOYMENTS.
+        """
+        self.__lock = threading.RLock()
+        self.__refill_lock = threading.Lock()
+        self.__pools = {}
+
+        if DeploymentPoolSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            DeploymentPoolSingleton.__instance = self
+
+    @staticmethod
+    def get_pool_id(template, variables):
+        return f"{template}/{variables}"
+
+    @staticmethod
+    def get_member_status(deployment_id, job, active_ids):
+        """ the job record can be evicted from the job store, then the deployment must be active """
+        if job is not None and job.get('status') in [DeploymentJobsSingleton.STATUS_SCHEDULED,
+                                                     DeploymentJobsSingleton.STATUS_IN_PROGRESS]:
+            return DeploymentPoolSingleton.MEMBER_WARMING
+        if (job is None or job.get('status') == DeploymentJobsSingleton.STATUS_FINISHED) and \
+                deployment_id in active_ids:
+            return DeploymentPoolSingleton.MEMBER_READY
+        return DeploymentPoolSingleton.MEMBER_GONE
+
+    def set_pool(self, template, variables, size):
+        pool_id = self.get_pool_id(template, variables)
+        with self.__lock:
+            pool = self.__pools.setdefault(pool_id, {
+                "id": pool_id,
+                "template": template,
+                "variables": variables,
+                "size": 0,
+                "err": None,
+                "members": OrderedDict()
+            })
+            pool["size"] = size
+
+        return self.get_pool(pool_id)
+
+    def get_pool(self, pool_id, active_deployments=None):
+        jobs = DeploymentJobsSingleton.get_instance()
+        if active_deployments is None:
+            active_deployments = DockerUtils.get_active_deployments()
+        active_ids = [deployment.get('id') for deployment in active_deployments]
+        with self.__lock:
+            pool = self.__pools.get(pool_id)
+            if pool is None:
+                return None
+            members = [(deployment_id, self.get_member_status(deployment_id, jobs.get_job(job_id), active_ids)) for
+                       deployment_id, job_id in pool["members"].items()]
+            return {
+                "id": pool_id,
+                "template": pool.get('template'),
+                "variables": pool.get('variables'),
+                "size": pool.get('size'),
+                "err": pool.get('err'),
+                "ready": [deployment_id for deployment_id, status in members if status == self.MEMBER_READY],
+                "warming": [deployment_id for deployment_id, status in members if status == self.MEMBER_WARMING]
+            }
+
+    def get_pools(self):
+        active_deployments = DockerUtils.get_active_deployments()
+        with self.__lock:
+            return [self.get_pool(pool_id, active_deployments) for pool_id in self.__pools]
+
+    def claim(self, template, variables, active_deployments):
+        """ hands out a started deployment, None if none is ready """
+        jobs = DeploymentJobsSingleton.get_instance()
+        active_ids = [deployment.get('id') for deployment in active_deployments]
+        with self.__lock:
+            pool = self.__pools.get(self.get_pool_id(template, variables))
+            if pool is None:
+                return None
+            for deployment_id, job_id in pool["members"].items():
+                if self.get_member_status(deployment_id, jobs.get_job(job_id), active_ids) == self.MEMBER_READY:
+                    pool["members"].pop(deployment_id)
+                    return deployment_id
+
+        return None
+
+    def refill_async(self):
+        threading.Thread(target=self.refill, daemon=True).start()
+
+    def refill(self):
+        """ drops the members gone or failed, then starts the missing ones. One refill at a time """
+        if not self.__refill_lock.acquire(blocking=False):
+            return
+        try:
+            self.__refill()
+        finally:
+            self.__refill_lock.release()
+
+    def __refill(self):
+        jobs = DeploymentJobsSingleton.get_instance()
+        active_ids = [deployment.get('id') for deployment in DockerUtils.get_active_deployments()]
+        teardown = []
+        refills = []
+        with self.__lock:
+            occupied = set(active_ids) | jobs.get_pending_deployments()
+            for pool in self.__pools.values():
+                ready = []
+                for deployment_id, job_id in list(pool["members"].items()):
+                    status = self.get_member_status(deployment_id, jobs.get_job(job_id), active_ids)
+                    if status == self.MEMBER_WARMING:
+                        occupied.add(deployment_id)
+                    elif status == self.MEMBER_READY:
+                        ready.append(deployment_id)
+                    # failed to start, or expired / deleted meanwhile
+                    else:
+                        pool["members"].pop(deployment_id)
+                        teardown.append(deployment_id)
+                # the pool was shrunk, the newest ready members go first. The warming ones are still deployed
+                # by their job, they go on a next refill once ready
+                excess = max(len(pool["members"]) - pool.get('size'), 0)
+                for deployment_id in ready[::-1][:excess]:
+                    pool["members"].pop(deployment_id)
+                    teardown.append(deployment_id)
+
+            capacity = EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS) - len(occupied)
+            for pool in self.__pools.values():
+                missing = min(max(pool.get('size') - len(pool["members"]), 0), max(capacity, 0))
+                capacity -= missing
+                if missing > 0:
+                    refills.append((pool, missing))
+
+        for deployment_id in teardown:
+            deploy_dir = f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{deployment_id}"
+            DockerUtils.down_deployment(deployment_id)
+            IOUtils.remove_directory(deploy_dir) if os.path.isdir(deploy_dir) else None
+            DeploymentMetadataSingleton.get_instance().delete_metadata_for_deployment(deployment_id)
+        for pool, missing in refills:
+            self.__start_members(pool, missing)
+
+    def __start_members(self, pool, count):
+        render_start_time = datetime.datetime.now()
+        try:
+            rendered_templates = Render(pool.get('template'), pool.get('variables')).rend_templates([{}] * count)
+        except Exception as e:
+            with self.__lock:
+                pool["err"] = "Exception({0})".format(e.__str__())
+            return
+
+        for rendered_template in rendered_templates:
+            deployment_id = token_hex(8)
+            deploy_dir = f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{deployment_id}"
+            file = f"{deploy_dir}/docker-compose.yml"
+            metadata = {"pool": pool.get('id')}
+            IOUtils.create_dir(deploy_dir)
+            IOUtils.write_to_file(file, rendered_template)
+            IOUtils.write_to_file_dict(f"{deploy_dir}/metadata.json", metadata)
+            DeploymentMetadataSingleton.get_instance().set_metadata_for_deployment(deployment_id, metadata)
+            job_ids = DeploymentJobsSingleton.get_instance().submit_deployments([(deployment_id, file)],
+                                                                                render_start_time)
+            # other deployments took the room meanwhile
+            if job_ids is None:
+                IOUtils.remove_directory(deploy_dir)
+                DeploymentMetadataSingleton.get_instance().delete_metadata_for_deployment(deployment_id)
+                return
+            job_id = job_ids[0]
+            with self.__lock:
+                pool["err"] = None
+                pool["members"][deployment_id] = job_id
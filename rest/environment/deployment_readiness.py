@@ -0,0 +1,139 @@
+import copy
+import threading
+import time
+
+from rest.utils.docker_backend import DockerBackend
+from rest.utils.docker_utils import DockerUtils
+
+
+class ReadinessWatcher:
+    POLL_INTERVAL = 1
+
+    def __init__(self, env_id, services, registry):
+        """Polls the containers of one deployment until they are all ready, for all its waiters."""
+        self.env_id = env_id
+        self.services = services
+        self.registry = registry
+        self.waiters = 0
+        self.state = None
+        self.start_time = time.time()
+        self.__ready_in = {}
+        self.__condition = threading.Condition()
+
+    @staticmethod
+    def get_health(status):
+        """ 'Up 3 seconds (health: starting)' -> starting """
+        for health in ["unhealthy", "healthy", "starting"]:
+            if f"({health})" in status or f"(health: {health})" in status:
+                return health
+        return None
+
+    @staticmethod
+    def is_ready(status, health):
+        # a one shot service which exited with 0 is done
+        return (status.startswith("Up") and health in [None, "healthy"]) or status.startswith("Exited (0)")
+
+    def poll(self):
+        elapsed = time.time() - self.start_time
+        try:
+            containers = DockerUtils.ps_project(self.env_id)
+            err = None
+        except Exception as e:
+            containers = []
+            err = "Exception({0})".format(e.__str__())
+
+        items = []
+        for container in containers:
+            status = container.get('Status', "")
+            health = self.get_health(status)
+            ready = self.is_ready(status, health)
+            if ready:
+                self.__ready_in.setdefault(container.get('Names'), elapsed)
+            items.append({
+                "name": container.get('Names'),
+                "service": container.get('Labels', {}).get(DockerBackend.COMPOSE_SERVICE_LABEL),
+                "status": status,
+                "health": health,
+                "ready": ready,
+                "readyin": self.__ready_in.get(container.get('Names')) if ready else None
+            })
+        missing = sorted(set(self.services) - set([item.get('service') for item in items]))
+        ready = len(items) > 0 and not missing and all([item.get('ready') for item in items])
+
+        return {
+            "id": self.env_id,
+            "ready": ready,
+            "readyin": max([item.get('readyin') for item in items]) if ready else None,
+            "missing": missing,
+            "containers": items,
+            "err": err
+        }
+
+    def run(self):
+        while True:
+            state = self.poll()
+            with self.__condition:
+                self.state = state
+                self.__condition.notify_all()
+            if self.registry.release(self):
+                return
+            time.sleep(self.POLL_INTERVAL)
+
+    def wait(self, timeout):
+        """ at most timeout seconds from the call. Without a first poll by then, the state has no containers """
+        start_time = time.time()
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.state is not None and self.state.get('ready'), timeout)
+            state = copy.deepcopy(self.state) if self.state is not None else {"id": self.env_id, "ready": False}
+        state["waited"] = time.time() - start_time
+
+        return state
+
+
+class DeploymentReadinessSingleton:
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        if DeploymentReadinessSingleton.__instance is None:
+            DeploymentReadinessSingleton()
+        return DeploymentReadinessSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class keeps one readiness watcher per deployment.
+        Concurrent waiters for the same deployment share the watcher and its polls.
+        """
+        self.__lock = threading.Lock()
+        self.__watchers = {}
+
+        if DeploymentReadinessSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            DeploymentReadinessSingleton.__instance = self
+
+    def wait(self, env_id, services, timeout):
+        with self.__lock:
+            watcher = self.__watchers.get(env_id)
+            if watcher is None:
+                watcher = ReadinessWatcher(env_id, services, self)
+                self.__watchers[env_id] = watcher
+                threading.Thread(target=watcher.run, daemon=True).start()
+            watcher.waiters += 1
+        try:
+            return watcher.wait(timeout)
+        finally:
+            with self.__lock:
+                watcher.waiters -= 1
+
+    def get_watchers(self):
+        with self.__lock:
+            return list(self.__watchers.keys())
+
+    def release(self, watcher):
+        """ the watcher stops when its deployment is ready or when nobody waits for it anymore """
+        with self.__lock:
+            if watcher.state.get('ready') or watcher.waiters == 0:
+                self.__watchers.pop(watcher.env_id, None)
+                return True
+        return False
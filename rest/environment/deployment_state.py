@@ -0,0 +1,73 @@
+import threading
+import time
+
+
+class DeploymentStateSingleton:
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        if DeploymentStateSingleton.__instance is None:
+            DeploymentStateSingleton()
+        return DeploymentStateSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class keeps the running containers in memory, fed by the docker event stream.
+        The cache is used only while the event stream is live, otherwise docker is queried directly.
+        """
+        self.__lock = threading.RLock()
+        self.__containers = {}
+        self.__live = False
+        self.__updated_at = None
+
+        if DeploymentStateSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            DeploymentStateSingleton.__instance = self
+
+    def resync(self, containers):
+        """ containers is the list returned by 'docker ps --format {{json .}}' """
+        with self.__lock:
+            self.__containers = {container.get('ID'): container for container in containers}
+            self.__updated_at = time.time()
+
+    def apply_event(self, event):
+        """ event is a container event from 'docker events --format {{json .}}' """
+        action = event.get('Action', event.get('status', ""))
+        actor = event.get('Actor', {})
+        container_id = actor.get('ID', event.get('id', ""))[:12]
+        attributes = dict(actor.get('Attributes', {}))
+
+        with self.__lock:
+            # running containers only, as 'docker ps' lists them for the resync and when the cache is not live
+            if action == "start":
+                self.__containers[container_id] = {
+                    "ID": container_id,
+                    "Image": attributes.pop('image', event.get('from', "")),
+                    "Command": "",
+                    "RunningFor": "Less than a second ago",
+                    "Status": "Up Less than a second",
+                    "Ports": "",
+                    "Names": attributes.pop('name', ""),
+                    "Labels": attributes
+                }
+            elif action in ["die", "destroy"]:
+                self.__containers.pop(container_id, None)
+            self.__updated_at = time.time()
+
+    def get_containers(self):
+        with self.__lock:
+            return list(self.__containers.values())
+
+    def set_live(self, live):
+        self.__live = live
+
+    def is_live(self):
+        return self.__live
+
+    def get_age(self):
+        """ seconds since the cache was last updated. 0 if the cache is not used """
+        if not self.__live or self.__updated_at is None:
+            return 0
+        return round(time.time() - self.__updated_at, 3)
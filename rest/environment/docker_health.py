@@ -0,0 +1,61 @@
+import datetime
+import threading
+import time
+
+from rest.utils.docker_utils import DockerUtils
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class DockerHealthSingleton:
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        if DockerHealthSingleton.__instance is None:
+            DockerHealthSingleton()
+        return DockerHealthSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class keeps the last docker daemon liveness probe.
+        The probe is refreshed by the docker health scheduler, or on read when it is older than the ttl.
+        """
+        self.__lock = threading.Lock()
+        self.__status = None
+        self.__probed_at = 0
+
+        if DockerHealthSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            DockerHealthSingleton.__instance = self
+
+    def probe(self):
+        try:
+            result = DockerUtils.ping()
+            status = {
+                "alive": result.get('code') == 0,
+                "err": result.get('err')
+            }
+        except Exception as e:
+            status = {
+                "alive": False,
+                "err": e.__str__()
+            }
+        status["checkedat"] = str(datetime.datetime.now())
+        self.__status = status
+        self.__probed_at = time.time()
+
+        return status
+
+    def get_status(self):
+        ttl = EnvStartupSingleton.get_instance().get_config().DOCKER_HEALTH_TTL
+        if self.__status is not None and time.time() - self.__probed_at < ttl:
+            return self.__status
+        with self.__lock:
+            # concurrent readers wait for a single probe
+            if self.__status is not None and time.time() - self.__probed_at < ttl:
+                return self.__status
+            return self.probe()
+
+    def is_alive(self):
+        return self.get_status().get('alive')
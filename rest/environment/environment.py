@@ -1,10 +1,21 @@
 import os
+import threading
+from contextlib import contextmanager
 
 from jproperties import Properties
 
 from rest.api.views import AppCreatorSingleton
 
 
+class FrozenEnv(dict):
+    """ the merged env snapshot, shared by all the callers. It changes only through set_env_var """
+
+    def __read_only(self, *args, **kwargs):
+        raise TypeError("The env snapshot is read only, use EnvironmentSingleton.set_env_var")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = __read_only
+
+
 class EnvironmentSingleton:
     VIRTUAL_ENV_MAX_SIZE = 100
 
@@ -24,15 +35,23 @@ class EnvironmentSingleton:
         """
         The constructor. This class keeps system env vars plus the virtual env vars set by the user.
         These env vars are then passed to the subprocess call.
+        The merged env is built once per version, the version goes up when a virtual env var changes.
+        A request can put its own env vars on top, seen only by its thread, through overlay.
         """
-        self.__set_env_vars_from_properties()
+        self.__lock = threading.Lock()
+        self.__overlay = threading.local()
+        self.__version = 0
+        self.__snapshot = None
+        self.__properties = {}
+        self.load_properties()
 
         if EnvironmentSingleton.__instance is not None:
             raise Exception("This class is a singleton!")
         else:
             EnvironmentSingleton.__instance = self
 
-    def __set_env_vars_from_properties(self):
+    def read_properties(self):
+        """ reads environment.properties, the virtual env is not changed """
         configs = Properties()
         try:
             with open(self.__file, 'rb') as config_file:
@@ -42,21 +61,56 @@ class EnvironmentSingleton:
                 "msg": f"Skipping env vars loading from file '{self.__file}' because it doesn't exist. " +
                        "Exception({})".format(e.__str__())})
 
-        for key in configs:
-            self.set_env_var(key, configs[key][0])
+        return {key: configs[key][0] for key in configs}
+
+    def load_properties(self, properties=None):
+        """
+        puts the properties, by default read from environment.properties, into the virtual env.
+        The keys loaded before and no longer there are removed. Returns the properties
+        """
+        properties = self.read_properties() if properties is None else properties
+        for key in self.__properties.keys() - properties.keys():
+            self.__unset_virtual_env_var(key)
+        for key, value in properties.items():
+            self.set_env_var(key, value)
+        self.__properties = properties
+
+        return properties
+
+    def get_properties(self):
+        return self.__properties
+
+    def get_properties_mtime(self):
+        """ None if environment.properties does not exist """
+        try:
+            return os.stat(self.__file).st_mtime_ns
+        except OSError:
+            return None
 
     def set_env_var(self, key, value):
         if key in self.get_env():
             return False
         if key in self.get_virtual_env() and key != "":
-            self.__virtual_env[key] = value
+            self.__set_virtual_env_var(key, value)
             return True
         if len(self.get_virtual_env()) < self.VIRTUAL_ENV_MAX_SIZE and key != "":
-            self.__virtual_env[key] = value
+            self.__set_virtual_env_var(key, value)
             return True
 
         return False
 
+    def __set_virtual_env_var(self, key, value):
+        with self.__lock:
+            if key not in self.__virtual_env or self.__virtual_env.get(key) != value:
+                self.__virtual_env[key] = value
+                self.__version += 1
+
+    def __unset_virtual_env_var(self, key):
+        with self.__lock:
+            if key in self.__virtual_env:
+                self.__virtual_env.pop(key)
+                self.__version += 1
+
     def set_env_vars(self, env_vars):
         env_vars_set = {}
         for key, value in env_vars.items():
@@ -71,5 +125,51 @@ class EnvironmentSingleton:
     def get_virtual_env(self):
         return self.__virtual_env
 
+    def get_version(self):
+        return self.__version
+
+    @contextmanager
+    def overlay(self, env_vars):
+        """
+        Puts the env vars on top of the virtual env for the calling thread only, until the block exits.
+        The system env vars are not overridden, at most VIRTUAL_ENV_MAX_SIZE env vars are taken.
+        Yields the env vars taken.
+        """
+        previous = getattr(self.__overlay, "env_vars", None)
+        overlay = dict(previous or {})
+        for key, value in env_vars.items():
+            key = str(key)
+            if key == "" or key in self.get_env():
+                continue
+            if key in overlay or len(overlay) < self.VIRTUAL_ENV_MAX_SIZE:
+                overlay[key] = str(value)
+        self.__overlay.env_vars = overlay
+        self.__overlay.snapshot = None
+        try:
+            yield overlay
+        finally:
+            self.__overlay.env_vars = previous
+            self.__overlay.snapshot = None
+
+    def get_overlay(self):
+        """ the overlay env vars of the calling thread, to be handed over to the threads working for it """
+        return dict(getattr(self.__overlay, "env_vars", None) or {})
+
     def get_env_and_virtual_env(self):
-        return {**self.__env, **self.__virtual_env}
+        """ the cached read only snapshot of the env plus the virtual env, plus the overlay of the calling thread """
+        snapshot = self.__snapshot
+        if snapshot is None or snapshot[0] != self.__version:
+            with self.__lock:
+                if self.__snapshot is None or self.__snapshot[0] != self.__version:
+                    self.__snapshot = (self.__version, FrozenEnv({**self.__env, **self.__virtual_env}))
+                snapshot = self.__snapshot
+
+        overlay = getattr(self.__overlay, "env_vars", None)
+        if not overlay:
+            return snapshot[1]
+        overlay_snapshot = self.__overlay.snapshot
+        if overlay_snapshot is None or overlay_snapshot[0] != snapshot[0]:
+            overlay_snapshot = (snapshot[0], FrozenEnv({**snapshot[1], **overlay}))
+            self.__overlay.snapshot = overlay_snapshot
+
+        return overlay_snapshot[1]
@@ -0,0 +1,102 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.docker_utils import DockerUtils
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class ImagePullsSingleton:
+    __instance = None
+    STATUS_PULLED = "pulled"
+    STATUS_SHARED = "shared"
+    STATUS_FRESH = "fresh"
+    STATUS_FAILED = "failed"
+
+    @staticmethod
+    def get_instance():
+        if ImagePullsSingleton.__instance is None:
+            ImagePullsSingleton()
+        return ImagePullsSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class runs at most one pull per image:tag.
+        Concurrent deployments wait for the pull in flight. An image pulled within the ttl is not pulled again.
+        """
+        self.__lock = threading.Lock()
+        self.__in_flight = {}
+        self.__pulled = {}
+
+        if ImagePullsSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            ImagePullsSingleton.__instance = self
+
+    def pull(self, image):
+        ttl = EnvStartupSingleton.get_instance().get_config().IMAGE_PULL_TTL
+        with self.__lock:
+            pulled = self.__pulled.get(image)
+            if pulled is not None and time.time() - pulled.get('time') < ttl:
+                return dict(pulled.get('result'), status=self.STATUS_FRESH)
+            pull = self.__in_flight.get(image)
+            if pull is None:
+                pull = {"event": threading.Event(), "result": None}
+                self.__in_flight[image] = pull
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            # the leader may hang, the follower waits at most the deploy timeout and holds its worker no longer
+            timeout = CmdUtils.get_timeout(CmdUtils.OPERATION_DEPLOY) or None
+            if not pull.get('event').wait(timeout):
+                return {
+                    "status": self.STATUS_FAILED,
+                    "code": None,
+                    "err": f"Timed out after {timeout} seconds waiting for the pull of {image} in progress",
+                    "pulledat": str(datetime.datetime.now()),
+                    "duration": timeout
+                }
+            return dict(pull.get('result'), status=self.STATUS_SHARED)
+
+        start_time = datetime.datetime.now()
+        details = {"code": None, "err": "The pull did not finish"}
+        try:
+            details = DockerUtils.pull_image(image)
+        except Exception as e:
+            details = {"code": None, "err": e.__str__()}
+        finally:
+            # whatever happened, the followers are released
+            end_time = datetime.datetime.now()
+            result = {
+                "status": self.STATUS_PULLED if details.get('code') == 0 else self.STATUS_FAILED,
+                "code": details.get('code'),
+                "err": details.get('err'),
+                "pulledat": str(end_time),
+                "duration": (end_time - start_time).total_seconds()
+            }
+            with self.__lock:
+                if result.get('code') == 0:
+                    self.__pulled[image] = {"time": time.time(), "result": result}
+                self.__in_flight.pop(image)
+            pull["result"] = result
+            pull.get('event').set()
+
+        return result
+
+    def pull_images(self, images):
+        """ pulls the images, IMAGE_PULL_WORKERS at a time. The result has the code, like the CmdUtils dict """
+        if not images:
+            return {"code": 0, "images": {}}
+        max_workers = min(len(images), EnvStartupSingleton.get_instance().get_config().IMAGE_PULL_WORKERS)
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            results = dict(zip(images, executor.map(self.pull, images)))
+        failed = [result for result in results.values() if result.get('code') != 0]
+
+        return {
+            "code": failed[0].get('code') if failed else 0,
+            "images": results
+        }
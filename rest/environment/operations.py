@@ -0,0 +1,109 @@
+import datetime
+import os
+import signal
+import threading
+import time
+from secrets import token_hex
+
+
+class OperationsSingleton:
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        if OperationsSingleton.__instance is None:
+            OperationsSingleton()
+        return OperationsSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class keeps the subprocesses in flight, to be listed and cancelled by id.
+        It counts the operations started, finished, timed out, cancelled and the kills sent.
+        """
+        self.__lock = threading.Lock()
+        self.__operations = {}
+        self.__processes = {}
+        self.__counters = {
+            "started": 0,
+            "finished": 0,
+            "timeouts": 0,
+            "cancelled": 0,
+            "kills": 0
+        }
+
+        if OperationsSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            OperationsSingleton.__instance = self
+
+    def register(self, p, operation, timeout, args):
+        operation_id = token_hex(8)
+        with self.__lock:
+            self.__operations[operation_id] = {
+                "id": operation_id,
+                "operation": operation,
+                "args": args if isinstance(args, str) else " ".join(args),
+                "pid": p.pid,
+                "timeout": timeout,
+                "startedat": str(datetime.datetime.now()),
+                "start": time.time(),
+                "timedout": False,
+                "cancelled": False
+            }
+            self.__processes[operation_id] = p
+            self.__counters["started"] += 1
+
+        return operation_id
+
+    def unregister(self, operation_id):
+        """ returns the finished operation """
+        with self.__lock:
+            self.__processes.pop(operation_id, None)
+            self.__counters["finished"] += 1
+            return self.__operations.pop(operation_id, None)
+
+    def timeout(self, operation_id):
+        with self.__lock:
+            p = self.__processes.get(operation_id)
+            if p is None:
+                return
+            self.__operations.get(operation_id)["timedout"] = True
+            self.__counters["timeouts"] += 1
+        self.kill(p)
+
+    def cancel(self, operation_id):
+        """ returns False if the operation is not in flight """
+        with self.__lock:
+            p = self.__processes.get(operation_id)
+            if p is None:
+                return False
+            self.__operations.get(operation_id)["cancelled"] = True
+            self.__counters["cancelled"] += 1
+        self.kill(p)
+
+        return True
+
+    def kill(self, p):
+        """ the processes started by a shell or by docker-compose are killed with it, as one process group """
+        try:
+            if os.name == "nt":
+                os.kill(p.pid, signal.SIGTERM)
+            else:
+                os.killpg(p.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            # it exited meanwhile
+            pass
+        with self.__lock:
+            self.__counters["kills"] += 1
+
+    def get_operations(self):
+        with self.__lock:
+            operations = [dict(operation) for operation in self.__operations.values()]
+        for operation in operations:
+            operation["elapsed"] = time.time() - operation.pop("start")
+
+        return operations
+
+    def get_counters(self):
+        with self.__lock:
+            return dict(self.__counters)
@@ -0,0 +1,81 @@
+import datetime
+import threading
+import time
+from secrets import token_hex
+
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class ProcessesSingleton:
+    __instance = None
+    KIND_DETACHED = "detached"
+    KIND_STREAMED = "streamed"
+
+    @staticmethod
+    def get_instance():
+        if ProcessesSingleton.__instance is None:
+            ProcessesSingleton()
+        return ProcessesSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class keeps the child processes nobody waits for: the detached launches
+        and the streamed ones. The reaper collects their exit codes, so they do not stay zombies.
+        The finished ones are kept for PROCESS_RETENTION seconds.
+        """
+        self.__lock = threading.Lock()
+        self.__processes = {}
+        self.__popens = {}
+
+        if ProcessesSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            ProcessesSingleton.__instance = self
+
+    def register(self, p, command, kind, deployment_id=None):
+        process_id = token_hex(8)
+        with self.__lock:
+            self.__processes[process_id] = {
+                "id": process_id,
+                "pid": p.pid,
+                "kind": kind,
+                "deployment": deployment_id,
+                "command": command if isinstance(command, str) else " ".join(command),
+                "running": True,
+                "exitcode": None,
+                "startedat": str(datetime.datetime.now()),
+                "finishedat": None,
+                "finished": None
+            }
+            self.__popens[process_id] = p
+
+        return process_id
+
+    def reap(self):
+        """ waits the finished children without blocking and drops the entries past the retention """
+        retention = EnvStartupSingleton.get_instance().get_config().PROCESS_RETENTION
+        with self.__lock:
+            for process_id, p in list(self.__popens.items()):
+                exit_code = p.poll()
+                if exit_code is None:
+                    continue
+                self.__popens.pop(process_id)
+                self.__processes[process_id].update({
+                    "running": False,
+                    "exitcode": exit_code,
+                    "finishedat": str(datetime.datetime.now()),
+                    "finished": time.time()
+                })
+            for process_id, process in list(self.__processes.items()):
+                if not process.get('running') and time.time() - process.get('finished') > retention:
+                    self.__processes.pop(process_id)
+
+    def get_processes(self, deployment_id=None):
+        self.reap()
+        with self.__lock:
+            processes = [dict(process) for process in self.__processes.values() if
+                         deployment_id is None or process.get('deployment') == deployment_id]
+        for process in processes:
+            process.pop("finished")
+
+        return processes
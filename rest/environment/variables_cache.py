@@ -0,0 +1,78 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import yaml
+
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class VariablesCacheSingleton:
+    __instance = None
+
+    @staticmethod
+    def get_instance():
+        if VariablesCacheSingleton.__instance is None:
+            VariablesCacheSingleton()
+        return VariablesCacheSingleton.__instance
+
+    def __init__(self):
+        """
+        The constructor. This class keeps the parsed variables files, keyed by path, mtime and size.
+        A file changed on disk is parsed again. The entries take at most VARS_CACHE_SIZE MB,
+        the least recently used first out.
+        """
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()
+        self.__size = 0
+
+        if VariablesCacheSingleton.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            VariablesCacheSingleton.__instance = self
+
+    def get(self, path):
+        """
+        Returns the variables of the file, parsed with yaml.safe_load. Every call gets its own copy,
+        a template changing it does not change the cached one
+        """
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self.__lock:
+            entry = self.__entries.get(path)
+            if entry is not None and entry.get('key') == key:
+                self.__entries.move_to_end(path)
+                return pickle.loads(entry.get('data'))
+
+        with open(path, closefd=True) as f:
+            data = yaml.safe_load(f)
+        # the pickle is the copy kept, its length is the memory counted
+        self.__put(path, key, pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+        return data
+
+    def get_stats(self):
+        with self.__lock:
+            return {
+                "files": len(self.__entries),
+                "size": self.__size
+            }
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def __put(self, path, key, data):
+        max_size = EnvStartupSingleton.get_instance().get_config().VARS_CACHE_SIZE * 1024 * 1024
+        with self.__lock:
+            entry = self.__entries.pop(path, None)
+            if entry is not None:
+                self.__size -= len(entry.get('data'))
+            if len(data) > max_size:
+                return
+            while self.__size + len(data) > max_size:
+                self.__size -= len(self.__entries.popitem(last=False)[1].get('data'))
+            self.__entries[path] = {"key": key, "data": data}
+            self.__size += len(data)
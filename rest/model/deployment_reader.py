@@ -17,3 +17,91 @@ class DeploymentReader:
             return {}
 
         return deployment.get("x-metadata") if deployment.get("x-metadata") is not None else {}
+
+    @classmethod
+    def normalize_image(cls, image):
+        """ 'alpine' -> 'alpine:latest' """
+        if "@" in image or ":" in image.split("/")[-1]:
+            return image
+        return f"{image}:latest"
+
+    @classmethod
+    def get_services(cls, data):
+        try:
+            deployment = cls.load(data)
+            if not isinstance(deployment, dict) or not isinstance(deployment.get("services"), dict):
+                return {}
+        except:
+            return {}
+
+        return {name: service if isinstance(service, dict) else {} for name, service in
+                deployment.get("services").items()}
+
+    @classmethod
+    def get_top_level(cls, data):
+        """ the top level keys shared by the services, e.g. networks and volumes. Not the version and the x- keys """
+        try:
+            deployment = cls.load(data)
+            if not isinstance(deployment, dict):
+                return {}
+        except:
+            return {}
+
+        return {key: value for key, value in deployment.items() if
+                key not in ["version", "services"] and not str(key).startswith("x-")}
+
+    @classmethod
+    def normalize_service_key(cls, key, value):
+        """ the same definition can be written in more ways, e.g. environment as list or as dict """
+        if key == "environment" and isinstance(value, list):
+            return {item.split("=", 1)[0]: item.split("=", 1)[1] if "=" in item else None for item in map(str, value)}
+        if key == "environment" and isinstance(value, dict):
+            return {str(env_key): str(env_value) if env_value is not None else None for env_key, env_value in
+                    value.items()}
+        if key in ["ports", "volumes", "expose"] and isinstance(value, list):
+            return sorted([str(item) for item in value])
+        return value
+
+    @classmethod
+    def diff_services(cls, old_data, new_data):
+        """
+        Per service diff of two compose files.
+        changed has the keys that differ for each service, e.g. {"app": ["image", "environment"]}.
+        top_level has the top level keys that differ, e.g. ["networks"]: all the services are to be recreated.
+        """
+        old_services = cls.get_services(old_data)
+        new_services = cls.get_services(new_data)
+        changed = {}
+        for name in set(old_services) & set(new_services):
+            old_service, new_service = old_services.get(name), new_services.get(name)
+            keys = [key for key in sorted(set(old_service) | set(new_service)) if
+                    cls.normalize_service_key(key, old_service.get(key)) != cls.normalize_service_key(
+                        key, new_service.get(key))]
+            if keys:
+                changed[name] = keys
+        old_top_level, new_top_level = cls.get_top_level(old_data), cls.get_top_level(new_data)
+
+        return {
+            "top_level": sorted([key for key in set(old_top_level) | set(new_top_level) if
+                                 old_top_level.get(key) != new_top_level.get(key)]),
+            "added": sorted(set(new_services) - set(old_services)),
+            "removed": sorted(set(old_services) - set(new_services)),
+            "changed": changed,
+            "unchanged": sorted([name for name in set(old_services) & set(new_services) if name not in changed])
+        }
+
+    @classmethod
+    def get_images_for_deployment(cls, data, services=None):
+        """
+        The images pulled by 'docker-compose pull', for all the services or only for the ones given.
+        The services built locally are skipped.
+        So are the images interpolated by compose (${TAG}), 'docker-compose up' pulls them if missing.
+        """
+        images = set()
+        for name, service in cls.get_services(data).items():
+            if services is not None and name not in services:
+                continue
+            if service.get("image") and not service.get("build") and "$" not in str(service.get("image")):
+                images.add(cls.normalize_image(str(service.get("image")).strip()))
+
+        return sorted(images)
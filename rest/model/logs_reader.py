@@ -0,0 +1,66 @@
+import datetime
+import re
+
+
+class LogsReader:
+    TAIL_MAX = 10000
+    # 'mysql_1  | 2020-06-01T10:00:00.12Z message', colored or not. Anchored and bounded, whatever the line length
+    LINE_TIMESTAMP = re.compile(r"^(?:\x1b\[[0-9;]*m)?[^|\x1b]{1,256}\|(?:\x1b\[[0-9;]*m)? (\S{1,64})")
+    TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d{1,9}))?(Z|[+-]\d{2}:\d{2})?$")
+
+    @classmethod
+    def normalize_timestamp(cls, timestamp):
+        """
+        '2020-06-01T10:00:00.12Z' -> '2020-06-01T10:00:00.120000000Z'
+        Docker trims the trailing zeros of the nanoseconds, the normalized timestamps compare as strings.
+        """
+        match = cls.TIMESTAMP.match(timestamp.strip())
+        if match is None:
+            raise ValueError(f"Invalid timestamp '{timestamp}', expected RFC3339, e.g. 2020-06-01T10:00:00.000000000Z")
+        seconds, nanos, offset = match.groups()
+        if offset not in [None, "Z"]:
+            utc = datetime.datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S") - datetime.timedelta(
+                hours=int(offset[0] + offset[1:3]), minutes=int(offset[0] + offset[4:6]))
+            seconds = utc.strftime("%Y-%m-%dT%H:%M:%S")
+
+        return f"{seconds}.{(nanos or '').ljust(9, '0')}Z"
+
+    @classmethod
+    def get_timestamp(cls, line):
+        """ 'mysql_1  | 2020-06-01T10:00:00.12Z message' -> normalized timestamp, None if the line has none """
+        match = cls.LINE_TIMESTAMP.match(line)
+        if match is None:
+            return None
+        try:
+            return cls.normalize_timestamp(match.group(1))
+        except ValueError:
+            return None
+
+    @classmethod
+    def filter_lines(cls, out, since=None, until=None, pattern=None):
+        """
+        Keeps the lines logged after since and up to until, matching the regex pattern.
+        Returns the lines kept and the cursor: the last timestamp seen, to be sent as since on the next fetch.
+        """
+        since = cls.normalize_timestamp(since) if since else None
+        until = cls.normalize_timestamp(until) if until else None
+        regex = re.compile(pattern) if pattern else None
+        cursor = since
+        lines = []
+
+        for line in out.splitlines():
+            timestamp = cls.get_timestamp(line)
+            if timestamp is None and (since or until):
+                continue
+            if timestamp is not None and since and timestamp <= since:
+                continue
+            if timestamp is not None and until and timestamp > until:
+                continue
+            # the lines filtered out by the pattern are not fetched again either
+            if timestamp is not None and (cursor is None or timestamp > cursor):
+                cursor = timestamp
+            if regex is not None and not regex.search(line):
+                continue
+            lines.append(line)
+
+        return lines, cursor
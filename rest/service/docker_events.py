@@ -0,0 +1,64 @@
+import json
+import threading
+import time
+
+from rest.api.loghelpers.message_dumper import MessageDumper
+from rest.environment.deployment_state import DeploymentStateSingleton
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.docker_utils import DockerUtils
+
+
+class DockerEventsWatcher:
+
+    def __init__(self, fluentd_utils, retry_interval=10):
+        """Keeps the deployment state cache in sync with the docker event stream."""
+        self.fluentd_utils = fluentd_utils
+        self.retry_interval = retry_interval
+        self.message_dumper = MessageDumper()
+        self.state = DeploymentStateSingleton.get_instance()
+        self.__stopped = threading.Event()
+        self.__process = None
+        self.__thread = threading.Thread(target=self.__watch, name="docker-events", daemon=True)
+
+    def start(self):
+        self.log(fluentd_tag="DockerEventsWatcher", message="Starting docker events watcher")
+        self.__thread.start()
+
+    def stop(self):
+        self.log(fluentd_tag="DockerEventsWatcher", message="Stopping docker events watcher")
+        self.__stopped.set()
+        if self.__process is not None:
+            self.__process.terminate()
+
+    def log(self, fluentd_tag, message):
+        self.fluentd_utils.emit(tag=fluentd_tag, msg=self.message_dumper.dump_message(message=message))
+
+    def __watch(self):
+        while not self.__stopped.is_set():
+            try:
+                # the events since a second before the resync are replayed by the daemon and applied on top,
+                # none is lost while the subscription starts
+                since = str(int(time.time()) - 1)
+                self.state.resync(DockerUtils.ps_all())
+                self.__process = CmdUtils.run_cmd_streamed(
+                    ["docker", "events", "--format", "{{json .}}", "--since", since,
+                     "--filter", "type=container",
+                     "--filter", f"label={DockerUtils.COMPOSE_PROJECT_LABEL}",
+                     "--filter", "event=start",
+                     "--filter", "event=die",
+                     "--filter", "event=destroy"])
+                self.state.set_live(self.__process.poll() is None)
+                for line in self.__process.stdout:
+                    try:
+                        self.state.apply_event(json.loads(line))
+                    except ValueError:
+                        continue
+            except Exception as e:
+                self.log(fluentd_tag="DockerEventsWatcher", message=f"Docker events stream failed: {e.__str__()}")
+            finally:
+                # stream gap: stop serving from cache until the next resync
+                self.state.set_live(False)
+                if self.__process is not None:
+                    self.__process.kill()
+                    self.__process.wait()
+            self.__stopped.wait(self.retry_interval)
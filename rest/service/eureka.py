@@ -17,7 +17,7 @@ class Eureka:
         print("Starting eureka register on eureka server " + self.host + ".\n")
         print(properties['name'] + " registering with: ip=" + app_ip + ",  port=" + str(app_port) + "... \n")
 
-        protocol = "https" if EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.HTTPS_ENABLE) \
+        protocol = "https" if EnvStartupSingleton.get_instance().get_config().HTTPS_ENABLE \
             else "http"
 
         eureka_client.init(eureka_server=f"{self.host}",
@@ -3,7 +3,6 @@ import os
 import platform
 
 from about import properties
-from rest.api.constants.env_constants import EnvConstants
 from rest.utils.env_startup import EnvStartupSingleton
 
 
@@ -24,7 +23,7 @@ class Fluentd:
     def __enrich_message(level_code, msg):
         return {
             "name": properties.get('name'),
-            "port": EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.PORT),
+            "port": EnvStartupSingleton.get_instance().get_config().PORT,
             "version": properties.get('version'),
             "uname": list(platform.uname()),
             "python": platform.python_version(),
@@ -35,7 +34,7 @@ class Fluentd:
         }
 
     def __emit(self, tag, msg):
-        if EnvStartupSingleton.get_instance().get_config_env_vars().get(EnvConstants.FLUENTD_IP_PORT):
+        if EnvStartupSingleton.get_instance().get_config().FLUENTD_IP_PORT:
             return str(self.logger.emit(tag, msg)).lower()
 
         return "fluentd logging not enabled"
@@ -1,38 +1,187 @@
+import asyncio
+import os
+import queue
 import subprocess
+import threading
 
+from rest.environment.cmd_engine import CmdEngineSingleton
 from rest.environment.environment import EnvironmentSingleton
+from rest.environment.operations import OperationsSingleton
+from rest.environment.processes import ProcessesSingleton
+from rest.utils.env_startup import EnvStartupSingleton
+from rest.utils.line_buffer import LineBuffer
 
 
 class CmdUtils:
     __env = EnvironmentSingleton.get_instance()
+    __engine = CmdEngineSingleton.get_instance()
+    CHUNK_SIZE = 65536
+    KILL_GRACE = 5
+    OPERATION_DEFAULT = "default"
+    OPERATION_DEPLOY = "deploy"
+    OPERATION_TEARDOWN = "teardown"
+    OPERATION_QUERY = "query"
+    OPERATION_COMMAND = "command"
+    # [seconds], overridden with CMD_TIMEOUTS. The other classes get CMD_TIMEOUT
+    DEFAULT_TIMEOUTS = {
+        OPERATION_DEPLOY: 1800,
+        OPERATION_TEARDOWN: 600,
+        OPERATION_QUERY: 60,
+        # the user commands may run long, e.g. migrations: opt in with CMD_TIMEOUTS=command=<seconds>
+        OPERATION_COMMAND: 0
+    }
 
     @staticmethod
-    def run_cmd_detached(command):
+    def run_cmd_detached(command, deployment_id=None):
+        """ nobody waits for the process, the process registry reaps it """
         p = subprocess.Popen(command, stdout=None, stderr=None, shell=True,
                              env=CmdUtils.__env.get_env_and_virtual_env())
         print("Opened pid {} for command {}".format(p.pid, command))
+        return ProcessesSingleton.get_instance().register(p, command, ProcessesSingleton.KIND_DETACHED, deployment_id)
 
     @staticmethod
-    def run_cmd_shell_true(command):
-        p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                             env=CmdUtils.__env.get_env_and_virtual_env(), shell=True)
-        return CmdUtils.__get_subprocess_data(p)
+    def run_cmd_streamed(command, deployment_id=None, shell=False, stderr=subprocess.DEVNULL):
+        """
+        The caller reads the stdout lines and must terminate the process. stderr=subprocess.STDOUT merges the pipes.
+        The process leads its own process group, to be killed with its children.
+        """
+        p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, shell=shell,
+                             env=CmdUtils.__env.get_env_and_virtual_env(), universal_newlines=True, errors="replace",
+                             start_new_session=True)
+        ProcessesSingleton.get_instance().register(p, command, ProcessesSingleton.KIND_STREAMED, deployment_id)
+        return p
 
     @staticmethod
-    def run_cmd_shell_false(command):
-        p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                             env=CmdUtils.__env.get_env_and_virtual_env())
-        return CmdUtils.__get_subprocess_data(p)
+    def read_streamed(p, keepalive=None, queue_size=1000):
+        """
+        Yields the stdout lines of a streamed process. Yields None when no line came for keepalive seconds.
+        The lines pass through a bounded queue: a slow reader blocks the process, memory stays bounded.
+        The process is killed when the generator is closed, e.g. the http client disconnected.
+        """
+        lines = queue.Queue(maxsize=queue_size)
+        closed = threading.Event()
+
+        def put(line):
+            while not closed.is_set():
+                try:
+                    lines.put(line, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        def pump():
+            with p.stdout:
+                # a line longer than CHUNK_SIZE comes in pieces
+                for line in iter(lambda: p.stdout.readline(CmdUtils.CHUNK_SIZE), ""):
+                    put(line)
+                    if closed.is_set():
+                        return
+            put(None)
+
+        threading.Thread(target=pump, daemon=True).start()
+        try:
+            while True:
+                try:
+                    line = lines.get(timeout=keepalive)
+                except queue.Empty:
+                    yield None
+                    continue
+                if line is None:
+                    return
+                yield line
+        finally:
+            closed.set()
+            if p.poll() is None:
+                p.kill()
+            p.wait()
+
+    @staticmethod
+    def get_timeout(operation):
+        """ the timeout of an operation class: CMD_TIMEOUTS, else the defaults, else CMD_TIMEOUT. 0 is no timeout """
+        config = EnvStartupSingleton.get_instance().get_config()
+        if operation in config.CMD_TIMEOUTS:
+            return config.CMD_TIMEOUTS.get(operation)
+
+        return CmdUtils.DEFAULT_TIMEOUTS.get(operation, config.CMD_TIMEOUT)
+
+    @staticmethod
+    def run_cmd_shell_true(command, head=0, tail=1000, operation=OPERATION_DEFAULT, timeout=None):
+        return CmdUtils.__engine.run(CmdUtils.run_cmd_async(command, True, head, tail, operation, timeout))
 
     @staticmethod
-    def __get_subprocess_data(p):
-        lines_to_slice = 1000
-        [out, err] = p.communicate()
+    def run_cmd_shell_false(command, head=0, tail=1000, operation=OPERATION_DEFAULT, timeout=None):
+        return CmdUtils.__engine.run(CmdUtils.run_cmd_async(command, False, head, tail, operation, timeout))
+
+    @staticmethod
+    def run_cmd_async(command, shell=False, head=0, tail=1000, operation=OPERATION_DEFAULT, timeout=None):
+        """
+        Returns the coroutine running the command on the engine loop, to be awaited there or handed to
+        CmdEngineSingleton.gather. The environment is taken now, in the calling thread.
+        """
+        return CmdUtils.__run_cmd(command, shell, head, tail, operation, timeout,
+                                  CmdUtils.__env.get_env_and_virtual_env())
+
+    @staticmethod
+    async def __run_cmd(command, shell, head, tail, operation, timeout, env):
+        """
+        The pipes are read as the process writes, only head and tail lines of each are kept.
+        On timeout or cancel the process group is killed.
+        """
+        timeout = (timeout if timeout is not None else CmdUtils.get_timeout(operation)) or None
+        pipes = {"stdout": asyncio.subprocess.PIPE, "stderr": asyncio.subprocess.PIPE, "env": env,
+                 "start_new_session": True}
+        if shell and os.name == "nt":
+            p = await asyncio.create_subprocess_shell(
+                command if isinstance(command, str) else subprocess.list2cmdline(command), **pipes)
+        elif shell:
+            # like subprocess.Popen(command, shell=True): the first item is the script, the others its arguments
+            p = await asyncio.create_subprocess_exec(
+                "/bin/sh", "-c", *([command] if isinstance(command, str) else command), **pipes)
+        else:
+            p = await asyncio.create_subprocess_exec(*command, **pipes)
+
+        operations = OperationsSingleton.get_instance()
+        operation_id = operations.register(p, operation, timeout, command)
+        out = LineBuffer(head, tail)
+        err = LineBuffer(head, tail)
+        readers = asyncio.gather(CmdUtils.__read_stream(p.stdout, out), CmdUtils.__read_stream(p.stderr, err))
+        try:
+            await asyncio.wait_for(p.wait(), timeout)
+        except asyncio.TimeoutError:
+            operations.timeout(operation_id)
+            await p.wait()
+        finished = operations.unregister(operation_id)
+        killed = finished.get('timedout') or finished.get('cancelled')
+        try:
+            # a child which left the process group may still hold the pipes of a killed process
+            await asyncio.wait_for(readers, CmdUtils.KILL_GRACE if killed else None)
+        except asyncio.TimeoutError:
+            pass
+
+        err_text = err.get_text()
+        if finished.get('timedout'):
+            err_text = f"{err_text}\nTimed out after {timeout} seconds, killed".lstrip()
+        elif finished.get('cancelled'):
+            err_text = f"{err_text}\nCancelled, killed".lstrip()
 
         return {
-            "out": "\n".join(out.decode("UTF-8", "replace").split("\n")[-lines_to_slice:]).rstrip(),
-            "err": "\n".join(err.decode("UTF-8", "replace").split("\n")[-lines_to_slice:]).rstrip(),
+            "out": out.get_text(),
+            "err": err_text,
             "code": p.returncode,
             "pid": p.pid,
-            "args": p.args
+            "args": command,
+            "id": operation_id,
+            "stats": {
+                "out": out.get_stats(),
+                "err": err.get_stats()
+            }
         }
+
+    @staticmethod
+    async def __read_stream(stream, line_buffer):
+        while True:
+            chunk = await stream.read(CmdUtils.CHUNK_SIZE)
+            if not chunk:
+                break
+            line_buffer.feed(chunk)
+        line_buffer.close()
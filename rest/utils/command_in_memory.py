@@ -1,12 +1,25 @@
+import asyncio
 import datetime
+import json
 import os
 import platform
 import shlex
+import subprocess
+import threading
 
+from rest.environment.cmd_engine import CmdEngineSingleton
+from rest.environment.operations import OperationsSingleton
 from rest.utils.cmd_utils import CmdUtils
 
 
 class CommandInMemory:
+    MODE_SEQUENTIAL = "sequential"
+    MODE_PARALLEL = "parallel"
+    MODE_DAG = "dag"
+    STATUS_SCHEDULED = "scheduled"
+    STATUS_IN_PROGRESS = "in progress"
+    STATUS_FINISHED = "finished"
+    STATUS_SKIPPED = "skipped"
 
     def __init__(self):
         self.command_dict = {
@@ -17,21 +30,85 @@ class CommandInMemory:
             "duration": 0.000000,
             "id": "none",
             "pid": 0,
+            "mode": self.MODE_SEQUENTIAL,
+            "critical_path": {"commands": [], "duration": 0.000000},
             "commands": {}
         }
         self.__cmd_utils = CmdUtils()
+        self.__times = {}
 
-    def run_commands(self, commands):
+    @staticmethod
+    def parse_commands(input_data, mode=MODE_SEQUENTIAL):
+        """
+        Returns the commands and what each one needs. One command per line, the lines are independent.
+        In dag mode the input is a JSON object, each command with the list of commands it needs,
+        e.g. {"make db": [], "migrate": ["make db"]}
+        """
+        if mode in [CommandInMemory.MODE_SEQUENTIAL, CommandInMemory.MODE_PARALLEL]:
+            commands = [command.strip() for command in input_data.split("\n")]
+            return commands, {command: [] for command in commands}
+        if mode != CommandInMemory.MODE_DAG:
+            raise ValueError(f"Unknown mode '{mode}', expected one of: {CommandInMemory.MODE_SEQUENTIAL}, "
+                             f"{CommandInMemory.MODE_PARALLEL}, {CommandInMemory.MODE_DAG}")
+
+        graph = json.loads(input_data)
+        if not isinstance(graph, dict) or not all(isinstance(needs, list) for needs in graph.values()):
+            raise ValueError("Expected a JSON object of commands with the commands they need, "
+                             "e.g. {\"make db\": [], \"migrate\": [\"make db\"]}")
+        needs = {command.strip(): [need.strip() for need in command_needs] for command, command_needs in graph.items()}
+        CommandInMemory.get_order(needs)
+
+        return list(needs.keys()), needs
+
+    @staticmethod
+    def get_order(needs):
+        """ the commands sorted after what they need. Raises ValueError on unknown commands or cycles """
+        order = []
+        visiting = set()
+
+        def visit(command, path):
+            if command in order:
+                return
+            if command in visiting:
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [command])}")
+            if command not in needs:
+                raise ValueError(f"Unknown command '{command}' needed by '{path[-1]}'")
+            visiting.add(command)
+            for need in needs.get(command):
+                visit(need, path + [command])
+            visiting.discard(command)
+            order.append(command)
+
+        for command in needs:
+            visit(command, [])
+
+        return order
+
+    def run_commands(self, commands, mode=MODE_SEQUENTIAL, concurrency=None, needs=None):
+        """
+        sequential runs one command after another. parallel runs all of them, at most concurrency at a time.
+        dag starts a command when the ones it needs finished with code 0, else it is skipped.
+        In parallel and dag modes a repeated command runs once.
+        """
         start_time = datetime.datetime.now()
         commands = list(map(lambda item: item.strip(), commands))
 
         self.command_dict['pid'] = os.getpid()
-        input_data_dict = dict.fromkeys(commands, {"status": "scheduled", "details": {}})
+        input_data_dict = dict.fromkeys(commands, {"status": self.STATUS_SCHEDULED, "details": {}})
         self.command_dict["started"] = True
+        self.command_dict["mode"] = mode
         self.command_dict["commands"] = input_data_dict
         self.command_dict["startedat"] = str(datetime.datetime.now())
 
-        self.__run_commands(commands)
+        if mode == self.MODE_SEQUENTIAL:
+            self.__run_commands(commands)
+            # one after another, every command waited for the previous one
+            needs = {command: commands[i - 1:i] for i, command in enumerate(commands)}
+        else:
+            needs = needs if mode == self.MODE_DAG else {command: [] for command in commands}
+            CmdEngineSingleton.get_instance().run(self.__run_graph(
+                {command: self.__run_cmd_async(command) for command in input_data_dict}, needs, concurrency))
+        self.command_dict["critical_path"] = self.__get_critical_path(needs)
 
         self.command_dict['finished'] = True
         self.command_dict['started'] = False
@@ -41,25 +118,161 @@ class CommandInMemory:
 
         return self.command_dict
 
+    def stream_commands(self, commands, keepalive=None):
+        """
+        Runs the commands one after another and yields the events as they happen: start, line, exit and end.
+        The output lines (stdout and stderr merged) are forwarded, not kept. Yields None when no line came
+        for keepalive seconds. The command running is killed when the generator is closed.
+        """
+        start_time = datetime.datetime.now()
+        codes = {}
+        for command in map(lambda item: item.strip(), commands):
+            events = self.__stream_command(command, keepalive)
+            try:
+                for event in events:
+                    if event is not None and event.get('event') == "exit":
+                        codes[command] = event.get('code')
+                    yield event
+            finally:
+                events.close()
+        end_time = datetime.datetime.now()
+
+        yield {
+            "event": "end",
+            "finishedat": str(end_time),
+            "duration": (end_time - start_time).total_seconds(),
+            "codes": codes
+        }
+
+    def __stream_command(self, command, keepalive):
+        start_time = datetime.datetime.now()
+        operations = OperationsSingleton.get_instance()
+        try:
+            p = CmdUtils.run_cmd_streamed(shlex.split(command) if platform.system() == "Windows" else command,
+                                          shell=True, stderr=subprocess.STDOUT)
+        except Exception as e:
+            yield {"event": "exit", "command": command, "code": None, "err": "Exception({0})".format(e.__str__())}
+            return
+        timeout = CmdUtils.get_timeout(CmdUtils.OPERATION_COMMAND) or None
+        operation_id = operations.register(p, CmdUtils.OPERATION_COMMAND, timeout, command)
+        timer = threading.Timer(timeout, operations.timeout, [operation_id]) if timeout else None
+        if timer is not None:
+            timer.daemon = True
+            timer.start()
+        yield {"event": "start", "command": command, "pid": p.pid, "id": operation_id, "startedat": str(start_time)}
+
+        lines = CmdUtils.read_streamed(p, keepalive)
+        count = 0
+        try:
+            for line in lines:
+                if line is None:
+                    yield None
+                    continue
+                count += 1
+                yield {"event": "line", "command": command, "line": line.rstrip("\n")}
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if p.poll() is None:
+                # the client is gone, the shell children go with it
+                operations.kill(p)
+            lines.close()
+            finished = operations.unregister(operation_id)
+
+        end_time = datetime.datetime.now()
+        yield {
+            "event": "exit",
+            "command": command,
+            "code": p.returncode,
+            "lines": count,
+            "timedout": finished.get('timedout'),
+            "cancelled": finished.get('cancelled'),
+            "finishedat": str(end_time),
+            "duration": (end_time - start_time).total_seconds()
+        }
+
     def __run_commands(self, commands):
         details = {}
-        status_finished = "finished"
-        status_in_progress = "in progress"
 
         for command in commands:
+            # every update puts a new dict, a reader copying command_dict from another thread sees no partial entry
             start_time = datetime.datetime.now()
-            self.command_dict['commands'][command] = {"status": "scheduled", "details": {}}
-            self.command_dict['commands'][command]['status'] = status_in_progress
-            self.command_dict['commands'][command]['startedat'] = str(start_time)
+            self.__set_in_progress(command, start_time)
             try:
                 if platform.system() == "Windows":
-                    details[command] = self.__cmd_utils.run_cmd_shell_true(shlex.split(command))
+                    details[command] = self.__cmd_utils.run_cmd_shell_true(shlex.split(command),
+                                                                         operation=CmdUtils.OPERATION_COMMAND)
                 else:
-                    details[command] = self.__cmd_utils.run_cmd_shell_true([command])
+                    details[command] = self.__cmd_utils.run_cmd_shell_true([command],
+                                                                           operation=CmdUtils.OPERATION_COMMAND)
             except Exception as e:
                 details[command] = "Exception({0})".format(e.__str__())
-            self.command_dict['commands'][command]['status'] = status_finished
-            end_time = datetime.datetime.now()
-            self.command_dict['commands'][command]['finishedat'] = str(end_time)
-            self.command_dict['commands'][command]['duration'] = (end_time - start_time).total_seconds()
-            self.command_dict['commands'][command]['details'] = details[command]
+            self.__set_finished(command, start_time, details[command])
+
+    def __run_cmd_async(self, command):
+        """ the coroutines are made in the calling thread, they take its env """
+        if platform.system() == "Windows":
+            return CmdUtils.run_cmd_async(shlex.split(command), True, operation=CmdUtils.OPERATION_COMMAND)
+        return CmdUtils.run_cmd_async([command], True, operation=CmdUtils.OPERATION_COMMAND)
+
+    async def __run_graph(self, coroutines, needs, concurrency):
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+        tasks = {}
+
+        async def run(command):
+            needed = await asyncio.gather(*[tasks.get(need) for need in needs.get(command)])
+            if not all(needed):
+                coroutines.get(command).close()
+                self.command_dict['commands'][command] = {"status": self.STATUS_SKIPPED, "details": {}}
+                return False
+            if semaphore is None:
+                return await self.__run_command(command, coroutines.get(command))
+            async with semaphore:
+                return await self.__run_command(command, coroutines.get(command))
+
+        for command in self.get_order(needs):
+            tasks[command] = asyncio.ensure_future(run(command))
+        await asyncio.gather(*tasks.values())
+
+    async def __run_command(self, command, coroutine):
+        """ returns True if the command finished with code 0 """
+        start_time = datetime.datetime.now()
+        self.__set_in_progress(command, start_time)
+        try:
+            details = await coroutine
+        except Exception as e:
+            details = "Exception({0})".format(e.__str__())
+        self.__set_finished(command, start_time, details)
+
+        return isinstance(details, dict) and details.get('code') == 0
+
+    def __set_in_progress(self, command, start_time):
+        self.command_dict['commands'][command] = {"status": self.STATUS_IN_PROGRESS, "details": {},
+                                                  "startedat": str(start_time)}
+
+    def __set_finished(self, command, start_time, details):
+        end_time = datetime.datetime.now()
+        self.__times[command] = (start_time, end_time)
+        self.command_dict['commands'][command] = {
+            "status": self.STATUS_FINISHED,
+            "details": details,
+            "startedat": str(start_time),
+            "finishedat": str(end_time),
+            "duration": (end_time - start_time).total_seconds()
+        }
+
+    def __get_critical_path(self, needs):
+        """ from the command finished last, back through the needed command finished last """
+        if not self.__times:
+            return {"commands": [], "duration": 0.000000}
+        path = [max(self.__times, key=lambda command: self.__times.get(command)[1])]
+        while True:
+            needed = [need for need in needs.get(path[0], []) if need in self.__times]
+            if not needed:
+                break
+            path.insert(0, max(needed, key=lambda command: self.__times.get(command)[1]))
+
+        return {
+            "commands": path,
+            "duration": (self.__times.get(path[-1])[1] - self.__times.get(path[0])[0]).total_seconds()
+        }
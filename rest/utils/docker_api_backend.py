@@ -0,0 +1,222 @@
+import http.client
+import json
+import struct
+import time
+
+from rest.utils.docker_backend import DockerBackend
+from rest.utils.docker_engine_client import DockerEngineClient
+
+
+class DockerApiBackend(DockerBackend):
+
+    def __init__(self, socket_path="/var/run/docker.sock"):
+        """Docker operations through the Engine API, on the docker unix socket."""
+        self.client = DockerEngineClient(socket_path=socket_path)
+        # the same text the docker cli prints when the daemon is down, the views check it
+        self.daemon_unreachable = f"Cannot connect to the Docker daemon at unix://{socket_path}. " \
+                                  f"Is the docker daemon running?"
+
+    @staticmethod
+    def result(method, path, out="", err="", code=0):
+        """ the same dict as CmdUtils, so callers don't care about the backend """
+        return {
+            "out": out,
+            "err": err,
+            "code": code,
+            "pid": 0,
+            "args": [method, path]
+        }
+
+    @staticmethod
+    def error_message(status, body):
+        # the same text the docker cli prints, the views check it
+        if status is None:
+            return body
+        message = body.get('message') if isinstance(body, dict) else body
+        return f"Error response from daemon: {message}"
+
+    @staticmethod
+    def running_for(created):
+        seconds = int(time.time() - created)
+        for unit, unit_seconds in [("days", 86400), ("hours", 3600), ("minutes", 60)]:
+            if seconds >= unit_seconds:
+                return f"{seconds // unit_seconds} {unit} ago"
+        return f"{seconds} seconds ago"
+
+    @staticmethod
+    def format_ports(ports):
+        formatted_ports = []
+        for port in ports or []:
+            if port.get('PublicPort'):
+                formatted_ports.append(
+                    f"{port.get('IP', '0.0.0.0')}:{port.get('PublicPort')}->{port.get('PrivatePort')}/{port.get('Type')}")
+            else:
+                formatted_ports.append(f"{port.get('PrivatePort')}/{port.get('Type')}")
+
+        return ", ".join(formatted_ports)
+
+    @staticmethod
+    def normalize_container(container):
+        """ Engine API container -> 'docker ps --format {{json .}}' container """
+        return {
+            "ID": container.get('Id', "")[:12],
+            "Image": container.get('Image', ""),
+            "Command": f"\"{container.get('Command', '')}\"",
+            "RunningFor": DockerApiBackend.running_for(container.get('Created', time.time())),
+            "Status": container.get('Status', ""),
+            "Ports": DockerApiBackend.format_ports(container.get('Ports')),
+            "Names": ",".join([name.lstrip("/") for name in container.get('Names', [])]),
+            "Labels": container.get('Labels') or {},
+            "State": container.get('State', "")
+        }
+
+    @staticmethod
+    def demultiplex(data):
+        """ splits the raw exec stream in stdout and stderr. Frame header: [stream, 0, 0, 0, size(4 bytes)] """
+        streams = {1: b"", 2: b""}
+        offset = 0
+        while offset + 8 <= len(data):
+            stream_type, size = struct.unpack(">BxxxL", data[offset:offset + 8])
+            streams[stream_type if stream_type in streams else 1] += data[offset + 8:offset + 8 + size]
+            offset += 8 + size
+
+        return streams[1].decode("UTF-8", "replace").rstrip(), streams[2].decode("UTF-8", "replace").rstrip()
+
+    def ping(self):
+        path = "/_ping"
+        status, body = self.__request("GET", path)
+        if status != 200:
+            return self.result("GET", path, err=self.error_message(status, body), code=1)
+        return self.result("GET", path, out=body)
+
+    def ps(self, env_id):
+        path = "/containers/json"
+        status, body = self.__request("GET", path, params={"filters": {"name": [env_id]}})
+        if status != 200:
+            return self.result("GET", path, err=self.error_message(status, body), code=1)
+        lines = [self.PS_HEADER] + [self.format_container(self.normalize_container(container)) for container in body]
+
+        return self.result("GET", path, out="\n".join(lines))
+
+    def ps_all(self):
+        status, body = self.__request("GET", "/containers/json")
+        if status != 200:
+            return []
+        return [self.normalize_container(container) for container in body]
+
+    def pull(self, image):
+        path = "/images/create"
+        params = {"fromImage": image}
+        if "@" not in image and ":" in image.split("/")[-1]:
+            params["fromImage"], params["tag"] = image.rsplit(":", 1)
+        status, data = self.__request("POST", path, params=params, raw=True)
+        if status != 200:
+            error = data if status is None else data.decode("UTF-8", "replace")
+            return self.result("POST", path, err=self.error_message(status, error), code=1)
+
+        # the daemon streams the progress as json objects, an error can come after the 200 status.
+        # the layer progress has an id, keep only the summary lines (Digest, Status)
+        messages = []
+        for line in data.decode("UTF-8", "replace").split("\n"):
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get('error'):
+                return self.result("POST", path, out="\n".join(messages), err=message.get('error'), code=1)
+            if message.get('status') and not message.get('id'):
+                messages.append(message.get('status'))
+
+        return self.result("POST", path, out="\n".join(messages))
+
+    def ps_project(self, project):
+        status, body = self.__request("GET", "/containers/json", params={
+            "all": 1,
+            "filters": {"label": [f"{self.COMPOSE_PROJECT_LABEL}={project}"]}
+        })
+        if status != 200:
+            return []
+        return [self.normalize_container(container) for container in body]
+
+    def exec(self, container_id, command):
+        return self.__exec(container_id, command, detach=False)
+
+    def exec_detached(self, container_id, command):
+        return self.__exec(container_id, command, detach=True)
+
+    def network_ls(self, name):
+        path = "/networks"
+        status, body = self.__request("GET", path, params={"filters": {"name": [name]}})
+        if status != 200:
+            return self.result("GET", path, err=self.error_message(status, body), code=1)
+        lines = [self.NETWORK_LS_HEADER] + [
+            "   ".join([network.get('Id', "")[:12], network.get('Name', ""), network.get('Driver', ""),
+                        network.get('Scope', "")]) for network in body]
+
+        return self.result("GET", path, out="\n".join(lines))
+
+    def network_connect(self, deployer_net, container):
+        return self.__post(f"/networks/{deployer_net}/connect", {"Container": container})
+
+    def network_disconnect(self, deployer_net, container):
+        return self.__post(f"/networks/{deployer_net}/disconnect", {"Container": container})
+
+    def network_prune(self):
+        path = "/networks/prune"
+        status, body = self.__request("POST", path)
+        if status != 200:
+            return self.result("POST", path, err=self.error_message(status, body), code=1)
+        deleted = body.get('NetworksDeleted') or []
+
+        return self.result("POST", path, out="\n".join(["Deleted Networks:"] + deleted) if deleted else "")
+
+    def volume_prune(self):
+        path = "/volumes/prune"
+        status, body = self.__request("POST", path)
+        if status != 200:
+            return self.result("POST", path, err=self.error_message(status, body), code=1)
+        deleted = body.get('VolumesDeleted') or []
+        out = "\n".join(["Deleted Volumes:"] + deleted) if deleted else ""
+
+        return self.result("POST", path, out=f"{out}\n\nTotal reclaimed space: {body.get('SpaceReclaimed', 0)}B")
+
+    def __request(self, method, path, body=None, params=None, raw=False):
+        """ (None, error) if the daemon can't be reached """
+        try:
+            if raw:
+                return self.client.request_raw(method, path, body, params)
+            return self.client.request(method, path, body, params)
+        except (http.client.HTTPException, OSError) as e:
+            return None, f"{self.daemon_unreachable} ({e.__str__()})"
+
+    def __post(self, path, body):
+        status, response_body = self.__request("POST", path, body=body)
+        if status is None or status >= 400:
+            return self.result("POST", path, err=self.error_message(status, response_body), code=1)
+        return self.result("POST", path)
+
+    def __exec(self, container_id, command, detach):
+        path = f"/containers/{container_id}/exec"
+        status, body = self.__request("POST", path, body={
+            "AttachStdout": not detach,
+            "AttachStderr": not detach,
+            "Cmd": command
+        })
+        if status != 201:
+            return self.result("POST", path, err=self.error_message(status, body), code=1)
+
+        exec_id = body.get('Id')
+        path = f"/exec/{exec_id}/start"
+        status, data = self.__request("POST", path, body={"Detach": detach, "Tty": False}, raw=True)
+        if status != 200:
+            error = data if status is None else data.decode("UTF-8", "replace")
+            return self.result("POST", path, err=self.error_message(status, error), code=1)
+        if detach:
+            return self.result("POST", path)
+
+        out, err = self.demultiplex(data)
+        status, body = self.__request("GET", f"/exec/{exec_id}/json")
+        result = self.result("POST", path, out=out, err=err, code=body.get('ExitCode') if status == 200 else 1)
+        result['pid'] = body.get('Pid', 0) if status == 200 else 0
+
+        return result
@@ -0,0 +1,69 @@
+from abc import abstractmethod, ABC
+
+
+class DockerBackend(ABC):
+    """
+    The docker operations used by the deployer.
+    Every method returns the same dict as CmdUtils: out, err, code, pid, args.
+    The exceptions are ps_all and ps_project, which return a list of containers
+    in the 'docker ps --format {{json .}}' format.
+    """
+    PS_HEADER = "CONTAINER ID   IMAGE   COMMAND   CREATED   STATUS   PORTS   NAMES"
+    NETWORK_LS_HEADER = "NETWORK ID   NAME   DRIVER   SCOPE"
+    COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+    COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+
+    @staticmethod
+    def format_container(container):
+        """ same columns as the 'docker ps' table, without the header """
+        return "   ".join([container.get('ID', ""), container.get('Image', ""), container.get('Command', ""),
+                            container.get('RunningFor', ""), container.get('Status', ""),
+                            container.get('Ports', ""), container.get('Names', "")])
+
+    @abstractmethod
+    def ping(self):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def ps(self, env_id):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def ps_all(self):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def ps_project(self, project):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def pull(self, image):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def exec(self, container_id, command):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def exec_detached(self, container_id, command):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def network_ls(self, name):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def network_connect(self, deployer_net, container):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def network_disconnect(self, deployer_net, container):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def network_prune(self):
+        raise NotImplementedError("You must implement this method")
+
+    @abstractmethod
+    def volume_prune(self):
+        raise NotImplementedError("You must implement this method")
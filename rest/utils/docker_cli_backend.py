@@ -0,0 +1,83 @@
+import json
+
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.docker_backend import DockerBackend
+
+
+class DockerCliBackend(DockerBackend):
+
+    @staticmethod
+    def parse_labels(labels):
+        """ 'k1=v1,k2=v2' -> {k1: v1, k2: v2} """
+        if isinstance(labels, dict):
+            return labels
+        parsed_labels = {}
+        for label in (labels or "").split(","):
+            if "=" in label:
+                key, value = label.split("=", 1)
+                parsed_labels[key] = value
+
+        return parsed_labels
+
+    def ping(self):
+        # lighter than 'docker ps', it only asks the daemon for its version
+        return CmdUtils.run_cmd_shell_false(["docker", "version", "--format", "{{.Server.Version}}"],
+                                            operation=CmdUtils.OPERATION_QUERY)
+
+    def ps(self, env_id):
+        return CmdUtils.run_cmd_shell_false(["docker", "ps", "--filter", f"name={env_id}"],
+                                            operation=CmdUtils.OPERATION_QUERY)
+
+    def ps_all(self):
+        return self.__ps(["docker", "ps", "--format", "{{json .}}"])
+
+    def ps_project(self, project):
+        """ the containers of a compose project, the stopped ones too """
+        return self.__ps(["docker", "ps", "-a", "--filter", f"label={self.COMPOSE_PROJECT_LABEL}={project}",
+                          "--format", "{{json .}}"])
+
+    def __ps(self, command):
+        status = CmdUtils.run_cmd_shell_false(command, operation=CmdUtils.OPERATION_QUERY)
+        containers = []
+        for line in status.get('out').split("\n"):
+            try:
+                container = json.loads(line)
+            except ValueError:
+                continue
+            container['Labels'] = self.parse_labels(container.get('Labels'))
+            containers.append(container)
+
+        return containers
+
+    def pull(self, image):
+        return CmdUtils.run_cmd_shell_false(["docker", "pull", image], operation=CmdUtils.OPERATION_DEPLOY)
+
+    def exec(self, container_id, command):
+        container_exec_cmd = ["docker", "exec", f"{container_id}"]
+        container_exec_cmd.extend(command)
+        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+
+    def exec_detached(self, container_id, command):
+        container_exec_cmd = ["docker", "exec", "-d", f"{container_id}"]
+        container_exec_cmd.extend(command)
+        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+
+    def network_ls(self, name):
+        return CmdUtils.run_cmd_shell_false(["docker", "network", "ls", "--filter", f"name={name}"],
+                                            operation=CmdUtils.OPERATION_QUERY)
+
+    def network_connect(self, deployer_net, container):
+        container_exec_cmd = ["docker", "network", "connect", f"{deployer_net}", f"{container}"]
+        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+
+    def network_disconnect(self, deployer_net, container):
+        container_exec_cmd = ["docker", "network", "disconnect", f"{deployer_net}", f"{container}"]
+        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+
+    def network_prune(self):
+        container_exec_cmd = ["docker", "network", "prune", "-f"]
+        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+
+    def volume_prune(self):
+        container_exec_cmd = ["docker", "volume", "prune", "-f"]
+        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
@@ -0,0 +1,101 @@
+import http.client
+import json
+import queue
+import select
+import socket
+from urllib.parse import quote
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, socket_path, timeout=60):
+        """Http connection over a unix socket."""
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerEngineClient:
+    # sent again on a broken reused connection. A POST may have been applied by the daemon before the failure
+    RETRY_METHODS = ("GET", "HEAD")
+
+    def __init__(self, socket_path="/var/run/docker.sock", pool_size=10, timeout=60):
+        """Docker Engine API client. The keep-alive connections are pooled and reused between calls."""
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.__pool = queue.LifoQueue(maxsize=pool_size)
+
+    @staticmethod
+    def query(params):
+        """ {k: v} -> ?k=v. Dict and list values are sent as json, e.g. the filters """
+        if not params:
+            return ""
+        return "?" + "&".join(
+            f"{key}={quote(json.dumps(value) if isinstance(value, (dict, list)) else str(value))}" for key, value in
+            params.items())
+
+    def request(self, method, path, body=None, params=None):
+        """ returns (status, json body or text) """
+        status, data = self.request_raw(method, path, body, params)
+        try:
+            return status, json.loads(data.decode("UTF-8", "replace")) if data else None
+        except ValueError:
+            return status, data.decode("UTF-8", "replace")
+
+    def request_raw(self, method, path, body=None, params=None):
+        """
+        returns (status, bytes). On a pooled connection closed by the daemon the request is sent again if it failed
+        while sending, or if the method is in RETRY_METHODS. Once the request is sent, any other method is not
+        """
+        url = path + self.query(params)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"}
+
+        while True:
+            connection, reused = self.__get_connection()
+            sent = False
+            try:
+                connection.request(method, url, body=payload, headers=headers)
+                sent = True
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                if reused and (not sent or method.upper() in self.RETRY_METHODS):
+                    continue
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self.__release_connection(connection)
+
+            return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self.__pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def __get_connection(self):
+        while True:
+            try:
+                connection = self.__pool.get_nowait()
+            except queue.Empty:
+                return UnixHTTPConnection(self.socket_path, timeout=self.timeout), False
+            # an idle keep-alive connection has nothing to read, readable is closed by the daemon
+            if connection.sock is not None and not select.select([connection.sock], [], [], 0)[0]:
+                return connection, True
+            connection.close()
+
+    def __release_connection(self, connection):
+        try:
+            self.__pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
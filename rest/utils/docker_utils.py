@@ -1,6 +1,7 @@
 import datetime
 import errno
 import os
+import re
 import shutil
 from pathlib import Path
 
@@ -8,86 +9,190 @@ from rest.api.constants.env_constants import EnvConstants
 from rest.api.constants.env_init import EnvInit
 from rest.api.loghelpers.message_dumper import MessageDumper
 from rest.api.responsehelpers.active_deployments_response import ActiveDeployment
+from rest.environment.cmd_engine import CmdEngineSingleton
+from rest.environment.deployment_state import DeploymentStateSingleton
 from rest.utils.cmd_utils import CmdUtils
+from rest.utils.docker_api_backend import DockerApiBackend
+from rest.utils.docker_backend import DockerBackend
+from rest.utils.docker_cli_backend import DockerCliBackend
 from rest.utils.env_creation import EnvCreation
 from rest.utils.io_utils import IOUtils
 
 
 class DockerUtils(EnvCreation):
+    COMPOSE_PROJECT_LABEL = DockerBackend.COMPOSE_PROJECT_LABEL
+    # 'cli' forks the docker client, 'api' talks http to the docker socket
+    backend = DockerApiBackend(EnvInit.init.get(EnvConstants.DOCKER_SOCK)) \
+        if EnvInit.init.get(EnvConstants.DOCKER_BACKEND) == "api" else DockerCliBackend()
 
     @staticmethod
     def up(file):
         file_path = Path(file)
         if not file_path.is_file():
             raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
-        return CmdUtils.run_cmd_shell_false(["docker-compose", "pull", "&&", "docker-compose", "-f", file, "up", "-d"])
+        return CmdUtils.run_cmd_shell_false(["docker-compose", "pull", "&&", "docker-compose", "-f", file, "up", "-d"],
+                                            operation=CmdUtils.OPERATION_DEPLOY)
+
+    @staticmethod
+    def create(file):
+        file_path = Path(file)
+        if not file_path.is_file():
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
+        return CmdUtils.run_cmd_shell_false(["docker-compose", "-f", file, "up", "--no-start"],
+                                            operation=CmdUtils.OPERATION_DEPLOY)
+
+    @staticmethod
+    def recreate(file, services, remove_orphans=False, deployed_file=None):
+        """
+        recreates only the services given, their dependencies are left alone.
+        With deployed_file, file is the new compose file next to it: it replaces deployed_file only if the recreate
+        succeeded. The compose file deployed stays the one the containers run
+        """
+        file_path = Path(file)
+        if not file_path.is_file():
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
+        command = ["docker-compose", "-f", file, "up", "-d", "--no-deps"]
+        if remove_orphans:
+            command.append("--remove-orphans")
+        command.extend(services)
+        status = CmdUtils.run_cmd_shell_false(command, operation=CmdUtils.OPERATION_DEPLOY)
+        if deployed_file is not None and status.get('code') == 0:
+            os.replace(file, deployed_file)
+
+        return status
 
     @staticmethod
     def down(file):
+        return CmdEngineSingleton.get_instance().run(DockerUtils.down_async(file))
+
+    @staticmethod
+    def down_async(file):
         file_path = Path(file)
         if not file_path.is_file():
             raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
-        return CmdUtils.run_cmd_shell_false(["docker-compose", "-f", file, "down", "-v"])
+        return CmdUtils.run_cmd_async(["docker-compose", "-f", file, "down", "-v"],
+                                      operation=CmdUtils.OPERATION_TEARDOWN)
 
     @staticmethod
     def start(file):
         file_path = Path(file)
         if not file_path.is_file():
             raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
-        return CmdUtils.run_cmd_shell_false(["docker-compose", "-f", file, "start"])
+        return CmdUtils.run_cmd_shell_false(["docker-compose", "-f", file, "start"],
+                                            operation=CmdUtils.OPERATION_DEPLOY)
 
     @staticmethod
     def stop(file):
         file_path = Path(file)
         if not file_path.is_file():
             raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
-        return CmdUtils.run_cmd_shell_false(["docker-compose", "-f", file, "stop"])
+        return CmdUtils.run_cmd_shell_false(["docker-compose", "-f", file, "stop"],
+                                            operation=CmdUtils.OPERATION_TEARDOWN)
 
     @staticmethod
-    def logs(file):
-        docker_logs_lines = 5000
+    def logs(file, tail=5000, services=None):
         file_path = Path(file)
         if not file_path.is_file():
             raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
         return CmdUtils.run_cmd_shell_false(
-            ["docker-compose", "-f", file, "logs", "-t", "--tail=" + str(docker_logs_lines)])
+            ["docker-compose", "-f", file, "logs", "-t", "--tail=" + str(tail)] + (services or []),
+            operation=CmdUtils.OPERATION_QUERY)
+
+    @staticmethod
+    def logs_follow(file, tail=100, services=None):
+        """ the caller reads the log lines as they come and must terminate the process """
+        file_path = Path(file)
+        if not file_path.is_file():
+            raise OSError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
+        return CmdUtils.run_cmd_streamed(
+            ["docker-compose", "-f", file, "logs", "-t", "--no-color", "--follow", "--tail=" + str(tail)] +
+            (services or []), file_path.parent.name)
+
+    @staticmethod
+    def ping():
+        return DockerUtils.backend.ping()
 
     @staticmethod
     def ps(env_id):
         env_id = env_id.lower()
-        return CmdUtils.run_cmd_shell_false(["docker", "ps", "--filter", f"name={env_id}"])
+        return DockerUtils.backend.ps(env_id)
+
+    @staticmethod
+    def ps_all():
+        """ all running containers in one call, as a list of dicts """
+        return DockerUtils.backend.ps_all()
+
+    @staticmethod
+    def ps_project(env_id):
+        return DockerUtils.backend.ps_project(DockerUtils.get_compose_project_name(env_id))
+
+    @staticmethod
+    def get_compose_project_name(env_id):
+        """ docker-compose derives the project name from the folder name """
+        return re.sub(r'[^-_a-z0-9]', '', env_id.lower())
+
+    @staticmethod
+    def group_by_deployment(env_list, containers):
+        grouped_containers = {}
+        for container in containers:
+            project = container.get('Labels').get(DockerUtils.COMPOSE_PROJECT_LABEL)
+            grouped_containers.setdefault(project, []).append(container)
+
+        deployments = {}
+        for item in env_list:
+            project_containers = grouped_containers.get(DockerUtils.get_compose_project_name(item))
+            if not project_containers:
+                # containers not started by compose are matched by name, like 'docker ps --filter name=<id>'
+                project_containers = [container for container in grouped_containers.get(None, [])
+                                      if item in container.get('Names', "")]
+            if project_containers:
+                deployments[item] = [DockerBackend.format_container(container) for container in project_containers]
+
+        return deployments
+
+    @staticmethod
+    def get_containers():
+        """ from the deployment state cache while the docker event stream is live """
+        state = DeploymentStateSingleton.get_instance()
+        if state.is_live():
+            return state.get_containers()
+        return DockerUtils.ps_all()
+
+    @staticmethod
+    def get_deployment_containers(env_id):
+        return DockerUtils.group_by_deployment([env_id], DockerUtils.get_containers()).get(env_id, [])
+
+    @staticmethod
+    def pull_image(image):
+        return DockerUtils.backend.pull(image)
 
     @staticmethod
     def exec(container_id, command):
-        container_exec_cmd = ["docker", "exec", f"{container_id}"]
-        container_exec_cmd.extend(command)
-        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+        return DockerUtils.backend.exec(container_id, command)
+
+    @staticmethod
+    def network_ls(name):
+        return DockerUtils.backend.network_ls(name)
 
     @staticmethod
     def network_prune():
-        container_exec_cmd = ["docker", "network", "prune", "-f"]
-        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+        return DockerUtils.backend.network_prune()
 
     @staticmethod
     def network_connect(deployer_net, container):
-        container_exec_cmd = ["docker", "network", "connect", f"{deployer_net}", f"{container}"]
-        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+        return DockerUtils.backend.network_connect(deployer_net, container)
 
     @staticmethod
     def network_disconnect(deployer_net, container):
-        container_exec_cmd = ["docker", "network", "disconnect", f"{deployer_net}", f"{container}"]
-        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+        return DockerUtils.backend.network_disconnect(deployer_net, container)
 
     @staticmethod
     def volume_prune():
-        container_exec_cmd = ["docker", "volume", "prune", "-f"]
-        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+        return DockerUtils.backend.volume_prune()
 
     @staticmethod
     def exec_detached(container_id, command):
-        container_exec_cmd = ["docker", "exec", "-d", f"{container_id}"]
-        container_exec_cmd.extend(command)
-        return CmdUtils.run_cmd_shell_false(container_exec_cmd)
+        return DockerUtils.backend.exec_detached(container_id, command)
 
     @staticmethod
     def clean_up():
@@ -96,16 +201,44 @@ class DockerUtils(EnvCreation):
 
     @staticmethod
     def get_active_deployments():
-        active_deployments = []
         env_list = [folder.lower() for folder in IOUtils.get_list_dir(f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}")]
-        for item in env_list:
-            container_list = DockerUtils.ps(item).get('out').split("\n")[1:]
-            for container in container_list:
-                if item in container:
-                    active_deployments.append(ActiveDeployment.docker_deployment(item.strip(), container_list))
-                    break
+        if not env_list:
+            return []
+        deployments = DockerUtils.group_by_deployment(env_list, DockerUtils.get_containers())
+
+        return [ActiveDeployment.docker_deployment(item.strip(), deployments.get(item)) for item in env_list if
+                item in deployments]
 
-        return active_deployments
+    @staticmethod
+    def down_deployment(env_id):
+        return CmdEngineSingleton.get_instance().run(DockerUtils.down_deployment_async(env_id))
+
+    @staticmethod
+    async def down_deployment_async(env_id):
+        start_time = datetime.datetime.now()
+        try:
+            status = await DockerUtils.down_async(
+                f"{EnvInit.init.get(EnvConstants.DEPLOY_PATH)}/{env_id}/docker-compose.yml")
+        except Exception as e:
+            status = {"out": "", "err": e.__str__(), "code": None}
+        end_time = datetime.datetime.now()
+
+        return {
+            "id": env_id,
+            "code": status.get('code'),
+            "out": status.get('out'),
+            "err": status.get('err'),
+            "duration": (end_time - start_time).total_seconds()
+        }
+
+    @staticmethod
+    def down_deployments(env_ids, max_workers=4):
+        """
+        'docker-compose down' for every deployment, concurrently on the engine loop, at most max_workers at a time.
+        The results keep the env_ids order
+        """
+        return CmdEngineSingleton.get_instance().gather(
+            [DockerUtils.down_deployment_async(env_id) for env_id in env_ids], max_workers)
 
     @staticmethod
     def folder_clean_up(path=EnvInit.init.get(EnvConstants.DEPLOY_PATH), delete_period=60):
@@ -1,7 +1,42 @@
+import threading
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
 from rest.api.constants.env_constants import EnvConstants
 from rest.environment.environment import EnvironmentSingleton
 
 
+class StartupConfig(NamedTuple):
+    """ the config env vars, parsed. Read only, replaced as a whole on reload """
+    APP_APPEND_LABEL: str
+    ENV_EXPIRE_IN: int
+    SCHEDULER_POLL_INTERVAL: int
+    APP_IP_PORT: Optional[str]
+    PORT: int
+    EUREKA_SERVER: Optional[str]
+    FLUENTD_IP_PORT: Optional[str]
+    HTTP_AUTH_TOKEN: str
+    HTTPS_ENABLE: bool
+    HTTPS_CERT: str
+    HTTPS_KEY: str
+    DOCKER_HEALTH_POLL_INTERVAL: int
+    DOCKER_HEALTH_TTL: int
+    DEPLOY_WORKERS: int
+    IMAGE_PULL_TTL: int
+    IMAGE_PULL_WORKERS: int
+    TEARDOWN_WORKERS: int
+    POOL_POLL_INTERVAL: int
+    CMD_TIMEOUT: int
+    CMD_TIMEOUTS: Mapping[str, int]
+    PROCESS_RETENTION: int
+    PROCESS_REAP_INTERVAL: int
+    CONFIG_POLL_INTERVAL: int
+    COMMAND_WORKERS: int
+    COMMAND_RUN_TTL: int
+    COMMAND_CONCURRENCY: int
+    VARS_CACHE_SIZE: int
+
+
 class EnvStartupSingleton:
     __instance = None
     __env = EnvironmentSingleton.get_instance()
@@ -13,44 +48,112 @@ class EnvStartupSingleton:
         return EnvStartupSingleton.__instance
 
     def __init__(self):
+        """
+        The constructor. This class parses the config env vars once, into a read only StartupConfig.
+        They are parsed again on reload: on SIGHUP or when environment.properties changes.
+        The system env vars win over the ones from environment.properties.
+        """
+        self.__lock = threading.RLock()
+        self.__mtime = self.__env.get_properties_mtime()
+        self.__config = self.__parse({**self.__env.get_properties(), **self.__env.get_env()})
+        self.__config_env_vars = dict(self.__config._asdict())
+
         if EnvStartupSingleton.__instance is not None:
             raise Exception("This class is a singleton!")
         else:
             EnvStartupSingleton.__instance = self
 
+    def get_config(self):
+        return self.__config
+
     def get_config_env_vars(self):
-        return {
-            EnvConstants.APP_APPEND_LABEL: self.__env.get_env().get(
-                EnvConstants.APP_APPEND_LABEL).lower() if self.__env.get_env().get(
+        """ the config as a dict, shared by all the callers. Prefer the attributes of get_config """
+        return self.__config_env_vars
+
+    def reload(self):
+        """
+        loads environment.properties again and parses the config. Returns the names of the changed values.
+        On an invalid value raises ValueError, nothing is applied: the env, the config and the mtime stay as they were
+        """
+        with self.__lock:
+            mtime = self.__env.get_properties_mtime()
+            properties = self.__env.read_properties()
+            config = self.__parse({**properties, **self.__env.get_env()})
+            self.__env.load_properties(properties)
+            self.__mtime = mtime
+            changed = [key for key in config._fields if getattr(config, key) != getattr(self.__config, key)]
+            self.__config_env_vars = dict(config._asdict())
+            self.__config = config
+
+        return changed
+
+    def reload_if_changed(self):
+        """ reloads if environment.properties was modified, created or deleted since the last load """
+        if self.__env.get_properties_mtime() == self.__mtime:
+            return []
+
+        return self.reload()
+
+    @staticmethod
+    def __int(env, key, default):
+        """ the default if the env var is not set or empty """
+        if env.get(key) is None or env.get(key).strip() == "":
+            return default
+        try:
+            return int(env.get(key).strip())
+        except ValueError:
+            raise ValueError(f"Invalid config {key}='{env.get(key)}', expected an integer")
+
+    @staticmethod
+    def __timeouts(env, key):
+        """ 'deploy=1800,query=60' as a read only {operation class: seconds} """
+        timeouts = {}
+        for item in (env.get(key) or "").split(","):
+            if item.strip() == "":
+                continue
+            operation, _, seconds = item.partition("=")
+            if operation.strip() == "" or not seconds.strip().isdigit():
+                raise ValueError(f"Invalid config {key}='{env.get(key)}', expected comma separated "
+                                 f"class=seconds items, e.g. deploy=1800,query=60")
+            timeouts[operation.strip()] = int(seconds.strip())
+
+        return MappingProxyType(timeouts)
+
+    @staticmethod
+    def __parse(env):
+        return StartupConfig(
+            APP_APPEND_LABEL=env.get(EnvConstants.APP_APPEND_LABEL).lower() if env.get(
                 EnvConstants.APP_APPEND_LABEL) else "",
-            EnvConstants.ENV_EXPIRE_IN: int(self.__env.get_env().get(
-                EnvConstants.ENV_EXPIRE_IN)) if self.__env.get_env().get(
-                EnvConstants.ENV_EXPIRE_IN) else 1440,
-            EnvConstants.SCHEDULER_POLL_INTERVAL: int(self.__env.get_env().get(
-                EnvConstants.SCHEDULER_POLL_INTERVAL)) if self.__env.get_env().get(
-                EnvConstants.SCHEDULER_POLL_INTERVAL) else 1200,
-            EnvConstants.APP_IP_PORT: self.__env.get_env().get(
-                EnvConstants.APP_IP_PORT).strip().lower() if self.__env.get_env().get(
+            ENV_EXPIRE_IN=EnvStartupSingleton.__int(env, EnvConstants.ENV_EXPIRE_IN, 1440),
+            SCHEDULER_POLL_INTERVAL=EnvStartupSingleton.__int(env, EnvConstants.SCHEDULER_POLL_INTERVAL, 1200),
+            APP_IP_PORT=env.get(EnvConstants.APP_IP_PORT).strip().lower() if env.get(
                 EnvConstants.APP_IP_PORT) else None,
-            EnvConstants.PORT: int(self.__env.get_env().get(
-                EnvConstants.PORT).strip()) if self.__env.get_env().get(
-                EnvConstants.PORT) is not None else 8080,
-            EnvConstants.EUREKA_SERVER: self.__env.get_env().get(
-                EnvConstants.EUREKA_SERVER).strip() if self.__env.get_env().get(
+            PORT=EnvStartupSingleton.__int(env, EnvConstants.PORT, 8080),
+            EUREKA_SERVER=env.get(EnvConstants.EUREKA_SERVER).strip() if env.get(
                 EnvConstants.EUREKA_SERVER) else None,
-            EnvConstants.FLUENTD_IP_PORT: self.__env.get_env().get(
-                EnvConstants.FLUENTD_IP_PORT).strip() if self.__env.get_env().get(
+            FLUENTD_IP_PORT=env.get(EnvConstants.FLUENTD_IP_PORT).strip() if env.get(
                 EnvConstants.FLUENTD_IP_PORT) else None,
-            EnvConstants.HTTP_AUTH_TOKEN: self.__env.get_env().get(
-                EnvConstants.HTTP_AUTH_TOKEN).strip() if self.__env.get_env().get(
+            HTTP_AUTH_TOKEN=env.get(EnvConstants.HTTP_AUTH_TOKEN).strip() if env.get(
                 EnvConstants.HTTP_AUTH_TOKEN) else "None",
-            EnvConstants.HTTPS_ENABLE: bool(self.__env.get_env().get(
-                EnvConstants.HTTPS_ENABLE).strip()) if self.__env.get_env().get(
+            HTTPS_ENABLE=bool(env.get(EnvConstants.HTTPS_ENABLE).strip()) if env.get(
                 EnvConstants.HTTPS_ENABLE) else False,
-            EnvConstants.HTTPS_CERT: self.__env.get_env().get(
-                EnvConstants.HTTPS_CERT).strip() if self.__env.get_env().get(
+            HTTPS_CERT=env.get(EnvConstants.HTTPS_CERT).strip() if env.get(
                 EnvConstants.HTTPS_CERT) else "https/cert.pem",
-            EnvConstants.HTTPS_KEY: self.__env.get_env().get(
-                EnvConstants.HTTPS_KEY).strip() if self.__env.get_env().get(
-                EnvConstants.HTTPS_KEY) else "https/key.pem"
-        }
+            HTTPS_KEY=env.get(EnvConstants.HTTPS_KEY).strip() if env.get(EnvConstants.HTTPS_KEY) else "https/key.pem",
+            DOCKER_HEALTH_POLL_INTERVAL=EnvStartupSingleton.__int(env, EnvConstants.DOCKER_HEALTH_POLL_INTERVAL, 5),
+            DOCKER_HEALTH_TTL=EnvStartupSingleton.__int(env, EnvConstants.DOCKER_HEALTH_TTL, 10),
+            DEPLOY_WORKERS=EnvStartupSingleton.__int(env, EnvConstants.DEPLOY_WORKERS, 4),
+            IMAGE_PULL_TTL=EnvStartupSingleton.__int(env, EnvConstants.IMAGE_PULL_TTL, 60),
+            IMAGE_PULL_WORKERS=EnvStartupSingleton.__int(env, EnvConstants.IMAGE_PULL_WORKERS, 4),
+            TEARDOWN_WORKERS=EnvStartupSingleton.__int(env, EnvConstants.TEARDOWN_WORKERS, 4),
+            POOL_POLL_INTERVAL=EnvStartupSingleton.__int(env, EnvConstants.POOL_POLL_INTERVAL, 30),
+            CMD_TIMEOUT=EnvStartupSingleton.__int(env, EnvConstants.CMD_TIMEOUT, 600),
+            CMD_TIMEOUTS=EnvStartupSingleton.__timeouts(env, EnvConstants.CMD_TIMEOUTS),
+            PROCESS_RETENTION=EnvStartupSingleton.__int(env, EnvConstants.PROCESS_RETENTION, 3600),
+            PROCESS_REAP_INTERVAL=EnvStartupSingleton.__int(env, EnvConstants.PROCESS_REAP_INTERVAL, 5),
+            CONFIG_POLL_INTERVAL=EnvStartupSingleton.__int(env, EnvConstants.CONFIG_POLL_INTERVAL, 10),
+            COMMAND_WORKERS=EnvStartupSingleton.__int(env, EnvConstants.COMMAND_WORKERS, 4),
+            COMMAND_RUN_TTL=EnvStartupSingleton.__int(env, EnvConstants.COMMAND_RUN_TTL, 3600),
+            COMMAND_CONCURRENCY=EnvStartupSingleton.__int(env, EnvConstants.COMMAND_CONCURRENCY, 8),
+            VARS_CACHE_SIZE=EnvStartupSingleton.__int(env, EnvConstants.VARS_CACHE_SIZE, 64)
+        )
@@ -5,6 +5,7 @@ from pathlib import Path
 
 from rest.api.loghelpers.message_dumper import MessageDumper
 from rest.api.responsehelpers.active_deployments_response import ActiveDeployment
+from rest.environment.cmd_engine import CmdEngineSingleton
 from rest.utils.cmd_utils import CmdUtils
 from rest.utils.env_creation import EnvCreation
 
@@ -16,23 +17,35 @@ class KubectlUtils(EnvCreation):
         file_path = Path(file)
         if not file_path.is_file():
             raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), file_path)
-        return CmdUtils.run_cmd_shell_false(["kubectl", "apply", "-f", file, "--insecure-skip-tls-verify"])
+        return CmdUtils.run_cmd_shell_false(["kubectl", "apply", "-f", file, "--insecure-skip-tls-verify"],
+                                            operation=CmdUtils.OPERATION_DEPLOY)
 
     @staticmethod
     def down(deployment, namespace):
         return CmdUtils.run_cmd_shell_false(
-            ["kubectl", "-n", namespace, "delete", "deployment", deployment, "--insecure-skip-tls-verify"])
+            ["kubectl", "-n", namespace, "delete", "deployment", deployment, "--insecure-skip-tls-verify"],
+            operation=CmdUtils.OPERATION_TEARDOWN)
 
     @staticmethod
     def logs(pod, namespace):
         return CmdUtils.run_cmd_shell_false(
-            ["kubectl", "-n", namespace, "logs", pod, "--insecure-skip-tls-verify"])
+            ["kubectl", "-n", namespace, "logs", pod, "--insecure-skip-tls-verify"], operation=CmdUtils.OPERATION_QUERY)
 
     @staticmethod
     def get_active_pods(label_selector, namespace):
+        """ namespace can be a comma separated list, the namespaces are listed concurrently """
+        namespaces = [item.strip() for item in namespace.split(",") if item.strip()]
+        active_pods = CmdEngineSingleton.get_instance().gather(
+            [KubectlUtils.get_active_pods_async(label_selector, item) for item in namespaces])
+
+        return [pod for namespace_pods in active_pods for pod in namespace_pods]
+
+    @staticmethod
+    async def get_active_pods_async(label_selector, namespace):
         active_pods = []
-        status = CmdUtils.run_cmd_shell_false(
-            ["kubectl", "get", "pods", "-n", namespace, "-l", label_selector, "--insecure-skip-tls-verify"])
+        status = await CmdUtils.run_cmd_async(
+            ["kubectl", "get", "pods", "-n", namespace, "-l", label_selector, "--insecure-skip-tls-verify"],
+            operation=CmdUtils.OPERATION_QUERY)
         active_pods_list = status.get('out').split('\n')[1:]
         for i in range(0, len(active_pods_list)):
             active_pods_list[i] = ' '.join(active_pods_list[i].split())
@@ -45,7 +58,8 @@ class KubectlUtils(EnvCreation):
     def get_active_deployments():
         active_deployments = []
         status = CmdUtils.run_cmd_shell_false(
-            ["kubectl", "get", "deployments", "--all-namespaces", "--insecure-skip-tls-verify"])
+            ["kubectl", "get", "deployments", "--all-namespaces", "--insecure-skip-tls-verify"],
+            operation=CmdUtils.OPERATION_QUERY)
         active_deployments_list = status.get('out').split('\n')[1:]
         for i in range(0, len(active_deployments_list)):
             active_deployments_list[i] = ' '.join(active_deployments_list[i].split())
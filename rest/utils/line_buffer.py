@@ -0,0 +1,63 @@
+from collections import deque
+
+
+class LineBuffer:
+    MAX_LINE_BYTES = 65536
+
+    def __init__(self, head=0, tail=1000):
+        """
+        Keeps the first head lines and the last tail lines of an output fed in chunks, counting what it sees.
+        The memory used does not depend on the output size: the lines in between are dropped
+        and the lines longer than MAX_LINE_BYTES are cut.
+        """
+        self.head = head
+        self.tail = tail
+        self.bytes = 0
+        self.lines = 0
+        self.__head_lines = []
+        self.__tail_lines = deque(maxlen=tail)
+        self.__partial = bytearray()
+
+    def feed(self, chunk):
+        self.bytes += len(chunk)
+        parts = chunk.split(b"\n")
+        for part in parts[:-1]:
+            self.__append_partial(part)
+            self.__add_line(bytes(self.__partial))
+            self.__partial.clear()
+        self.__append_partial(parts[-1])
+
+    def close(self):
+        """ the last line may have no line ending """
+        if self.__partial:
+            self.__add_line(bytes(self.__partial))
+            self.__partial.clear()
+
+    def get_dropped(self):
+        return self.lines - len(self.__head_lines) - len(self.__tail_lines)
+
+    def get_text(self):
+        dropped = [f"... {self.get_dropped()} lines dropped ...".encode()] if self.head > 0 and self.get_dropped() \
+            else []
+        lines = self.__head_lines + dropped + list(self.__tail_lines)
+
+        return "\n".join([line.decode("UTF-8", "replace") for line in lines]).rstrip()
+
+    def get_stats(self):
+        return {
+            "bytes": self.bytes,
+            "lines": self.lines,
+            "dropped": self.get_dropped()
+        }
+
+    def __append_partial(self, data):
+        room = self.MAX_LINE_BYTES - len(self.__partial)
+        if room > 0:
+            self.__partial += data[:room]
+
+    def __add_line(self, line):
+        self.lines += 1
+        if len(self.__head_lines) < self.head:
+            self.__head_lines.append(line)
+        else:
+            self.__tail_lines.append(line)
@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 
+import jinja2
 import yaml
 
 from rest.api.jinja2.render import Render
@@ -9,6 +15,17 @@ from rest.api.jinja2.render import Render
 
 class RenderTestCase(unittest.TestCase):
 
+    def setUp(self):
+        self.bytecode_cache_dir = tempfile.mkdtemp()
+        self.bytecode_cache_patcher = mock.patch.object(Render, "BYTECODE_CACHE_DIR", self.bytecode_cache_dir)
+        self.bytecode_cache_patcher.start()
+        Render.clear_envs()
+
+    def tearDown(self):
+        Render.clear_envs()
+        self.bytecode_cache_patcher.stop()
+        shutil.rmtree(self.bytecode_cache_dir)
+
     def test_json(self):
         os.environ['TEMPLATE'] = "json.j2"
         os.environ['VARIABLES'] = "json.json"
@@ -45,6 +62,79 @@ class RenderTestCase(unittest.TestCase):
             data = yaml.safe_load(f)
         self.assertEqual(template, data)
 
+    def test_json_batch(self):
+        r = Render("json.j2", "json.json")
+
+        templates = [yaml.safe_load(template) for template in
+                     r.rend_templates([{}, {"os": "linux"}, {"os": "mac", "version": 11}])]
+        self.assertEqual(len(templates), 3)
+        self.assertEqual(templates[0].get("os"), "windows")
+        self.assertEqual(templates[1].get("os"), "linux")
+        self.assertEqual(templates[1].get("version"), 10)
+        self.assertEqual(templates[2].get("os"), "mac")
+        self.assertEqual(templates[2].get("version"), 11)
+        self.assertEqual(templates[2].get("installed_apps"), "json")
+
+    def test_env_shared_by_templates_dir(self):
+        self.assertIs(Render("json.j2", "json.json").get_jinja2env(), Render("yml.j2", "yml.yml").get_jinja2env())
+        templates_dir = tempfile.mkdtemp()
+        try:
+            self.assertIsNot(Render("json.j2", "json.json", templates_dir).get_jinja2env(),
+                             Render("json.j2", "json.json").get_jinja2env())
+        finally:
+            shutil.rmtree(templates_dir)
+
+    def test_template_changed_on_disk_reloaded(self):
+        templates_dir = tempfile.mkdtemp()
+        template = templates_dir + "/reload.j2"
+        try:
+            with open(template, "w") as f:
+                f.write("os: {{ os }}")
+            r = Render("reload.j2", "json.json", templates_dir)
+            self.assertEqual(r.rend_template(os.environ.get('VARS_DIR')), "os: windows")
+            with open(template, "w") as f:
+                f.write("version: {{ version }}")
+            os.utime(template, (time.time() + 2, time.time() + 2))
+            self.assertEqual(r.rend_template(os.environ.get('VARS_DIR')), "version: 10")
+        finally:
+            shutil.rmtree(templates_dir)
+
+    def test_get_context_not_shared_between_renders(self):
+        templates_dir = tempfile.mkdtemp()
+        with open(templates_dir + "/context.j2", "w") as f:
+            f.write("{{ get_context().os }}")
+        barrier = threading.Barrier(10)
+        rendered = {}
+
+        def render(i):
+            barrier.wait()
+            rendered[i] = Render("context.j2", "json.json", templates_dir).rend_templates(
+                [{"os": f"os{i}"}] * 20)
+
+        try:
+            threads = [threading.Thread(target=render, args=(i,)) for i in range(10)]
+            [thread.start() for thread in threads]
+            [thread.join() for thread in threads]
+        finally:
+            shutil.rmtree(templates_dir)
+        for i in range(10):
+            self.assertEqual(rendered.get(i), [f"os{i}"] * 20)
+
+    def test_template_compiled_once(self):
+        templates_dir = tempfile.mkdtemp()
+        with open(templates_dir + "/compiled.j2", "w") as f:
+            f.write("os: {{ os }}")
+        try:
+            with mock.patch.object(jinja2.Environment, "compile", autospec=True,
+                                   side_effect=jinja2.Environment.compile) as compile:
+                for _ in range(200):
+                    r = Render("compiled.j2", "json.json", templates_dir)
+                    self.assertEqual(r.rend_template(os.environ.get('VARS_DIR')), "os: windows")
+                    self.assertIs(r.get_jinja2env(), Render.get_env(templates_dir))
+            self.assertEqual(compile.call_count, 1)
+        finally:
+            shutil.rmtree(templates_dir)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -132,6 +132,12 @@ class FlaskServerTestCase(unittest.TestCase):
         self.assertIsNotNone(body.get('timestamp'))
         self.assertEqual(headers.get('X-Request-ID'), xid)
 
+    def test_ping_endpoint_docker_daemon_header(self):
+        response = requests.get(self.server + "/ping")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers.get('Docker-Daemon'), "up")
+
     def test_about_endpoint(self):
         response = requests.get(self.server + "/about")
         name = "estuary-deployer"
@@ -240,6 +246,21 @@ class FlaskServerTestCase(unittest.TestCase):
         self.assertEqual(len(body.get("services")), 2)
         self.assertEqual(int(body.get("version")), 3)
 
+    @parameterized.expand([
+        ("json.j2", "json.json")
+    ])
+    def test_rendwithenv_request_vars_not_kept(self, template, variables):
+        payload = {'RENDER_REQUEST_VAR': 'request'}
+        headers = {'Content-type': 'application/json'}
+
+        response = requests.post(self.server + f"/render/{template}/{variables}", data=json.dumps(payload),
+                                 headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+        for env_var in ["RENDER_REQUEST_VAR", "TEMPLATE", "VARIABLES"]:
+            body = requests.get(self.server + f"/env/{env_var}").json()
+            self.assertEqual(body.get('description'), None)
+
     @parameterized.expand([
         ("mysql56.yml", "variables.yml")
     ])
@@ -310,6 +331,137 @@ class FlaskServerTestCase(unittest.TestCase):
         self.assertEqual(body.get('code'), ApiCode.SUCCESS.value)
         self.assertIsNotNone(body.get('timestamp'))
 
+    @parameterized.expand([
+        ("alpine.yml", "variables.yml")
+    ])
+    def test_deploystart_job_p(self, template, variables):
+        response = requests.post(self.server + f"/deployments/{template}/{variables}")
+        job_id = response.headers.get('Job-Id')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(job_id)
+
+        response = requests.get(self.server + f"/deployments/jobs/{job_id}?wait=60")
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.get('description').get('id'), job_id)
+        self.assertEqual(body.get('description').get('status'), "finished")
+        self.assertEqual(body.get('description').get('code'), 0)
+        self.assertEqual(list(body.get('description').get('phases').keys()), ["render", "pull", "create", "start"])
+        self.assertEqual(len(self.get_deployment_info()), 1)
+
+    @parameterized.expand([
+        ("alpine.yml", "variables.yml")
+    ])
+    def test_deploystart_batch_p(self, template, variables):
+        response = requests.post(self.server + f"/deployments/batch/{template}/{variables}",
+                                 data=json.dumps([{}, {"version": 2}]))
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(body.get('description')), 2)
+        for item in body.get('description'):
+            response = requests.get(self.server + f"/deployments/jobs/{item.get('job')}?wait=60")
+            self.assertEqual(response.json().get('description').get('deployment'), item.get('id'))
+            self.assertEqual(response.json().get('description').get('status'), "finished")
+        self.assertEqual(len(self.get_deployment_info()), 2)
+
+    @parameterized.expand([
+        ("alpine.yml", "variables.yml")
+    ])
+    def test_deploystart_batch_max_deployments_n(self, template, variables):
+        response = requests.post(self.server + f"/deployments/batch/{template}/{variables}",
+                                 data=json.dumps([{}] * (self.max_deployments + 1)))
+        body = response.json()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body.get('code'), ApiCode.MAX_DEPLOYMENTS_REACHED.value)
+        self.assertEqual(len(self.get_deployment_info()), 0)
+
+    @parameterized.expand([
+        ("alpine.yml", "variables.yml")
+    ])
+    def test_deployment_pool_claim_p(self, template, variables):
+        response = requests.put(self.server + f"/deployments/pool/{template}/{variables}", data=json.dumps({"size": 1}))
+        self.assertEqual(response.status_code, 200)
+        time.sleep(self.sleep_before_env_up)
+        self.assertEqual(len(self.get_deployment_info()), 1)
+
+        response = requests.post(self.server + f"/deployments/pool/{template}/{variables}/claim",
+                                 data=json.dumps({"owner": "flask_rest_test"}))
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        deployment = [item for item in requests.get(self.server + "/deployments").json().get('description') if
+                      item.get('id') == body.get('description')][0]
+        self.assertEqual(deployment.get('metadata').get('owner'), "flask_rest_test")
+
+        requests.put(self.server + f"/deployments/pool/{template}/{variables}", data=json.dumps({"size": 0}))
+
+    def test_deployment_pool_empty_n(self):
+        response = requests.post(self.server + "/deployments/pool/alpine.yml/doesnotexist.yml/claim")
+        body = response.json()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body.get('code'), ApiCode.DEPLOYMENT_POOL_EMPTY.value)
+
+    @parameterized.expand([
+        ("alpine.yml",)
+    ])
+    def test_redeploy_incremental_p(self, template):
+        deployment_id = "redeployincremental"
+        headers = {'Content-type': 'text/plain', 'Deployment-Id': deployment_id}
+        with open(f"{self.input_path}/{template}", closefd=True) as f:
+            payload = f.read()
+        response = requests.post(self.server + "/deployments", data=payload, headers=headers)
+        requests.get(self.server + f"/deployments/jobs/{response.headers.get('Job-Id')}?wait=60")
+
+        response = requests.put(self.server + f"/deployments/{deployment_id}", data=payload)
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(body.get('description').get('job'))
+        self.assertEqual(body.get('description').get('diff').get('unchanged'), ["alpine"])
+
+        response = requests.put(self.server + f"/deployments/{deployment_id}",
+                                data=payload.replace("hostname: alpine", "hostname: alpine2"))
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.get('description').get('diff').get('changed'), {"alpine": ["hostname"]})
+        response = requests.get(self.server + f"/deployments/jobs/{body.get('description').get('job')}?wait=60")
+        self.assertEqual(response.json().get('description').get('status'), "finished")
+        self.assertEqual(len(self.get_deployment_info()), 1)
+
+    def test_redeploy_not_found_n(self):
+        response = requests.put(self.server + "/deployments/doesnotexist", data="version: '3.3'")
+        body = response.json()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body.get('code'), ApiCode.DEPLOY_REPLAY_FAILURE.value)
+
+    @parameterized.expand([
+        ("alpine.yml", "variables.yml")
+    ])
+    def test_deployment_ready_p(self, template, variables):
+        response = requests.post(self.server + f"/deployments/{template}/{variables}")
+        deployment_id = response.json().get('description')
+
+        response = requests.get(self.server + f"/deployments/{deployment_id}/ready?timeout=60")
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body.get('description').get('ready'))
+        self.assertEqual(body.get('description').get('missing'), [])
+        self.assertEqual(len(body.get('description').get('containers')), 1)
+        self.assertIsNotNone(body.get('description').get('readyin'))
+
+    def test_deployment_ready_n(self):
+        response = requests.get(self.server + "/deployments/doesnotexist/ready?timeout=1")
+        body = response.json()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body.get('code'), ApiCode.DEPLOY_STATUS_FAILURE.value)
+
+    def test_deploystart_job_n(self):
+        job_id = "whatever"
+        response = requests.get(self.server + f"/deployments/jobs/{job_id}")
+        body = response.json()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body.get('message'),
+                         ErrorMessage.HTTP_CODE.get(ApiCode.GET_DEPLOYMENT_JOB_FAILURE.value) % job_id)
+        self.assertEqual(body.get('code'), ApiCode.GET_DEPLOYMENT_JOB_FAILURE.value)
+
     @parameterized.expand([
         ("doesnotexists.yml", "variables.yml"),
         ("mysql56.yml", "doesnnotexists.yml")
@@ -414,6 +566,25 @@ class FlaskServerTestCase(unittest.TestCase):
         self.assertNotEqual(self.get_deployment_info_object()[0].get('metadata').get('name'), "")
         requests.delete(self.server + "/deployments")
 
+    @parameterized.expand([
+        ("alpine.yml", "variables.yml")
+    ])
+    def test_deploystop_all_summary_p(self, template, variables):
+        for i in range(0, 2):
+            response = requests.post(self.server + f"/deployments/{template}/{variables}")
+            self.assertEqual(response.status_code, 200)
+        time.sleep(self.sleep_before_env_up)
+        self.assertEqual(len(self.get_deployment_info()), 2)
+
+        response = requests.delete(self.server + "/deployments")
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(body.get('description')), 2)
+        for item in body.get('description'):
+            self.assertEqual(item.get('code'), 0)
+            self.assertGreaterEqual(item.get('duration'), 0)
+        self.assertEqual(len(self.get_deployment_info()), 0)
+
     def test_getfile_p(self):
         headers = {
             'Content-type': 'application/json',
@@ -661,6 +832,83 @@ class FlaskServerTestCase(unittest.TestCase):
         self.assertIsNotNone(body.get('timestamp'))
         self.assertIsNotNone(body.get('timestamp'))
 
+    @parameterized.expand([
+        ("mysql56.yml", "variables.yml")
+    ])
+    def test_get_logs_since_cursor_p(self, template, variables):
+        response = requests.post(self.server + f"/deployments/{template}/{variables}")
+        time.sleep(self.sleep_before_env_up)
+        self.assertEqual(response.status_code, 200)
+        env_id = response.json().get("description")
+
+        response = requests.get(self.server + f"/deployments/logs/{env_id}", params={"service": "mysql", "tail": 10})
+        self.assertEqual(response.status_code, 200)
+        cursor = response.headers.get("Logs-Cursor")
+        self.assertGreater(len(cursor), 0)
+        self.assertLessEqual(len(response.json().get("description").split("\n")), 11)
+
+        response = requests.get(self.server + f"/deployments/logs/{env_id}",
+                                params={"service": "mysql", "since": cursor, "until": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json().get("description"), "")
+        self.assertEqual(response.headers.get("Logs-Cursor"), cursor)
+
+    def test_get_logs_invalid_filter_n(self):
+        response = requests.post(self.server + "/deployments/alpine.yml/variables.yml")
+        env_id = response.json().get("description")
+
+        response = requests.get(self.server + f"/deployments/logs/{env_id}", params={"filter": "("})
+        body = response.json()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body.get('code'), ApiCode.GET_LOGS_FAILED.value)
+
+    @parameterized.expand([
+        ("mysql56.yml", "variables.yml")
+    ])
+    def test_get_logs_stream_sse_p(self, template, variables):
+        response = requests.post(self.server + f"/deployments/{template}/{variables}")
+        time.sleep(self.sleep_before_env_up)
+        self.assertEqual(response.status_code, 200)
+        env_id = response.json().get("description")
+
+        response = requests.get(self.server + f"/deployments/logs/{env_id}/stream",
+                                headers={"Accept": "text/event-stream"}, stream=True, timeout=30)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("text/event-stream", response.headers.get("Content-Type"))
+        events = []
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("data: "):
+                events.append(line)
+            if len(events) >= 5:
+                break
+        response.close()
+        self.assertEqual(len(events), 5)
+
+    @parameterized.expand([
+        ("alpine.yml", "variables.yml")
+    ])
+    def test_get_processes_streamed_p(self, template, variables):
+        response = requests.post(self.server + f"/deployments/{template}/{variables}")
+        time.sleep(self.sleep_before_env_up)
+        env_id = response.json().get("description")
+        response = requests.get(self.server + f"/deployments/logs/{env_id}/stream", stream=True, timeout=30)
+        self.assertEqual(response.status_code, 200)
+
+        processes = requests.get(self.server + "/processes", params={"deployment": env_id}).json().get('description')
+        self.assertEqual(len(processes), 1)
+        self.assertEqual(processes[0].get('kind'), "streamed")
+        self.assertTrue(processes[0].get('running'))
+        response.close()
+
+    def test_get_logs_stream_id_not_found_n(self):
+        dummy_env_id = "dummy"
+        response = requests.get(self.server + f"/deployments/logs/{dummy_env_id}/stream")
+        body = response.json()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body.get('message'),
+                         ErrorMessage.HTTP_CODE.get(ApiCode.GET_LOGS_FAILED.value) % dummy_env_id)
+        self.assertEqual(body.get('code'), ApiCode.GET_LOGS_FAILED.value)
+
     @parameterized.expand([
         ("alpine.yml", "variables.yml")
     ])
@@ -679,6 +927,12 @@ class FlaskServerTestCase(unittest.TestCase):
         self.assertEqual(response.json().get('description')[0].get('id'), compose_id)
         self.assertEqual(len(response.json().get('description')[0].get('containers')), 1)
 
+    def test_getdeploymentinfo_cache_age_header(self):
+        response = requests.get(self.server + "/deployments")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(float(response.headers.get('Cache-Age')), 0)
+
     @parameterized.expand([
         ("alpine.yml", "variables.yml")
     ])
@@ -839,6 +1093,21 @@ class FlaskServerTestCase(unittest.TestCase):
         self.assertIsNotNone(body.get('timestamp'))
         self.assertIsNotNone(body.get('timestamp'))
 
+    def test_operations_counters_p(self):
+        requests.get(self.server + "/deployments")
+        response = requests.get(self.server + "/operations")
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(body.get('description').get('counters').get('finished'), 0)
+        self.assertIsInstance(body.get('description').get('operations'), list)
+
+    def test_cancel_operation_not_in_flight_n(self):
+        response = requests.delete(self.server + "/operations/dummy")
+        body = response.json()
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(body.get('code'), ApiCode.OPERATION_NOT_FOUND.value)
+        self.assertEqual(body.get('message'), ErrorMessage.HTTP_CODE.get(ApiCode.OPERATION_NOT_FOUND.value) % "dummy")
+
     def test_executecommand_n(self):
         command = "abracadabra"  # not working on linux
 
@@ -881,6 +1150,90 @@ class FlaskServerTestCase(unittest.TestCase):
         self.assertIsInstance(body.get('description').get('commands').get(command).get('details').get('args'), list)
         self.assertIsNotNone(body.get('timestamp'))
 
+    def test_executecommand_async_p(self):
+        command = "cat /etc/hostname"
+
+        response = requests.post(self.server + f"/command?async=true", data=command)
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.get('code'), ApiCode.SUCCESS.value)
+        command_id = body.get('description').get('id')
+        self.assertEqual(body.get('description').get('progress').get('total'), 1)
+        for i in range(50):
+            body = requests.get(self.server + f"/command/{command_id}").json()
+            if body.get('description').get('finished'):
+                break
+            time.sleep(0.1)
+        self.assertEqual(body.get('code'), ApiCode.SUCCESS.value)
+        self.assertEqual(body.get('description').get('progress'), {"finished": 1, "total": 1})
+        self.assertEqual(body.get('description').get('commands').get(command).get('details').get('code'), 0)
+        self.assertNotEqual(body.get('description').get('commands').get(command).get('details').get('out'), "")
+
+    def test_executecommand_parallel_p(self):
+        commands = "sleep 1\nsleep 1\necho 1"
+
+        start_time = time.time()
+        response = requests.post(self.server + f"/command?mode=parallel", data=commands)
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.get('code'), ApiCode.SUCCESS.value)
+        self.assertLess(time.time() - start_time, 2)
+        self.assertEqual(body.get('description').get('mode'), "parallel")
+        self.assertEqual(body.get('description').get('critical_path').get('commands'), ["sleep 1"])
+
+    def test_executecommand_dag_p(self):
+        commands = {"echo 1": [], "echo 2": ["echo 1"]}
+
+        response = requests.post(self.server + f"/command?mode=dag", data=json.dumps(commands))
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.get('code'), ApiCode.SUCCESS.value)
+        self.assertEqual(body.get('description').get('critical_path').get('commands'), ["echo 1", "echo 2"])
+
+    def test_executecommand_dag_cycle_n(self):
+        commands = {"echo 1": ["echo 2"], "echo 2": ["echo 1"]}
+
+        response = requests.post(self.server + f"/command?mode=dag", data=json.dumps(commands))
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.get('code'), ApiCode.COMMAND_EXEC_FAILURE.value)
+
+    def test_executecommand_stream_p(self):
+        commands = "echo 1\nexit 2"
+
+        response = requests.post(self.server + f"/command/stream", data=commands, stream=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("application/x-ndjson", response.headers.get('Content-Type'))
+        events = [json.loads(line) for line in response.iter_lines() if line]
+        self.assertEqual([event.get('event') for event in events], ["start", "line", "exit", "start", "exit", "end"])
+        self.assertEqual(events[1].get('line'), "1")
+        self.assertEqual(events[-1].get('codes'), {"echo 1": 0, "exit 2": 2})
+
+    def test_executecommand_stream_sse_p(self):
+        response = requests.post(self.server + f"/command/stream?format=sse", data="echo 1", stream=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("text/event-stream", response.headers.get('Content-Type'))
+        lines = [line.decode() for line in response.iter_lines() if line]
+        self.assertEqual([line for line in lines if line.startswith("event:")],
+                         ["event: start", "event: line", "event: exit", "event: end"])
+
+    def test_getcommand_run_n(self):
+        command_id = "notfound"
+
+        response = requests.get(self.server + f"/command/{command_id}")
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.get('code'), ApiCode.GET_COMMAND_RUN_FAILURE.value)
+        self.assertEqual(body.get('message'),
+                         ErrorMessage.HTTP_CODE.get(ApiCode.GET_COMMAND_RUN_FAILURE.value) % command_id)
+
     def test_executecommand_rm_allowed(self):
         command = "rm -rf /tmp"
 
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from rest.environment.cmd_engine import CmdEngineSingleton
+from rest.utils.cmd_utils import CmdUtils
+
+
+class CmdEngineTestCase(unittest.TestCase):
+
+    def test_fan_out_on_one_loop(self):
+        threads = threading.active_count()
+        started_dir = tempfile.mkdtemp()
+        # every command waits for all 50 to be started, run one after another the first one times out
+        command = f"touch {started_dir}/%s; while [ $(ls {started_dir} | wc -l) -lt 50 ]; do sleep 0.05; done; echo %s"
+        try:
+            results = CmdEngineSingleton.get_instance().gather(
+                [CmdUtils.run_cmd_async(["sh", "-c", command % (i, i)], timeout=10) for i in range(50)])
+        finally:
+            shutil.rmtree(started_dir)
+
+        self.assertEqual([result.get('out') for result in results], [str(i) for i in range(50)])
+        self.assertLessEqual(threading.active_count(), threads + 1)
+
+    def test_gather_bounded(self):
+        start_time = time.time()
+        CmdEngineSingleton.get_instance().gather([CmdUtils.run_cmd_async(["sleep", "0.3"]) for i in range(4)], 2)
+        self.assertGreaterEqual(time.time() - start_time, 0.6)
+
+    def test_sync_facade_from_many_threads(self):
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(
+            CmdUtils.run_cmd_shell_true([f"echo {i}"]).get('out'))) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results, key=int), [str(i) for i in range(20)])
+
+    def test_run_from_the_loop_raises(self):
+        engine = CmdEngineSingleton.get_instance()
+
+        async def blocking():
+            return CmdUtils.run_cmd_shell_false(["echo", "1"])
+
+        with self.assertRaises(RuntimeError):
+            engine.run(blocking())
+        # the loop is not hung
+        self.assertEqual(CmdUtils.run_cmd_shell_false(["echo", "2"]).get('out'), "2")
+
+    def test_missing_binary_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            CmdUtils.run_cmd_shell_false(["no-such-binary-here"])
+
+
+    @unittest.skipUnless((3, 9) <= sys.version_info < (3, 12) and hasattr(os, "pidfd_open"), "no pidfd watcher")
+    def test_children_watched_with_pidfd(self):
+        CmdEngineSingleton.get_instance()
+        self.assertIsInstance(asyncio.get_child_watcher(), asyncio.PidfdChildWatcher)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+import sys
+import threading
+import time
+import tracemalloc
+import unittest
+from types import MappingProxyType
+from unittest import mock
+
+from rest.environment.operations import OperationsSingleton
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class CmdUtilsTestCase(unittest.TestCase):
+
+    def test_read_streamed_lines(self):
+        p = CmdUtils.run_cmd_streamed([sys.executable, "-c", "for i in range(3): print(i)"])
+        lines = list(CmdUtils.read_streamed(p))
+        self.assertEqual(lines, ["0\n", "1\n", "2\n"])
+        self.assertEqual(p.returncode, 0)
+
+    def test_read_streamed_keepalive_and_close_kills(self):
+        p = CmdUtils.run_cmd_streamed(
+            [sys.executable, "-u", "-c", "import time\nprint('first')\nwhile True: time.sleep(1)"])
+        stream = CmdUtils.read_streamed(p, keepalive=0.1)
+        self.assertEqual(next(stream), "first\n")
+        self.assertIsNone(next(stream))
+        # the client disconnected
+        stream.close()
+        self.assertIsNotNone(p.returncode)
+
+    def test_read_streamed_bounded_for_slow_reader(self):
+        p = CmdUtils.run_cmd_streamed([sys.executable, "-c", "for i in range(100000): print(i)"])
+        stream = CmdUtils.read_streamed(p, queue_size=10)
+        self.assertEqual(next(stream), "0\n")
+        time.sleep(0.5)
+        # the producer is blocked by the full queue, not buffered in memory
+        self.assertIsNone(p.poll())
+        self.assertEqual(len(list(stream)), 99999)
+
+    def test_capture_stats(self):
+        status = CmdUtils.run_cmd_shell_false(
+            [sys.executable, "-c", "import sys\nfor i in range(1500): print(i)\nsys.stderr.write('oops')"])
+        self.assertEqual(status.get('code'), 0)
+        self.assertEqual(status.get('out').split("\n")[0], "500")
+        self.assertEqual(status.get('err'), "oops")
+        self.assertEqual(status.get('stats').get('out'), {"bytes": 6390, "lines": 1500, "dropped": 500})
+        self.assertEqual(status.get('stats').get('err'), {"bytes": 4, "lines": 1, "dropped": 0})
+
+    @staticmethod
+    def peak_memory(size_mb):
+        command = [sys.executable, "-c",
+                   f"import sys\nfor i in range({size_mb} * 1024): sys.stdout.write('x' * 1023 + '\\n')"]
+        tracemalloc.start()
+        try:
+            status = CmdUtils.run_cmd_shell_false(command, head=100, tail=1000)
+            return tracemalloc.get_traced_memory()[1], status
+        finally:
+            tracemalloc.stop()
+
+    def test_capture_memory_independent_of_output_size(self):
+        small_peak, status = self.peak_memory(2)
+        self.assertEqual(status.get('stats').get('out').get('bytes'), 2 * 1024 * 1024)
+        large_peak, status = self.peak_memory(64)
+        self.assertEqual(status.get('stats').get('out').get('lines'), 64 * 1024)
+        self.assertEqual(status.get('stats').get('out').get('dropped'), 64 * 1024 - 1100)
+        # 1100 lines of 1KB kept, whatever the output size
+        self.assertLess(large_peak, 8 * 1024 * 1024)
+        self.assertLess(large_peak, small_peak * 2)
+
+    def test_timeout_kills_process_group(self):
+        counters = OperationsSingleton.get_instance().get_counters()
+        start_time = time.time()
+        # the shell child holds the pipes: without a group kill the read would last 30s
+        status = CmdUtils.run_cmd_shell_true("echo started; sleep 30 | cat; echo never", timeout=0.5)
+        self.assertLess(time.time() - start_time, 5)
+        self.assertEqual(status.get('out'), "started")
+        self.assertIn("Timed out after 0.5 seconds, killed", status.get('err'))
+        self.assertNotEqual(status.get('code'), 0)
+        new_counters = OperationsSingleton.get_instance().get_counters()
+        self.assertEqual(new_counters.get('timeouts'), counters.get('timeouts') + 1)
+        self.assertEqual(new_counters.get('kills'), counters.get('kills') + 1)
+
+    def test_cancel_in_flight(self):
+        operations = OperationsSingleton.get_instance()
+        result = {}
+        runner = threading.Thread(target=lambda: result.update(CmdUtils.run_cmd_shell_false(["sleep", "30"])))
+        runner.start()
+        for i in range(50):
+            in_flight = [operation for operation in operations.get_operations() if operation.get('args') == "sleep 30"]
+            if in_flight:
+                break
+            time.sleep(0.1)
+        self.assertEqual(in_flight[0].get('operation'), CmdUtils.OPERATION_DEFAULT)
+        self.assertTrue(operations.cancel(in_flight[0].get('id')))
+        runner.join(5)
+        self.assertEqual(result.get('err'), "Cancelled, killed")
+        self.assertEqual(result.get('id'), in_flight[0].get('id'))
+        self.assertFalse(operations.cancel(in_flight[0].get('id')))
+
+    def test_timeouts_per_operation_class(self):
+        self.assertEqual(CmdUtils.get_timeout(CmdUtils.OPERATION_QUERY), 60)
+        self.assertEqual(CmdUtils.get_timeout(CmdUtils.OPERATION_COMMAND), 0)
+        self.assertEqual(CmdUtils.get_timeout(CmdUtils.OPERATION_DEFAULT), 600)
+        config = EnvStartupSingleton.get_instance().get_config()._replace(
+            CMD_TIMEOUTS=MappingProxyType({CmdUtils.OPERATION_QUERY: 5, CmdUtils.OPERATION_DEFAULT: 0}))
+        with mock.patch.object(EnvStartupSingleton, "get_config", return_value=config):
+            self.assertEqual(CmdUtils.get_timeout(CmdUtils.OPERATION_QUERY), 5)
+            self.assertEqual(CmdUtils.get_timeout(CmdUtils.OPERATION_DEFAULT), 0)
+            self.assertEqual(CmdUtils.get_timeout(CmdUtils.OPERATION_DEPLOY), 1800)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import os
+import time
+import tracemalloc
+import unittest
+from unittest import mock
+
+from rest.environment.operations import OperationsSingleton
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.command_in_memory import CommandInMemory
+
+
+class CommandInMemoryTestCase(unittest.TestCase):
+
+    def test_sequential_critical_path_is_every_command(self):
+        commands = ["echo 1", "echo 2", "echo 3"]
+        result = CommandInMemory().run_commands(commands)
+
+        self.assertEqual(result.get('mode'), CommandInMemory.MODE_SEQUENTIAL)
+        self.assertEqual(result.get('critical_path').get('commands'), commands)
+        for command in commands:
+            self.assertEqual(result.get('commands').get(command).get('status'), CommandInMemory.STATUS_FINISHED)
+            self.assertEqual(result.get('commands').get(command).get('details').get('out'), command.split(" ")[1])
+
+    def test_parallel_commands_overlap(self):
+        commands = ["sleep 0.5", "sleep 0.5", "sleep 0.6", "sleep 0.4"]
+        result = CommandInMemory().run_commands(commands, CommandInMemory.MODE_PARALLEL, 8)
+
+        started = [result.get('commands').get(command).get('startedat') for command in commands]
+        finished = [result.get('commands').get(command).get('finishedat') for command in commands]
+        self.assertLess(max(started), min(finished))
+        self.assertEqual(result.get('critical_path').get('commands'), ["sleep 0.6"])
+        self.assertGreaterEqual(result.get('critical_path').get('duration'), 0.6)
+
+    def test_parallel_concurrency_cap(self):
+        commands = [f"sleep 0.3; echo {i}" for i in range(4)]
+        start_time = time.time()
+        result = CommandInMemory().run_commands(commands, CommandInMemory.MODE_PARALLEL, 2)
+
+        self.assertGreaterEqual(time.time() - start_time, 0.6)
+        self.assertEqual([result.get('commands').get(command).get('details').get('out') for command in commands],
+                         ["0", "1", "2", "3"])
+
+    def test_dag_order_and_critical_path(self):
+        commands, needs = CommandInMemory.parse_commands(
+            '{"sleep 0.3": [], "echo a": [], "echo b": ["sleep 0.3", "echo a"], "echo c": ["echo b"]}',
+            CommandInMemory.MODE_DAG)
+        result = CommandInMemory().run_commands(commands, CommandInMemory.MODE_DAG, 8, needs)
+
+        finished = {command: result.get('commands').get(command).get('finishedat') for command in commands}
+        started = {command: result.get('commands').get(command).get('startedat') for command in commands}
+        self.assertGreaterEqual(started.get("echo b"), finished.get("sleep 0.3"))
+        self.assertGreaterEqual(started.get("echo c"), finished.get("echo b"))
+        self.assertEqual(result.get('critical_path').get('commands'), ["sleep 0.3", "echo b", "echo c"])
+
+    def test_dag_failed_need_skips(self):
+        commands, needs = CommandInMemory.parse_commands('{"exit 3": [], "echo a": ["exit 3"], "echo b": []}',
+                                                         CommandInMemory.MODE_DAG)
+        result = CommandInMemory().run_commands(commands, CommandInMemory.MODE_DAG, 8, needs)
+
+        self.assertEqual(result.get('commands').get("exit 3").get('details').get('code'), 3)
+        self.assertEqual(result.get('commands').get("echo a").get('status'), CommandInMemory.STATUS_SKIPPED)
+        self.assertEqual(result.get('commands').get("echo b").get('status'), CommandInMemory.STATUS_FINISHED)
+
+    def test_dag_invalid(self):
+        with self.assertRaises(ValueError):
+            CommandInMemory.parse_commands('{"echo a": ["echo b"], "echo b": ["echo a"]}', CommandInMemory.MODE_DAG)
+        with self.assertRaises(ValueError):
+            CommandInMemory.parse_commands('{"echo a": ["echo b"]}', CommandInMemory.MODE_DAG)
+        with self.assertRaises(ValueError):
+            CommandInMemory.parse_commands('["echo a"]', CommandInMemory.MODE_DAG)
+        with self.assertRaises(ValueError):
+            CommandInMemory.parse_commands('echo a', "unknown")
+
+    def test_stream_events(self):
+        events = list(CommandInMemory().stream_commands(["echo a; echo b >&2", "exit 2"]))
+
+        self.assertEqual([event.get('event') for event in events], ["start", "line", "line", "exit", "start", "exit",
+                                                                     "end"])
+        self.assertEqual([event.get('line') for event in events if event.get('event') == "line"], ["a", "b"])
+        self.assertEqual(events[3].get('lines'), 2)
+        self.assertEqual(events[-1].get('codes'), {"echo a; echo b >&2": 0, "exit 2": 2})
+
+    def test_stream_timeout_kills(self):
+        with mock.patch.object(CmdUtils, "get_timeout", return_value=1):
+            start_time = time.time()
+            events = list(CommandInMemory().stream_commands(["sleep 30 | cat"]))
+        self.assertLess(time.time() - start_time, 10)
+        self.assertTrue(events[-2].get('timedout'))
+        self.assertNotEqual(events[-2].get('code'), 0)
+
+    def test_stream_closed_kills(self):
+        events = CommandInMemory().stream_commands(["echo started; sleep 30"])
+        start = next(events)
+        self.assertEqual(next(events).get('line'), "started")
+        events.close()
+        # killed and waited
+        with self.assertRaises(ProcessLookupError):
+            os.kill(start.get('pid'), 0)
+        self.assertNotIn(start.get('id'), [operation.get('id') for operation in
+                                           OperationsSingleton.get_instance().get_operations()])
+
+    def test_stream_memory_bounded(self):
+        # 16MB of output, the lines are forwarded and counted, not kept
+        tracemalloc.start()
+        events = CommandInMemory().stream_commands(["head -c 16777216 /dev/zero | tr '\\0' 'a' | fold -w 100"])
+        count = sum(1 for event in events if event is not None and event.get('event') == "line")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(count, 16777216 // 100 + 1)
+        self.assertLess(peak, 16 * 1024 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
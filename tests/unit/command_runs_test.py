@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import time
+import unittest
+from unittest import mock
+
+from rest.environment.command_runs import CommandRunsSingleton
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class CommandRunsTestCase(unittest.TestCase):
+
+    @staticmethod
+    def wait_finished(run_id, timeout=5):
+        for i in range(int(timeout / 0.05)):
+            command_run = CommandRunsSingleton.get_instance().get_run(run_id)
+            if command_run.get('finished'):
+                return command_run
+            time.sleep(0.05)
+        return None
+
+    def test_async_run_progress(self):
+        command_run = CommandRunsSingleton.get_instance().submit(["echo 1", "sleep 0.5", "echo 3"])
+        run_id = command_run.get('id')
+        self.assertEqual(len(run_id), 16)
+        self.assertFalse(command_run.get('finished'))
+        self.assertEqual(command_run.get('progress'), {"finished": 0, "total": 3})
+
+        time.sleep(0.25)
+        command_run = CommandRunsSingleton.get_instance().get_run(run_id)
+        self.assertEqual(command_run.get('commands').get("echo 1").get('status'), "finished")
+        self.assertEqual(command_run.get('commands').get("sleep 0.5").get('status'), "in progress")
+        self.assertEqual(command_run.get('progress'), {"finished": 1, "total": 3})
+
+        command_run = self.wait_finished(run_id)
+        self.assertEqual(command_run.get('progress'), {"finished": 3, "total": 3})
+        self.assertEqual(command_run.get('commands').get("echo 3").get('details').get('out'), "3")
+        self.assertGreaterEqual(command_run.get('duration'), 0.5)
+
+    def test_run_not_found(self):
+        self.assertIsNone(CommandRunsSingleton.get_instance().get_run("notfound"))
+
+    def test_finished_runs_expire(self):
+        run_id = CommandRunsSingleton.get_instance().submit(["true"]).get('id')
+        self.wait_finished(run_id)
+
+        config = EnvStartupSingleton.get_instance().get_config()._replace(COMMAND_RUN_TTL=0)
+        with mock.patch.object(EnvStartupSingleton, "get_config", return_value=config):
+            time.sleep(0.01)
+            other_run_id = CommandRunsSingleton.get_instance().submit(["true"]).get('id')
+        self.assertIsNone(CommandRunsSingleton.get_instance().get_run(run_id))
+        self.assertIsNotNone(self.wait_finished(other_run_id))
+
+    def test_store_is_bounded_lru(self):
+        runs = CommandRunsSingleton.get_instance()
+        first_run_id = runs.submit(["true"]).get('id')
+        second_run_id = runs.submit(["true"]).get('id')
+        self.wait_finished(first_run_id)
+        self.wait_finished(second_run_id)
+        # the first run was read last, the second one goes out first
+        runs.get_run(first_run_id)
+        run_ids = [runs.submit(["true"]).get('id') for i in range(CommandRunsSingleton.RUNS_MAX_SIZE - 1)]
+        self.assertIsNone(runs.get_run(second_run_id))
+        self.assertIsNotNone(runs.get_run(first_run_id))
+        for run_id in run_ids:
+            self.wait_finished(run_id)
+
+    def test_runs_in_progress_not_evicted(self):
+        runs = CommandRunsSingleton.get_instance()
+        with mock.patch.object(CommandRunsSingleton, "RUNS_MAX_SIZE", 2):
+            runs._CommandRunsSingleton__runs.clear()
+            run_ids = [runs.submit(["sleep 0.5"]).get('id') for i in range(2)]
+            self.assertIsNone(runs.submit(["true"]))
+            self.assertEqual([runs.get_run(run_id).get('finished') for run_id in run_ids], [False, False])
+            for run_id in run_ids:
+                self.assertIsNotNone(self.wait_finished(run_id))
+            self.assertIsNotNone(runs.submit(["true"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from rest.api.constants.env_constants import EnvConstants
+from rest.api.constants.env_init import EnvInit
+from rest.environment.deployment_jobs import DeploymentJobsSingleton
+from rest.environment.environment import EnvironmentSingleton
+from rest.environment.image_pulls import ImagePullsSingleton
+from rest.model.deployment_reader import DeploymentReader
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.docker_utils import DockerUtils
+
+
+class DeploymentJobsTestCase(unittest.TestCase):
+
+    @staticmethod
+    def result(code):
+        return {"out": "", "err": "", "code": code, "pid": 0, "args": []}
+
+    def test_job_phases_finished(self):
+        jobs = DeploymentJobsSingleton.get_instance()
+        render = DeploymentJobsSingleton.phase(datetime.datetime.now(), 0, {})
+        job_id = jobs.submit("dummy", [
+            ("pull", self.result, [0]),
+            ("create", self.result, [0]),
+            ("start", self.result, [0])
+        ], {"render": render})
+
+        job = jobs.wait_job(job_id, 5)
+        self.assertEqual(job.get('status'), DeploymentJobsSingleton.STATUS_FINISHED)
+        self.assertEqual(job.get('code'), 0)
+        self.assertEqual(job.get('deployment'), "dummy")
+        self.assertEqual(list(job.get('phases').keys()), ["render", "pull", "create", "start"])
+        for phase in job.get('phases').values():
+            self.assertEqual(phase.get('status'), DeploymentJobsSingleton.STATUS_FINISHED)
+            self.assertGreaterEqual(phase.get('duration'), 0)
+
+    def test_job_failed_phase_skips_the_rest(self):
+        jobs = DeploymentJobsSingleton.get_instance()
+        job_id = jobs.submit("dummy", [
+            ("pull", self.result, [1]),
+            ("create", self.result, [0]),
+            ("start", self.result, [0])
+        ])
+
+        job = jobs.wait_job(job_id, 5)
+        self.assertEqual(job.get('status'), DeploymentJobsSingleton.STATUS_FAILED)
+        self.assertEqual(job.get('code'), 1)
+        self.assertEqual(job.get('phases').get('pull').get('status'), DeploymentJobsSingleton.STATUS_FAILED)
+        self.assertEqual(job.get('phases').get('create').get('status'), DeploymentJobsSingleton.STATUS_SKIPPED)
+        self.assertEqual(job.get('phases').get('start').get('status'), DeploymentJobsSingleton.STATUS_SKIPPED)
+
+    def test_job_phase_exception(self):
+        jobs = DeploymentJobsSingleton.get_instance()
+        job_id = jobs.submit("dummy", [("pull", self.result, [])])
+
+        job = jobs.wait_job(job_id, 5)
+        self.assertEqual(job.get('status'), DeploymentJobsSingleton.STATUS_FAILED)
+        self.assertIn("Exception", job.get('phases').get('pull').get('details'))
+
+    def redeploy(self, pull_code, recreate_code):
+        """ returns the job, the compose file deployed and the next one left on disk """
+        deploy_dir = tempfile.mkdtemp()
+        file, next_file = f"{deploy_dir}/docker-compose.yml", f"{deploy_dir}/docker-compose.next.yml"
+        old_data = "services:\n  app:\n    image: app:1.0\n"
+        new_data = old_data + "networks:\n  backend: {}\n"
+        for path, data in [(file, old_data), (next_file, new_data)]:
+            with open(path, "w") as f:
+                f.write(data)
+        try:
+            with mock.patch.object(ImagePullsSingleton, "pull_images", return_value=self.result(pull_code)), \
+                    mock.patch.object(CmdUtils, "run_cmd_shell_false", return_value=self.result(recreate_code)):
+                diff = DeploymentReader.diff_services(old_data, new_data)
+                job_id = DeploymentJobsSingleton.get_instance().submit_redeployment(
+                    "dummy", file, next_file, datetime.datetime.now(), diff)
+                job = DeploymentJobsSingleton.get_instance().wait_job(job_id, 5)
+            with open(file) as f:
+                return job, f.read() == new_data, os.listdir(deploy_dir)
+        finally:
+            shutil.rmtree(deploy_dir)
+
+    def test_redeploy_file_replaced_on_success(self):
+        job, replaced, files = self.redeploy(0, 0)
+        self.assertEqual(job.get('status'), DeploymentJobsSingleton.STATUS_FINISHED)
+        self.assertTrue(replaced)
+        self.assertEqual(files, ["docker-compose.yml"])
+
+    def test_redeploy_file_kept_on_failure(self):
+        for pull_code, recreate_code in [(0, 1), (1, 0)]:
+            job, replaced, files = self.redeploy(pull_code, recreate_code)
+            self.assertEqual(job.get('status'), DeploymentJobsSingleton.STATUS_FAILED)
+            self.assertFalse(replaced)
+            self.assertEqual(files, ["docker-compose.yml"])
+
+    def test_job_long_poll(self):
+        jobs = DeploymentJobsSingleton.get_instance()
+        release = threading.Event()
+        job_id = jobs.submit("dummy", [("start", lambda: release.wait() and self.result(0), [])])
+
+        job = jobs.wait_job(job_id, 0.1)
+        self.assertEqual(job.get('status'), DeploymentJobsSingleton.STATUS_IN_PROGRESS)
+        release.set()
+        job = jobs.wait_job(job_id, 5)
+        self.assertEqual(job.get('status'), DeploymentJobsSingleton.STATUS_FINISHED)
+
+    def test_job_not_found(self):
+        self.assertIsNone(DeploymentJobsSingleton.get_instance().get_job("whatever"))
+        self.assertIsNone(DeploymentJobsSingleton.get_instance().wait_job("whatever", 0.1))
+
+    def test_job_store_is_bounded(self):
+        jobs = DeploymentJobsSingleton.get_instance()
+        job_ids = [jobs.submit("dummy", [("start", self.result, [0])]) for i in
+                   range(DeploymentJobsSingleton.JOBS_MAX_SIZE + 10)]
+
+        jobs.wait_job(job_ids[-1], 5)
+        self.assertLessEqual(len(jobs.get_jobs()), DeploymentJobsSingleton.JOBS_MAX_SIZE)
+        self.assertIsNotNone(jobs.get_job(job_ids[-1]))
+
+    def test_job_runs_with_the_caller_overlay(self):
+        env = EnvironmentSingleton.get_instance()
+        jobs = DeploymentJobsSingleton.get_instance()
+        with env.overlay({"JOB_OVERLAY": "v1"}):
+            job_id = jobs.submit("dummy", [
+                ("start", lambda: dict(self.result(0), out=env.get_env_and_virtual_env().get("JOB_OVERLAY")), [])])
+        job = jobs.wait_job(job_id, 5)
+        self.assertEqual(job.get('phases').get('start').get('details').get('out'), "v1")
+
+    def test_pending_jobs_count_against_max_deployments(self):
+        jobs = DeploymentJobsSingleton.get_instance()
+        for job in jobs.get_jobs():
+            jobs.wait_job(job.get('id'), 5)
+        deploy_dir = tempfile.mkdtemp()
+        file = f"{deploy_dir}/docker-compose.yml"
+        with open(file, "w") as f:
+            f.write("services:\n  app:\n    image: app:1.0\n")
+        release = threading.Event()
+
+        try:
+            with mock.patch.dict(EnvInit.init, {EnvConstants.MAX_DEPLOYMENTS: 3}), \
+                    mock.patch.object(DockerUtils, "get_active_deployments", return_value=[{"id": "active"}]), \
+                    mock.patch.object(ImagePullsSingleton, "pull_images",
+                                      side_effect=lambda images: release.wait(5) and self.result(0)), \
+                    mock.patch.object(CmdUtils, "run_cmd_shell_false", return_value=self.result(0)):
+                job_ids = jobs.submit_deployments([("pending1", file), ("pending2", file)], datetime.datetime.now())
+                self.assertEqual(len(job_ids), 2)
+                self.assertEqual(jobs.count_deployments(), 3)
+                # full, for a new one alone or along an active one
+                self.assertIsNone(jobs.submit_deployments([("pending3", file)], datetime.datetime.now()))
+                self.assertIsNone(jobs.submit_deployments([("active", file), ("pending3", file)],
+                                                          datetime.datetime.now()))
+                release.set()
+                for job_id in job_ids:
+                    self.assertEqual(jobs.wait_job(job_id, 5).get('status'), DeploymentJobsSingleton.STATUS_FINISHED)
+                self.assertEqual(jobs.count_deployments(), 1)
+
+                # one unreadable compose file, none submitted
+                jobs_count = len(jobs.get_jobs())
+                with self.assertRaises(Exception):
+                    jobs.submit_deployments([("new1", file), ("new2", f"{deploy_dir}/missing.yml")],
+                                            datetime.datetime.now())
+                self.assertEqual(len(jobs.get_jobs()), jobs_count)
+        finally:
+            shutil.rmtree(deploy_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
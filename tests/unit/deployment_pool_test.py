@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from rest.api.constants.env_constants import EnvConstants
+from rest.api.constants.env_init import EnvInit
+from rest.api.jinja2.render import Render
+from rest.environment.deployment_jobs import DeploymentJobsSingleton
+from rest.environment.deployment_pool import DeploymentPoolSingleton
+from rest.utils.docker_utils import DockerUtils
+
+
+class DeploymentPoolTestCase(unittest.TestCase):
+    template = "alpine.yml"
+    variables = "variables.yml"
+
+    def setUp(self):
+        self.deploy_path = tempfile.mkdtemp()
+        self.initial_deploy_path = EnvInit.init.get(EnvConstants.DEPLOY_PATH)
+        self.initial_max_deployments = EnvInit.init.get(EnvConstants.MAX_DEPLOYMENTS)
+        EnvInit.init[EnvConstants.DEPLOY_PATH] = self.deploy_path
+        EnvInit.init[EnvConstants.MAX_DEPLOYMENTS] = 4
+        self.jobs = {}
+        self.active = [{"id": "userdeployment"}]
+        self.patchers = [
+            mock.patch.object(DockerUtils, "get_active_deployments", side_effect=lambda: self.active),
+            mock.patch.object(DockerUtils, "down_deployment"),
+            mock.patch.object(DeploymentJobsSingleton, "get_job", side_effect=lambda job_id: self.jobs.get(job_id)),
+            mock.patch.object(DeploymentJobsSingleton, "submit_deployments", side_effect=self.submit_deployments),
+            mock.patch.object(Render, "BYTECODE_CACHE_DIR", f"{self.deploy_path}/jinja2")
+        ]
+        self.down_deployment = [patcher.start() for patcher in self.patchers][1]
+        Render.clear_envs()
+
+    def tearDown(self):
+        DeploymentPoolSingleton.get_instance().set_pool(self.template, self.variables, 0)
+        self.active = []
+        for job in self.jobs.values():
+            job["status"] = DeploymentJobsSingleton.STATUS_FAILED
+        self.refill()
+        Render.clear_envs()
+        for patcher in self.patchers:
+            patcher.stop()
+        EnvInit.init[EnvConstants.DEPLOY_PATH] = self.initial_deploy_path
+        EnvInit.init[EnvConstants.MAX_DEPLOYMENTS] = self.initial_max_deployments
+        shutil.rmtree(self.deploy_path)
+
+    def submit_deployments(self, deployments, render_start_time):
+        for deployment_id, file in deployments:
+            self.assertTrue(os.path.isfile(file))
+            self.jobs[f"job{deployment_id}"] = {"status": DeploymentJobsSingleton.STATUS_IN_PROGRESS}
+        return [f"job{deployment_id}" for deployment_id, file in deployments]
+
+    def start_all(self):
+        for job_id, job in self.jobs.items():
+            job["status"] = DeploymentJobsSingleton.STATUS_FINISHED
+            self.active.append({"id": job_id[len("job"):]})
+
+    def refill(self):
+        DeploymentPoolSingleton.get_instance().refill()
+        return DeploymentPoolSingleton.get_instance().get_pool(
+            DeploymentPoolSingleton.get_pool_id(self.template, self.variables))
+
+    def test_refill_within_max_deployments(self):
+        pools = DeploymentPoolSingleton.get_instance()
+        pools.set_pool(self.template, self.variables, 5)
+
+        pool = self.refill()
+        # 4 max, 1 user deployment
+        self.assertEqual(len(pool.get('warming')), 3)
+        self.assertEqual(len(pool.get('ready')), 0)
+        self.assertEqual(len(self.jobs), 3)
+
+        pool = self.refill()
+        self.assertEqual(len(self.jobs), 3)
+        self.assertEqual(self.down_deployment.call_count, 0)
+
+    def test_claim(self):
+        pools = DeploymentPoolSingleton.get_instance()
+        pools.set_pool(self.template, self.variables, 2)
+        self.refill()
+        self.assertIsNone(pools.claim(self.template, self.variables, self.active))
+
+        self.start_all()
+        deployment_id = pools.claim(self.template, self.variables, self.active)
+        self.assertIn(f"job{deployment_id}", self.jobs)
+
+        pool = self.refill()
+        self.assertNotIn(deployment_id, pool.get('ready'))
+        self.assertEqual(len(pool.get('ready')), 1)
+        self.assertEqual(len(pool.get('warming')), 1)
+
+    def test_failed_and_expired_members_replaced(self):
+        pools = DeploymentPoolSingleton.get_instance()
+        pools.set_pool(self.template, self.variables, 2)
+        self.refill()
+        failed_job, expired_job = list(self.jobs.keys())
+        self.jobs[failed_job]["status"] = DeploymentJobsSingleton.STATUS_FAILED
+        self.jobs[expired_job]["status"] = DeploymentJobsSingleton.STATUS_FINISHED
+
+        pool = self.refill()
+        self.assertEqual(self.down_deployment.call_count, 2)
+        self.assertEqual(len(pool.get('warming')), 2)
+        self.assertEqual(len(self.jobs), 4)
+
+
+    def test_shrink_leaves_warming_members(self):
+        pools = DeploymentPoolSingleton.get_instance()
+        pools.set_pool(self.template, self.variables, 2)
+        self.refill()
+        self.start_all()
+        pools.set_pool(self.template, self.variables, 3)
+        pool = self.refill()
+        self.assertEqual(len(pool.get('ready')), 2)
+        self.assertEqual(len(pool.get('warming')), 1)
+
+        pools.set_pool(self.template, self.variables, 0)
+        pool = self.refill()
+        # the ready ones are torn down, the warming one is left to its job
+        self.assertEqual(self.down_deployment.call_count, 2)
+        self.assertEqual(pool.get('ready'), [])
+        self.assertEqual(len(pool.get('warming')), 1)
+        warming = pool.get('warming')[0]
+        self.assertNotIn(warming, [call[0][0] for call in self.down_deployment.call_args_list])
+        self.assertTrue(os.path.isdir(f"{self.deploy_path}/{warming}"))
+
+        self.start_all()
+        pool = self.refill()
+        self.assertEqual(self.down_deployment.call_count, 3)
+        self.assertEqual(self.down_deployment.call_args[0][0], warming)
+        self.assertEqual(pool.get('ready') + pool.get('warming'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import unittest
+
+from rest.model.deployment_reader import DeploymentReader
+
+
+class DeploymentReaderTestCase(unittest.TestCase):
+    deployment = """
+    version: '3.3'
+    services:
+      mysql:
+        image: mysql:5.6
+        environment:
+          MYSQL_ROOT_PASSWORD: change_it
+        volumes:
+          - ./data:/var/lib/mysql
+      app:
+        image: app:1.0
+        environment:
+          - DB=mysql
+          - PORT=8080
+        ports:
+          - "8080:8080"
+          - "8081:8081"
+        depends_on:
+          - mysql
+      cache:
+        image: redis:5
+    """
+
+    def test_diff_services_unchanged(self):
+        diff = DeploymentReader.diff_services(self.deployment, self.deployment)
+        self.assertEqual(diff.get('changed'), {})
+        self.assertEqual(diff.get('added'), [])
+        self.assertEqual(diff.get('removed'), [])
+        self.assertEqual(diff.get('unchanged'), ["app", "cache", "mysql"])
+
+    def test_diff_services_equivalent_definitions(self):
+        deployment = self.deployment \
+            .replace("- DB=mysql\n          - PORT=8080", "DB: mysql\n          PORT: 8080") \
+            .replace('- "8080:8080"\n          - "8081:8081"', '- "8081:8081"\n          - "8080:8080"')
+        diff = DeploymentReader.diff_services(self.deployment, deployment)
+        self.assertEqual(diff.get('changed'), {})
+
+    def test_diff_services_changed(self):
+        deployment = self.deployment \
+            .replace("app:1.0", "app:1.1") \
+            .replace("PORT=8080", "PORT=9090") \
+            .replace("      cache:\n        image: redis:5\n", "      proxy:\n        image: nginx:1.19\n")
+        diff = DeploymentReader.diff_services(self.deployment, deployment)
+        self.assertEqual(diff.get('changed'), {"app": ["environment", "image"]})
+        self.assertEqual(diff.get('added'), ["proxy"])
+        self.assertEqual(diff.get('removed'), ["cache"])
+        self.assertEqual(diff.get('unchanged'), ["mysql"])
+        self.assertEqual(DeploymentReader.get_images_for_deployment(deployment, ["app", "proxy"]),
+                         ["app:1.1", "nginx:1.19"])
+
+    def test_diff_top_level_changed(self):
+        self.assertEqual(DeploymentReader.diff_services(self.deployment, self.deployment).get('top_level'), [])
+        deployment = self.deployment + """
+    networks:
+      backend: {}
+    x-metadata:
+      name: mysql
+    """
+        diff = DeploymentReader.diff_services(self.deployment, deployment)
+        self.assertEqual(diff.get('top_level'), ["networks"])
+        self.assertEqual(diff.get('changed'), {})
+        deployment = self.deployment.replace("version: '3.3'", "version: '3.4'")
+        self.assertEqual(DeploymentReader.diff_services(self.deployment, deployment).get('top_level'), [])
+
+    def test_diff_services_invalid_old_file(self):
+        diff = DeploymentReader.diff_services("", self.deployment)
+        self.assertEqual(diff.get('added'), ["app", "cache", "mysql"])
+
+
+if __name__ == '__main__':
+    unittest.main()
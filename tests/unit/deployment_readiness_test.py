@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from rest.environment.deployment_readiness import DeploymentReadinessSingleton, ReadinessWatcher
+from rest.utils.docker_utils import DockerUtils
+
+
+class DeploymentReadinessTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.poll_interval = ReadinessWatcher.POLL_INTERVAL
+        ReadinessWatcher.POLL_INTERVAL = 0.05
+
+    def tearDown(self):
+        ReadinessWatcher.POLL_INTERVAL = self.poll_interval
+
+    @staticmethod
+    def container(service, status):
+        return {"Names": f"deployment_{service}_1", "Status": status,
+                "Labels": {"com.docker.compose.service": service}}
+
+    def test_concurrent_waiters_share_one_watcher(self):
+        states = [
+            [self.container("mysql", "Up 1 second (health: starting)"), self.container("app", "Created")],
+            [self.container("mysql", "Up 2 seconds (health: starting)"), self.container("app", "Up 1 second")],
+            [self.container("mysql", "Up 3 seconds (healthy)"), self.container("app", "Up 2 seconds")]
+        ]
+
+        def ps_project(env_id):
+            return states.pop(0) if len(states) > 1 else states[0]
+
+        readiness = DeploymentReadinessSingleton.get_instance()
+        with mock.patch.object(DockerUtils, "ps_project", side_effect=ps_project) as ps:
+            with ThreadPoolExecutor(max_workers=20) as executor:
+                results = list(executor.map(lambda i: readiness.wait("shared", ["mysql", "app"], 5), range(20)))
+
+        self.assertLessEqual(ps.call_count, 4)
+        for result in results:
+            self.assertTrue(result.get('ready'))
+            self.assertEqual(result.get('missing'), [])
+            self.assertIsNotNone(result.get('readyin'))
+            containers = {container.get('service'): container for container in result.get('containers')}
+            self.assertEqual(containers.get('mysql').get('health'), "healthy")
+            self.assertLessEqual(containers.get('app').get('readyin'), containers.get('mysql').get('readyin'))
+        self.assertNotIn("shared", readiness.get_watchers())
+
+    def test_timeout_not_ready(self):
+        readiness = DeploymentReadinessSingleton.get_instance()
+        with mock.patch.object(DockerUtils, "ps_project",
+                               return_value=[self.container("mysql", "Up 1 second (unhealthy)")]):
+            start_time = time.time()
+            result = readiness.wait("unhealthy", ["mysql", "app"], 0.3)
+            self.assertLess(time.time() - start_time, 2)
+            time.sleep(0.2)
+
+        self.assertFalse(result.get('ready'))
+        self.assertEqual(result.get('missing'), ["app"])
+        self.assertEqual(result.get('containers')[0].get('health'), "unhealthy")
+        # nobody waits anymore, the watcher is gone
+        self.assertNotIn("unhealthy", readiness.get_watchers())
+
+    def test_one_shot_service_exited_ok(self):
+        self.assertTrue(ReadinessWatcher.is_ready("Exited (0) 3 seconds ago", None))
+        self.assertFalse(ReadinessWatcher.is_ready("Exited (1) 3 seconds ago", None))
+        self.assertFalse(ReadinessWatcher.is_ready("Up 3 seconds (health: starting)", "starting"))
+        self.assertEqual(ReadinessWatcher.get_health("Up 3 seconds"), None)
+
+
+    def test_timeout_counts_the_first_poll(self):
+        readiness = DeploymentReadinessSingleton.get_instance()
+        release = threading.Event()
+
+        def ps_project(env_id):
+            release.wait(10)
+            return [self.container("mysql", "Up 1 second")]
+
+        with mock.patch.object(DockerUtils, "ps_project", side_effect=ps_project):
+            result = readiness.wait("slowpoll", ["mysql"], 0.2)
+            release.set()
+
+        self.assertFalse(result.get('ready'))
+        self.assertIsNone(result.get('containers'))
+        self.assertLess(result.get('waited'), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
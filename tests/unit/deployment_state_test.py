@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import unittest
+
+from rest.environment.deployment_state import DeploymentStateSingleton
+from rest.utils.docker_utils import DockerUtils
+
+
+class DeploymentStateTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.state = DeploymentStateSingleton.get_instance()
+        self.state.resync([])
+
+    def tearDown(self):
+        self.state.set_live(False)
+        self.state.resync([])
+
+    @staticmethod
+    def event(action, container_id, project):
+        return {
+            "Type": "container",
+            "Action": action,
+            "Actor": {
+                "ID": container_id,
+                "Attributes": {
+                    "image": "alpine:3.9.4",
+                    "name": f"{project}_container_1",
+                    DockerUtils.COMPOSE_PROJECT_LABEL: project
+                }
+            }
+        }
+
+    def test_start_event_adds_container(self):
+        self.state.apply_event(self.event("start", "a" * 64, "deployment1"))
+        containers = self.state.get_containers()
+        self.assertEqual(len(containers), 1)
+        self.assertEqual(containers[0].get('ID'), "a" * 12)
+        self.assertEqual(containers[0].get('Names'), "deployment1_container_1")
+        self.assertEqual(containers[0].get('Labels').get(DockerUtils.COMPOSE_PROJECT_LABEL), "deployment1")
+        self.assertIn("Up", containers[0].get('Status'))
+
+    def test_create_event_ignored(self):
+        self.state.apply_event(self.event("create", "a" * 64, "deployment1"))
+        self.assertEqual(self.state.get_containers(), [])
+        self.state.apply_event(self.event("start", "a" * 64, "deployment1"))
+        self.assertEqual([container.get('ID') for container in self.state.get_containers()], ["a" * 12])
+
+    def test_die_and_destroy_events_remove_container(self):
+        self.state.apply_event(self.event("start", "a" * 64, "deployment1"))
+        self.state.apply_event(self.event("start", "b" * 64, "deployment2"))
+        self.state.apply_event(self.event("die", "a" * 64, "deployment1"))
+        self.assertEqual([container.get('ID') for container in self.state.get_containers()], ["b" * 12])
+        self.state.apply_event(self.event("destroy", "b" * 64, "deployment2"))
+        self.assertEqual(self.state.get_containers(), [])
+
+    def test_resync_replaces_containers(self):
+        self.state.apply_event(self.event("start", "a" * 64, "deployment1"))
+        self.state.resync([{"ID": "c" * 12, "Names": "deployment3_container_1", "Labels": {}}])
+        self.assertEqual([container.get('ID') for container in self.state.get_containers()], ["c" * 12])
+
+    def test_age_only_when_live(self):
+        self.assertEqual(self.state.get_age(), 0)
+        self.state.set_live(True)
+        self.assertGreaterEqual(self.state.get_age(), 0)
+        self.assertTrue(self.state.is_live())
+
+    def test_containers_grouped_by_deployment(self):
+        self.state.apply_event(self.event("start", "a" * 64, "deployment1"))
+        self.state.apply_event(self.event("start", "b" * 64, "deployment1"))
+        self.state.apply_event(self.event("start", "c" * 64, "deployment2"))
+        self.state.set_live(True)
+        self.assertEqual(len(DockerUtils.get_deployment_containers("deployment1")), 2)
+        self.assertEqual(len(DockerUtils.get_deployment_containers("deployment2")), 1)
+        self.assertEqual(DockerUtils.get_deployment_containers("dummy"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
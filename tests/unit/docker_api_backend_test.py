@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+import json
+import os
+import shutil
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from rest.utils.docker_api_backend import DockerApiBackend
+
+
+class FakeDockerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    dropped = 0
+    containers = [{
+        "Id": "a" * 64,
+        "Names": ["/deployment1_container_1"],
+        "Image": "alpine:3.9.4",
+        "Command": "sleep 3600",
+        "Created": time.time() - 300,
+        "Ports": [{"PrivatePort": 8080, "PublicPort": 8081, "Type": "tcp", "IP": "0.0.0.0"}],
+        "Labels": {"com.docker.compose.project": "deployment1"},
+        "State": "running",
+        "Status": "Up 5 minutes"
+    }]
+
+    def setup(self):
+        super().setup()
+        FakeDockerHandler.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def address_string(self):
+        return "docker.sock"
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/containers/json"):
+            self.send_json(200, self.containers)
+        elif self.path.startswith("/networks"):
+            self.send_json(200, [{"Id": "b" * 64, "Name": "estuarydeployer_default", "Driver": "bridge",
+                                  "Scope": "local"}])
+        elif self.path == "/exec/exec1/json":
+            self.send_json(200, {"ExitCode": 3, "Pid": 42})
+        elif self.path == "/_ping":
+            # the daemon closes the idle connection, without telling the client
+            self.send_json(200, "OK")
+            self.close_connection = True
+        elif self.path == "/drop":
+            FakeDockerHandler.dropped += 1
+            self.close_connection = True
+        else:
+            self.send_json(404, {"message": "page not found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/networks/estuarydeployer_default/connect":
+            self.send_json(403, {"message": "endpoint with name x already exists in network estuarydeployer_default"})
+        elif self.path == "/containers/container1/exec":
+            self.send_json(201, {"Id": "exec1", "Cmd": json.loads(body).get("Cmd")})
+        elif self.path == "/exec/exec1/start":
+            # raw multiplexed stream, the daemon closes the connection at the end
+            out, err = b"hello\n", b"oops\n"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.docker.raw-stream")
+            self.end_headers()
+            self.wfile.write(struct.pack(">BxxxL", 1, len(out)) + out + struct.pack(">BxxxL", 2, len(err)) + err)
+            self.close_connection = True
+        elif self.path.startswith("/images/create"):
+            # the progress is streamed, a missing image fails after the 200 status
+            image = "doesnotexist" if "doesnotexist" in self.path else "alpine"
+            messages = [{"status": "Pulling from library/alpine", "id": "3.9.4"},
+                        {"status": "Digest: sha256:" + "c" * 64},
+                        {"status": f"Status: Downloaded newer image for {image}:3.9.4"}]
+            if image == "doesnotexist":
+                messages = [{"error": "manifest for doesnotexist:3.9.4 not found"}]
+            data = "\r\n".join([json.dumps(message) for message in messages]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path == "/volumes/prune":
+            self.send_json(200, {"VolumesDeleted": ["v1"], "SpaceReclaimed": 10})
+        elif self.path == "/drop":
+            # the daemon applied the action, the connection broke before the response
+            FakeDockerHandler.dropped += 1
+            self.close_connection = True
+        else:
+            self.send_json(404, {"message": "page not found"})
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class DockerApiBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp_dir, "docker.sock")
+        self.server = FakeDockerServer(self.socket_path, FakeDockerHandler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        FakeDockerHandler.connections = 0
+        FakeDockerHandler.dropped = 0
+        self.backend = DockerApiBackend(socket_path=self.socket_path)
+
+    def tearDown(self):
+        self.backend.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_connection_reused(self):
+        for i in range(20):
+            self.assertEqual(len(self.backend.ps_all()), 1)
+        self.assertEqual(FakeDockerHandler.connections, 1)
+
+    def test_post_not_sent_again_after_sent(self):
+        client = self.backend.client
+        client.request("GET", "/containers/json")
+        with self.assertRaises(Exception):
+            client.request("POST", "/drop")
+        self.assertEqual(FakeDockerHandler.dropped, 1)
+
+    def test_get_sent_again_on_broken_reused_connection(self):
+        client = self.backend.client
+        client.request("GET", "/containers/json")
+        with self.assertRaises(Exception):
+            client.request("GET", "/drop")
+        # once on the reused connection, once on a new one
+        self.assertEqual(FakeDockerHandler.dropped, 2)
+
+    def test_connection_closed_by_daemon_not_reused(self):
+        client = self.backend.client
+        self.assertEqual(client.request("GET", "/_ping"), (200, "OK"))
+        time.sleep(0.1)
+        self.assertEqual(client.request("POST", "/volumes/prune")[0], 200)
+        self.assertEqual(FakeDockerHandler.connections, 2)
+
+    def test_ps_all_normalized(self):
+        container = self.backend.ps_all()[0]
+        self.assertEqual(container.get('ID'), "a" * 12)
+        self.assertEqual(container.get('Names'), "deployment1_container_1")
+        self.assertEqual(container.get('Ports'), "0.0.0.0:8081->8080/tcp")
+        self.assertEqual(container.get('RunningFor'), "5 minutes ago")
+        self.assertEqual(container.get('Labels').get('com.docker.compose.project'), "deployment1")
+
+    def test_ps_table_output(self):
+        status = self.backend.ps("deployment1")
+        lines = status.get('out').split("\n")
+        self.assertEqual(status.get('code'), 0)
+        self.assertEqual(lines[0], DockerApiBackend.PS_HEADER)
+        self.assertEqual(len(lines[1:]), 1)
+        self.assertIn("Up 5 minutes", lines[1])
+
+    def test_network_ls_output(self):
+        status = self.backend.network_ls("deployer")
+        self.assertEqual(status.get('out').split("\n")[1].split(" ")[0].strip(), "b" * 12)
+
+    def test_network_connect_error_like_cli(self):
+        status = self.backend.network_connect("estuarydeployer_default", "container1")
+        self.assertEqual(status.get('code'), 1)
+        self.assertIn("Error response from daemon".lower(), status.get('err').lower())
+        self.assertIn("already exists in network", status.get('err'))
+
+    def test_exec_demultiplexed(self):
+        status = self.backend.exec("container1", ["echo", "hello"])
+        self.assertEqual(status.get('out'), "hello")
+        self.assertEqual(status.get('err'), "oops")
+        self.assertEqual(status.get('code'), 3)
+        self.assertEqual(status.get('pid'), 42)
+        # the exec stream closes its connection, the next calls still work
+        self.assertEqual(len(self.backend.ps_all()), 1)
+
+    def test_daemon_unreachable_like_cli(self):
+        backend = DockerApiBackend(socket_path=os.path.join(self.tmp_dir, "missing.sock"))
+        self.assertEqual(backend.ps_all(), [])
+        status = backend.ps("deployment1")
+        self.assertIn("Cannot connect to the Docker daemon".lower(), status.get('err').lower())
+        self.assertEqual(status.get('code'), 1)
+
+    def test_pull(self):
+        status = self.backend.pull("alpine:3.9.4")
+        self.assertEqual(status.get('code'), 0)
+        self.assertEqual(status.get('out').split("\n")[-1], "Status: Downloaded newer image for alpine:3.9.4")
+
+    def test_pull_error_after_status_ok(self):
+        status = self.backend.pull("doesnotexist:3.9.4")
+        self.assertEqual(status.get('code'), 1)
+        self.assertIn("not found", status.get('err'))
+
+    def test_volume_prune(self):
+        status = self.backend.volume_prune()
+        self.assertIn("v1", status.get('out'))
+        self.assertEqual(status.get('code'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
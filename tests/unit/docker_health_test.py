@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+import unittest
+from unittest import mock
+
+from rest.environment.docker_health import DockerHealthSingleton
+from rest.utils.docker_utils import DockerUtils
+
+
+class DockerHealthTestCase(unittest.TestCase):
+    alive = {"out": "20.10.5", "err": "", "code": 0, "pid": 0, "args": []}
+    down = {"out": "", "err": "Cannot connect to the Docker daemon at unix:///var/run/docker.sock.", "code": 1,
+            "pid": 0, "args": []}
+
+    def test_probe_cached_within_ttl(self):
+        health = DockerHealthSingleton.get_instance()
+        with mock.patch.object(DockerUtils, "ping", return_value=self.alive) as ping:
+            health.probe()
+            for i in range(100):
+                self.assertTrue(health.is_alive())
+        self.assertEqual(ping.call_count, 1)
+
+    def test_probe_daemon_down(self):
+        health = DockerHealthSingleton.get_instance()
+        with mock.patch.object(DockerUtils, "ping", return_value=self.down):
+            status = health.probe()
+        self.assertFalse(status.get('alive'))
+        self.assertIn("Cannot connect to the Docker daemon", status.get('err'))
+        self.assertIsNotNone(status.get('checkedat'))
+
+    def test_probe_docker_missing(self):
+        health = DockerHealthSingleton.get_instance()
+        with mock.patch.object(DockerUtils, "ping", side_effect=FileNotFoundError("docker")):
+            status = health.probe()
+        self.assertFalse(status.get('alive'))
+        self.assertIn("docker", status.get('err'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import asyncio
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from rest.api.constants.env_constants import EnvConstants
+from rest.api.constants.env_init import EnvInit
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.docker_cli_backend import DockerCliBackend
+from rest.utils.docker_utils import DockerUtils
+from rest.utils.io_utils import IOUtils
+
+
+class DockerUtilsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.deploy_path = tempfile.mkdtemp()
+        self.initial_deploy_path = EnvInit.init.get(EnvConstants.DEPLOY_PATH)
+        EnvInit.init[EnvConstants.DEPLOY_PATH] = self.deploy_path
+
+    def tearDown(self):
+        EnvInit.init[EnvConstants.DEPLOY_PATH] = self.initial_deploy_path
+        shutil.rmtree(self.deploy_path)
+
+    @staticmethod
+    def docker_ps_json(deployments):
+        lines = []
+        for deployment in deployments:
+            lines.append(json.dumps({
+                "ID": deployment[:12],
+                "Image": "alpine:3.9.4",
+                "Command": "\"sleep 3600\"",
+                "RunningFor": "5 minutes ago",
+                "Status": "Up 5 minutes",
+                "Ports": "",
+                "Names": f"{deployment}_container_1",
+                "Labels": f"{DockerUtils.COMPOSE_PROJECT_LABEL}={deployment},com.docker.compose.service=container"
+            }))
+
+        return {"out": "\n".join(lines), "err": "", "code": 0, "pid": 0, "args": []}
+
+    @parameterized.expand([
+        (1,),
+        (10,),
+        (100,)
+    ])
+    def test_get_active_deployments_single_subprocess(self, folders):
+        deployments = [f"deployment{i}" for i in range(folders)]
+        for deployment in deployments:
+            IOUtils.create_dir(f"{self.deploy_path}/{deployment}")
+
+        with mock.patch.object(CmdUtils, "run_cmd_shell_false",
+                               return_value=self.docker_ps_json(deployments[::2])) as run_cmd:
+            active_deployments = DockerUtils.get_active_deployments()
+
+        self.assertEqual(run_cmd.call_count, 1)
+        self.assertEqual(sorted([item.get('id') for item in active_deployments]), sorted(deployments[::2]))
+        for item in active_deployments:
+            self.assertEqual(len(item.get('containers')), 1)
+            self.assertIn("Up 5 minutes", item.get('containers')[0])
+
+    def test_get_active_deployments_no_folders_no_subprocess(self):
+        with mock.patch.object(CmdUtils, "run_cmd_shell_false") as run_cmd:
+            self.assertEqual(DockerUtils.get_active_deployments(), [])
+        self.assertEqual(run_cmd.call_count, 0)
+
+    def test_down_deployments_bounded_parallel(self):
+        running = []
+        max_running = []
+
+        async def down(file):
+            running.append(file)
+            max_running.append(len(running))
+            await asyncio.sleep(0.1)
+            running.remove(file)
+            return {"out": "", "err": "", "code": 0 if "deployment3" not in file else 1, "pid": 0, "args": []}
+
+        deployments = [f"deployment{i}" for i in range(8)]
+        with mock.patch.object(DockerUtils, "down_async", side_effect=down):
+            result = DockerUtils.down_deployments(deployments, max_workers=4)
+
+        self.assertEqual(max(max_running), 4)
+        self.assertEqual([item.get('id') for item in result], deployments)
+        self.assertEqual([item.get('code') for item in result].count(1), 1)
+        self.assertEqual(result[3].get('code'), 1)
+
+    def test_parse_labels(self):
+        self.assertEqual(DockerCliBackend.parse_labels("a=b,c=d=e"), {"a": "b", "c": "d=e"})
+        self.assertEqual(DockerCliBackend.parse_labels(""), {})
+        self.assertEqual(DockerCliBackend.parse_labels({"a": "b"}), {"a": "b"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from rest.api.constants.env_constants import EnvConstants
+from rest.api.schedulers.config_reload_scheduler import ConfigReloadScheduler
+from rest.environment.environment import EnvironmentSingleton
+from rest.utils.env_startup import EnvStartupSingleton, StartupConfig
+
+
+class EnvStartupTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.properties = tempfile.NamedTemporaryFile(suffix=".properties", delete=False)
+        self.properties.close()
+        self.file = mock.patch.object(EnvironmentSingleton, "_EnvironmentSingleton__file", self.properties.name)
+        self.file.start()
+
+    def tearDown(self):
+        os.unlink(self.properties.name)
+        EnvStartupSingleton.get_instance().reload()
+        self.file.stop()
+        EnvStartupSingleton.get_instance().reload()
+
+    def write_properties(self, content):
+        with open(self.properties.name, "w") as file:
+            file.write(content)
+        # the mtime must move even on coarse file systems
+        mtime = time.time() + 1
+        os.utime(self.properties.name, (mtime, mtime))
+
+    def test_config_is_typed_and_read_only(self):
+        config = EnvStartupSingleton.get_instance().get_config()
+        self.assertIsInstance(config, StartupConfig)
+        self.assertIsInstance(config.PORT, int)
+        with self.assertRaises(AttributeError):
+            config.PORT = 8081
+        self.assertIs(EnvStartupSingleton.get_instance().get_config(), config)
+
+    def test_config_env_vars_compatible_and_cached(self):
+        config = EnvStartupSingleton.get_instance().get_config()
+        config_env_vars = EnvStartupSingleton.get_instance().get_config_env_vars()
+        self.assertEqual(config_env_vars.get(EnvConstants.PORT), config.PORT)
+        self.assertEqual(config_env_vars.get(EnvConstants.HTTP_AUTH_TOKEN), config.HTTP_AUTH_TOKEN)
+        self.assertIs(EnvStartupSingleton.get_instance().get_config_env_vars(), config_env_vars)
+
+    def test_reload_on_properties_change(self):
+        startup = EnvStartupSingleton.get_instance()
+        startup.reload()
+        self.assertEqual(startup.reload_if_changed(), [])
+
+        self.write_properties("PROCESS_RETENTION=7\nCMD_TIMEOUTS=query=5\n")
+        config = startup.get_config()
+        self.assertEqual(sorted(startup.reload_if_changed()), [EnvConstants.CMD_TIMEOUTS,
+                                                               EnvConstants.PROCESS_RETENTION])
+        self.assertEqual(startup.get_config().PROCESS_RETENTION, 7)
+        self.assertEqual(startup.get_config().CMD_TIMEOUTS, {"query": 5})
+        self.assertEqual(startup.get_config_env_vars().get(EnvConstants.PROCESS_RETENTION), 7)
+        # the old config object is not changed, the readers holding it see a consistent config
+        self.assertEqual(config.PROCESS_RETENTION, 3600)
+        self.assertEqual(startup.reload_if_changed(), [])
+
+    def test_invalid_reload_applies_nothing_and_retries(self):
+        startup = EnvStartupSingleton.get_instance()
+        startup.reload()
+        config = startup.get_config()
+        self.write_properties("PROCESS_RETENTION=x\nRELOAD_VAR=1\n")
+        with self.assertRaisesRegex(ValueError, "PROCESS_RETENTION='x'"):
+            startup.reload_if_changed()
+        self.assertIs(startup.get_config(), config)
+        self.assertNotIn("RELOAD_VAR", EnvironmentSingleton.get_instance().get_virtual_env())
+        self.assertEqual(ConfigReloadScheduler.reload(if_changed=True), [])
+
+        self.write_properties("PROCESS_RETENTION=7\nRELOAD_VAR=1\n")
+        self.assertEqual(startup.reload_if_changed(), [EnvConstants.PROCESS_RETENTION])
+        self.assertEqual(EnvironmentSingleton.get_instance().get_virtual_env().get("RELOAD_VAR"), "1")
+
+    def test_invalid_timeouts_rejected(self):
+        startup = EnvStartupSingleton.get_instance()
+        for timeouts in ["query=abc", "query", "=5", "query=-1"]:
+            self.write_properties(f"CMD_TIMEOUTS={timeouts}\n")
+            with self.assertRaisesRegex(ValueError, "CMD_TIMEOUTS"):
+                startup.reload()
+        self.assertEqual(startup.get_config().CMD_TIMEOUTS, {})
+        with self.assertRaises(TypeError):
+            startup.get_config().CMD_TIMEOUTS["query"] = 5
+
+    def test_system_env_wins_over_properties(self):
+        self.write_properties("PORT=9090\n")
+        with mock.patch.dict(EnvironmentSingleton.get_instance().get_env(), {EnvConstants.PORT: "8081"}):
+            EnvStartupSingleton.get_instance().reload()
+            self.assertEqual(EnvStartupSingleton.get_instance().get_config().PORT, 8081)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
-from rest.environment.environment import EnvironmentSingleton
+from rest.environment.environment import EnvironmentSingleton, FrozenEnv
 
 
 class RenderTestCase(unittest.TestCase):
@@ -65,6 +67,90 @@ class RenderTestCase(unittest.TestCase):
         self.assertEqual(env.get_virtual_env().get(EnvironmentSingleton.VIRTUAL_ENV_MAX_SIZE), None)
         self.assertGreater(len(env.get_env()), 0)
 
+    def test_snapshot_rebuilt_only_on_change(self):
+        env = EnvironmentSingleton.get_instance()
+        env.set_env_var("ENV_TYPE", "v1")
+        snapshot = env.get_env_and_virtual_env()
+        version = env.get_version()
+        self.assertIs(env.get_env_and_virtual_env(), snapshot)
+
+        # same value, nothing changed
+        env.set_env_var("ENV_TYPE", "v1")
+        self.assertIs(env.get_env_and_virtual_env(), snapshot)
+        self.assertEqual(env.get_version(), version)
+
+        env.set_env_var("ENV_TYPE", "v2")
+        self.assertGreater(env.get_version(), version)
+        self.assertIsNot(env.get_env_and_virtual_env(), snapshot)
+        self.assertEqual(env.get_env_and_virtual_env().get("ENV_TYPE"), "v2")
+        self.assertEqual(snapshot.get("ENV_TYPE"), "v1")
+
+    def test_snapshot_read_only(self):
+        snapshot = EnvironmentSingleton.get_instance().get_env_and_virtual_env()
+        self.assertIsInstance(snapshot, FrozenEnv)
+        with self.assertRaises(TypeError):
+            snapshot["ENV_TYPE"] = "v3"
+        with self.assertRaises(TypeError):
+            snapshot.update({"ENV_TYPE": "v3"})
+
+    def test_snapshot_shared_by_concurrent_callers(self):
+        env = EnvironmentSingleton.get_instance()
+        snapshot = env.get_env_and_virtual_env()
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(lambda i: env.get_env_and_virtual_env(), range(1000)))
+        for result in results:
+            self.assertIs(result, snapshot)
+
+    def test_overlay_seen_by_calling_thread_only(self):
+        env = EnvironmentSingleton.get_instance()
+        seen = {}
+        with env.overlay({"OVERLAY_VAR": "v1"}) as overlay:
+            self.assertEqual(overlay, {"OVERLAY_VAR": "v1"})
+            self.assertEqual(env.get_env_and_virtual_env().get("OVERLAY_VAR"), "v1")
+            thread = threading.Thread(target=lambda: seen.update(
+                {"other": env.get_env_and_virtual_env().get("OVERLAY_VAR")}))
+            thread.start()
+            thread.join()
+        self.assertIsNone(seen.get("other"))
+        self.assertIsNone(env.get_env_and_virtual_env().get("OVERLAY_VAR"))
+        self.assertNotIn("OVERLAY_VAR", env.get_virtual_env())
+
+    def test_overlay_concurrent_no_cross_talk(self):
+        env = EnvironmentSingleton.get_instance()
+        barrier = threading.Barrier(10)
+
+        def render(i):
+            with env.overlay({"OVERLAY_REQUEST": str(i)}):
+                barrier.wait()
+                return env.get_env_and_virtual_env().get("OVERLAY_REQUEST")
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            self.assertEqual(list(executor.map(render, range(10))), [str(i) for i in range(10)])
+
+    def test_overlay_system_env_wins_and_capped(self):
+        env = EnvironmentSingleton.get_instance()
+        system_key = next(iter(env.get_env()))
+        env_vars = {f"OVERLAY_{i}": i for i in range(EnvironmentSingleton.VIRTUAL_ENV_MAX_SIZE + 10)}
+        env_vars[system_key] = "overridden"
+        with env.overlay(env_vars) as overlay:
+            self.assertEqual(len(overlay), EnvironmentSingleton.VIRTUAL_ENV_MAX_SIZE)
+            self.assertEqual(overlay.get("OVERLAY_0"), "0")
+            self.assertEqual(env.get_env_and_virtual_env().get(system_key), env.get_env().get(system_key))
+
+    def test_overlay_nested_and_over_virtual_env(self):
+        env = EnvironmentSingleton.get_instance()
+        env.set_env_var("ENV_TYPE", "global")
+        with env.overlay({"ENV_TYPE": "outer"}):
+            with env.overlay({"OVERLAY_INNER": "inner"}):
+                self.assertEqual(env.get_overlay(), {"ENV_TYPE": "outer", "OVERLAY_INNER": "inner"})
+            self.assertEqual(env.get_overlay(), {"ENV_TYPE": "outer"})
+            self.assertEqual(env.get_env_and_virtual_env().get("ENV_TYPE"), "outer")
+            # the overlay stays on top when the virtual env changes
+            env.set_env_var("ENV_TYPE", "changed")
+            self.assertEqual(env.get_env_and_virtual_env().get("ENV_TYPE"), "outer")
+            self.assertEqual(env.get_env_and_virtual_env().get("OVERLAY_INNER"), None)
+        self.assertEqual(env.get_env_and_virtual_env().get("ENV_TYPE"), "changed")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from rest.environment.image_pulls import ImagePullsSingleton
+from rest.model.deployment_reader import DeploymentReader
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.docker_utils import DockerUtils
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class ImagePullsTestCase(unittest.TestCase):
+    pulled = {"out": "", "err": "", "code": 0, "pid": 0, "args": []}
+    not_found = {"out": "", "err": "manifest unknown", "code": 1, "pid": 0, "args": []}
+
+    def slow_pull(self, image):
+        time.sleep(0.2)
+        return self.pulled
+
+    def test_concurrent_pulls_single_flight(self):
+        pulls = ImagePullsSingleton.get_instance()
+        image = f"single-flight-{threading.get_ident()}:1.0"
+        with mock.patch.object(DockerUtils, "pull_image", side_effect=self.slow_pull) as pull_image:
+            with ThreadPoolExecutor(max_workers=20) as executor:
+                results = list(executor.map(lambda i: pulls.pull_images([image]), range(20)))
+        self.assertEqual(pull_image.call_count, 1)
+        statuses = [result.get('images').get(image).get('status') for result in results]
+        self.assertEqual(statuses.count(ImagePullsSingleton.STATUS_PULLED), 1)
+        self.assertEqual(statuses.count(ImagePullsSingleton.STATUS_SHARED), 19)
+        for result in results:
+            self.assertEqual(result.get('code'), 0)
+
+    def test_fresh_pull_skipped(self):
+        pulls = ImagePullsSingleton.get_instance()
+        with mock.patch.object(DockerUtils, "pull_image", return_value=self.pulled) as pull_image:
+            pulls.pull("fresh:1.0")
+            result = pulls.pull("fresh:1.0")
+        self.assertEqual(pull_image.call_count, 1)
+        self.assertEqual(result.get('status'), ImagePullsSingleton.STATUS_FRESH)
+
+    def test_failed_pull_not_cached(self):
+        pulls = ImagePullsSingleton.get_instance()
+        with mock.patch.object(DockerUtils, "pull_image", return_value=self.not_found) as pull_image:
+            result = pulls.pull_images(["doesnotexist:1.0"])
+            pulls.pull_images(["doesnotexist:1.0"])
+        self.assertEqual(pull_image.call_count, 2)
+        self.assertEqual(result.get('code'), 1)
+        self.assertEqual(result.get('images').get("doesnotexist:1.0").get('status'),
+                         ImagePullsSingleton.STATUS_FAILED)
+
+    def test_images_for_deployment(self):
+        data = """
+        version: '3.3'
+        services:
+          alpine:
+            image: alpine
+          mysql:
+            image: mysql:5.6
+          mysql2:
+            image: mysql:5.6
+          app:
+            build: .
+            image: app:local
+          tagged:
+            image: registry:5000/estuary/app:${TAG}
+        """
+        self.assertEqual(DeploymentReader.get_images_for_deployment(data), ["alpine:latest", "mysql:5.6"])
+        self.assertEqual(DeploymentReader.get_images_for_deployment("invalid"), [])
+        self.assertEqual(DeploymentReader.normalize_image("registry:5000/app"), "registry:5000/app:latest")
+
+
+    def test_follower_gives_up_after_the_deploy_timeout(self):
+        pulls = ImagePullsSingleton.get_instance()
+        image = f"hanging-{threading.get_ident()}:1.0"
+        release = threading.Event()
+        with mock.patch.object(DockerUtils, "pull_image", side_effect=lambda image: release.wait(5) and self.pulled), \
+                mock.patch.object(CmdUtils, "get_timeout", return_value=0.2):
+            leader = threading.Thread(target=pulls.pull, args=(image,))
+            leader.start()
+            while image not in [args[0][0] for args in DockerUtils.pull_image.call_args_list]:
+                time.sleep(0.01)
+            result = pulls.pull(image)
+            release.set()
+            leader.join()
+        self.assertEqual(result.get('status'), ImagePullsSingleton.STATUS_FAILED)
+        self.assertIsNone(result.get('code'))
+        self.assertIn("Timed out", result.get('err'))
+
+    def test_pulls_capped(self):
+        pulls = ImagePullsSingleton.get_instance()
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def pull_image(image):
+            with lock:
+                running.append(image)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(image)
+            return self.pulled
+
+        images = [f"capped{i}-{threading.get_ident()}:1.0" for i in range(10)]
+        with mock.patch.object(DockerUtils, "pull_image", side_effect=pull_image), \
+                mock.patch.object(EnvStartupSingleton, "get_config",
+                                  return_value=EnvStartupSingleton.get_instance().get_config()._replace(
+                                      IMAGE_PULL_WORKERS=2)):
+            result = pulls.pull_images(images)
+        self.assertEqual(result.get('code'), 0)
+        self.assertEqual(len(result.get('images')), 10)
+        self.assertLessEqual(max(max_running), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+import unittest
+
+from rest.utils.line_buffer import LineBuffer
+
+
+class LineBufferTestCase(unittest.TestCase):
+
+    def test_lines_split_across_chunks(self):
+        line_buffer = LineBuffer()
+        for chunk in [b"fir", b"st\nsec", b"ond\n", b"third"]:
+            line_buffer.feed(chunk)
+        line_buffer.close()
+        self.assertEqual(line_buffer.get_text(), "first\nsecond\nthird")
+        self.assertEqual(line_buffer.get_stats(), {"bytes": 18, "lines": 3, "dropped": 0})
+
+    def test_head_and_tail_retention(self):
+        line_buffer = LineBuffer(head=2, tail=3)
+        line_buffer.feed("".join([f"{i}\n" for i in range(10)]).encode())
+        line_buffer.close()
+        self.assertEqual(line_buffer.get_text(), "0\n1\n... 5 lines dropped ...\n7\n8\n9")
+        self.assertEqual(line_buffer.get_stats().get('lines'), 10)
+        self.assertEqual(line_buffer.get_stats().get('dropped'), 5)
+
+    def test_tail_only_like_before(self):
+        line_buffer = LineBuffer(tail=2)
+        line_buffer.feed(b"0\n1\n2\n")
+        line_buffer.close()
+        self.assertEqual(line_buffer.get_text(), "1\n2")
+
+    def test_long_line_cut(self):
+        line_buffer = LineBuffer()
+        for i in range(10):
+            line_buffer.feed(b"x" * LineBuffer.MAX_LINE_BYTES)
+        line_buffer.feed(b"\n")
+        line_buffer.close()
+        self.assertEqual(len(line_buffer.get_text()), LineBuffer.MAX_LINE_BYTES)
+        self.assertEqual(line_buffer.get_stats().get('bytes'), 10 * LineBuffer.MAX_LINE_BYTES + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
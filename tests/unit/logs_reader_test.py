@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import unittest
+
+from rest.model.logs_reader import LogsReader
+
+
+class LogsReaderTestCase(unittest.TestCase):
+    out = "\n".join([
+        "Attaching to deployment_app_1, deployment_mysql_1",
+        "mysql_1  | 2020-06-01T10:00:00.1Z mysqld starting",
+        "app_1    | 2020-06-01T10:00:00.12Z app waiting for mysql",
+        "\x1b[36mmysql_1  |\x1b[0m 2020-06-01T10:00:01.000000001Z mysqld ready for connections",
+        "app_1    | 2020-06-01T10:00:02Z ERROR connection refused",
+        "app_1    | 2020-06-01T10:00:03.5Z app started"
+    ])
+
+    def test_normalize_timestamp(self):
+        self.assertEqual(LogsReader.normalize_timestamp("2020-06-01T10:00:00.12Z"), "2020-06-01T10:00:00.120000000Z")
+        self.assertEqual(LogsReader.normalize_timestamp("2020-06-01T10:00:00Z"), "2020-06-01T10:00:00.000000000Z")
+        self.assertEqual(LogsReader.normalize_timestamp("2020-06-01T12:30:00+02:30"),
+                         "2020-06-01T10:00:00.000000000Z")
+        with self.assertRaises(ValueError):
+            LogsReader.normalize_timestamp("yesterday")
+
+    def test_no_filter(self):
+        lines, cursor = LogsReader.filter_lines(self.out)
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(cursor, "2020-06-01T10:00:03.500000000Z")
+
+    def test_since_cursor(self):
+        lines, cursor = LogsReader.filter_lines(self.out, since="2020-06-01T10:00:00.12Z")
+        self.assertEqual(len(lines), 3)
+        self.assertIn("ready for connections", lines[0])
+
+        # nothing new since the cursor
+        lines, next_cursor = LogsReader.filter_lines(self.out, since=cursor)
+        self.assertEqual(lines, [])
+        self.assertEqual(next_cursor, cursor)
+
+    def test_until_and_pattern(self):
+        lines, cursor = LogsReader.filter_lines(self.out, until="2020-06-01T10:00:02Z", pattern="ERROR|ready")
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(cursor, "2020-06-01T10:00:02.000000000Z")
+
+
+    def test_timestamp_only_at_the_line_start(self):
+        self.assertIsNone(LogsReader.get_timestamp("app_1    | message 2020-06-01T10:00:00Z"))
+        self.assertIsNone(LogsReader.get_timestamp("no prefix 2020-06-01T10:00:00Z"))
+        self.assertIsNone(LogsReader.get_timestamp("x" * 1000000 + "| 2020-06-01T10:00:00Z"))
+        self.assertEqual(LogsReader.get_timestamp("app_1    | 2020-06-01T10:00:00Z " + "x" * 1000000),
+                         "2020-06-01T10:00:00.000000000Z")
+
+
+if __name__ == '__main__':
+    unittest.main()
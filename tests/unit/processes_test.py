@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+import os
+import time
+import unittest
+from unittest import mock
+
+from rest.environment.processes import ProcessesSingleton
+from rest.utils.cmd_utils import CmdUtils
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class ProcessesTestCase(unittest.TestCase):
+
+    @staticmethod
+    def wait_reaped(process_id, timeout=5):
+        for i in range(int(timeout / 0.05)):
+            processes = {process.get('id'): process for process in ProcessesSingleton.get_instance().get_processes()}
+            if not processes.get(process_id).get('running'):
+                return processes.get(process_id)
+            time.sleep(0.05)
+        return None
+
+    def test_detached_reaped_no_zombie(self):
+        process_id = CmdUtils.run_cmd_detached("exit 3", "deployment1")
+        process = self.wait_reaped(process_id)
+
+        self.assertEqual(process.get('exitcode'), 3)
+        self.assertEqual(process.get('deployment'), "deployment1")
+        self.assertEqual(process.get('kind'), ProcessesSingleton.KIND_DETACHED)
+        self.assertIsNotNone(process.get('finishedat'))
+        # waited: no zombie left behind
+        with self.assertRaises(ChildProcessError):
+            os.waitpid(process.get('pid'), os.WNOHANG)
+
+    def test_filter_by_deployment(self):
+        CmdUtils.run_cmd_detached("sleep 0.1", "deployment2")
+        processes = ProcessesSingleton.get_instance().get_processes("deployment2")
+        self.assertGreaterEqual(len(processes), 1)
+        self.assertEqual(set([process.get('deployment') for process in processes]), {"deployment2"})
+
+    def test_retention(self):
+        process_id = CmdUtils.run_cmd_detached("true", "deployment3")
+        self.wait_reaped(process_id)
+
+        config = EnvStartupSingleton.get_instance().get_config()._replace(PROCESS_RETENTION=0)
+        with mock.patch.object(EnvStartupSingleton, "get_config", return_value=config):
+            time.sleep(0.01)
+            ProcessesSingleton.get_instance().reap()
+        self.assertNotIn(process_id, [process.get('id') for process in
+                                      ProcessesSingleton.get_instance().get_processes()])
+
+
+if __name__ == '__main__':
+    unittest.main()
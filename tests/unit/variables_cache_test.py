@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import yaml
+
+from rest.environment.variables_cache import VariablesCacheSingleton
+from rest.utils.env_startup import EnvStartupSingleton
+
+
+class VariablesCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.vars_dir = tempfile.mkdtemp()
+        VariablesCacheSingleton.get_instance().clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.vars_dir)
+        VariablesCacheSingleton.get_instance().clear()
+
+    def write(self, name, data):
+        path = f"{self.vars_dir}/{name}"
+        with open(path, "w") as f:
+            yaml.safe_dump(data, f)
+        return path
+
+    @staticmethod
+    def config(vars_cache_size):
+        return mock.patch.object(EnvStartupSingleton, "get_config",
+                                 return_value=EnvStartupSingleton.get_instance().get_config()._replace(
+                                     VARS_CACHE_SIZE=vars_cache_size))
+
+    def test_parsed_once(self):
+        cache = VariablesCacheSingleton.get_instance()
+        path = self.write("vars.yml", {"os": "linux", "apps": ["a", "b"]})
+        with mock.patch.object(yaml, "safe_load", wraps=yaml.safe_load) as safe_load:
+            for _ in range(5):
+                self.assertEqual(cache.get(path), {"os": "linux", "apps": ["a", "b"]})
+        self.assertEqual(safe_load.call_count, 1)
+        self.assertEqual(cache.get_stats().get('files'), 1)
+
+    def test_changed_file_parsed_again(self):
+        cache = VariablesCacheSingleton.get_instance()
+        path = self.write("vars.yml", {"os": "linux"})
+        self.assertEqual(cache.get(path), {"os": "linux"})
+        self.write("vars.yml", {"os": "macos"})
+        os.utime(path, (time.time() + 2, time.time() + 2))
+        self.assertEqual(cache.get(path), {"os": "macos"})
+        self.assertEqual(cache.get_stats().get('files'), 1)
+
+    def test_copy_changed_cache_not_changed(self):
+        cache = VariablesCacheSingleton.get_instance()
+        path = self.write("vars.yml", {"os": "linux", "apps": ["a"]})
+        data = cache.get(path)
+        data["os"] = "poisoned"
+        data.get("apps").append("poisoned")
+        cached = cache.get(path)
+        cached.get("apps").append("poisoned")
+        self.assertEqual(cache.get(path), {"os": "linux", "apps": ["a"]})
+
+    def test_least_recently_used_evicted(self):
+        cache = VariablesCacheSingleton.get_instance()
+        paths = [self.write(f"vars{i}.yml", {"data": "x" * 400 * 1024}) for i in range(3)]
+        with self.config(1):
+            cache.get(paths[0])
+            cache.get(paths[1])
+            cache.get(paths[0])
+            cache.get(paths[2])
+            stats = cache.get_stats()
+            self.assertEqual(stats.get('files'), 2)
+            self.assertLessEqual(stats.get('size'), 1024 * 1024)
+            with mock.patch.object(yaml, "safe_load", wraps=yaml.safe_load) as safe_load:
+                cache.get(paths[0])
+                cache.get(paths[2])
+            self.assertEqual(safe_load.call_count, 0)
+
+    def test_cache_disabled(self):
+        cache = VariablesCacheSingleton.get_instance()
+        path = self.write("vars.yml", {"os": "linux"})
+        with self.config(0):
+            self.assertEqual(cache.get(path), {"os": "linux"})
+            self.assertEqual(cache.get(path), {"os": "linux"})
+        self.assertEqual(cache.get_stats(), {"files": 0, "size": 0})
+
+    def test_nested_variables_parsed_once(self):
+        cache = VariablesCacheSingleton.get_instance()
+        data = {f"service{i}": {"image": f"image{i}:1.0", "ports": [i, i + 1], "env": {"KEY": "v" * 50}}
+                for i in range(200)}
+        path = self.write("vars.yml", data)
+        with mock.patch.object(yaml, "safe_load", wraps=yaml.safe_load) as safe_load:
+            copies = [cache.get(path) for _ in range(5)]
+        self.assertEqual(safe_load.call_count, 1)
+        for copy in copies:
+            self.assertEqual(copy, data)
+        self.assertEqual(len({id(copy) for copy in copies}), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()